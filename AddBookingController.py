@@ -160,6 +160,24 @@ class AddBookingController:
         except Exception as e:
             return {"success": False, "message": f"Произошла ошибка: {str(e)}"}
 
+    def import_bookings(self, lines, fmt: str = "ndjson") -> Dict[str, Any]:
+        """
+        Пакетный импорт бронирований (NDJSON или CSV с заголовком).
+        Ошибочные строки не прерывают импорт и перечисляются в отчете.
+        """
+        try:
+            report = self.booking_repository.import_bookings(lines, fmt)
+        except ValueError as e:
+            return {"success": False, "message": str(e)}
+        except Exception as e:
+            return {"success": False, "message": f"Произошла ошибка: {str(e)}"}
+
+        return {
+            "success": report["failed"] == 0,
+            "message": f"Импортировано {report['imported']} из {report['total']}",
+            **report,
+        }
+
     def get_empty_booking_form(self) -> Dict[str, Any]:
         """Возвращает шаблон пустой формы для бронирования."""
         tomorrow = (datetime.now() + timedelta(days=1)).strftime("%Y-%m-%d")
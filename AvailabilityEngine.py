@@ -0,0 +1,77 @@
+"""Проверка занятости номеров по интервалам бронирований."""
+
+from datetime import date
+from typing import List, Optional
+
+from ClientRepDB import DatabaseConnection
+
+# Интервал проживания - полуоткрытый [check_in, check_out): день выезда свободен
+# для следующего заезда. Выражения совпадают с ограничением-исключением
+# bookings_no_overlap, поэтому каждая проверка - один проход по его GiST-индексу.
+ROOM_KEY_SQL = "int4range({alias}room_id, {alias}room_id, '[]')"
+STAY_RANGE_SQL = "daterange({alias}check_in, {alias}check_out, '[)')"
+ACTIVE_SQL = "{alias}status <> 'cancelled'"
+
+
+class AvailabilityEngine:
+    """Единая точка проверки пересечений бронирований по номерам и датам."""
+
+    def __init__(self, db: Optional[DatabaseConnection] = None) -> None:
+        self._db = db or DatabaseConnection()
+
+    @staticmethod
+    def overlaps(
+        check_in: date, check_out: date, other_in: date, other_out: date
+    ) -> bool:
+        """Пересекаются ли два полуоткрытых интервала проживания."""
+        return check_in < other_out and other_in < check_out
+
+    @staticmethod
+    def conflict_condition(alias: str = "") -> str:
+        """SQL-условие "активное бронирование этого номера пересекает даты".
+        Параметры: room_id, check_in, check_out."""
+        prefix = f"{alias}." if alias else ""
+        return (
+            f"{ROOM_KEY_SQL.format(alias=prefix)} = int4range(%s, %s, '[]')"
+            f" AND {STAY_RANGE_SQL.format(alias=prefix)} && daterange(%s, %s, '[)')"
+            f" AND {ACTIVE_SQL.format(alias=prefix)}"
+        )
+
+    @staticmethod
+    def conflict_params(room_id: int, check_in, check_out) -> tuple:
+        """Параметры для conflict_condition."""
+        return (room_id, room_id, check_in, check_out)
+
+    def has_conflict(
+        self,
+        room_id: int,
+        check_in,
+        check_out,
+        exclude_booking_id: Optional[int] = None,
+    ) -> bool:
+        """Есть ли активное бронирование номера, пересекающее [check_in, check_out)."""
+        query = f"SELECT EXISTS (SELECT 1 FROM bookings WHERE {self.conflict_condition()}"
+        params = self.conflict_params(room_id, check_in, check_out)
+        if exclude_booking_id is not None:
+            query += " AND id <> %s"
+            params += (exclude_booking_id,)
+        rows = self._db.execute_query(query + ")", params)
+        return bool(rows and rows[0][0])
+
+    def free_room_ids(self, check_in, check_out) -> List[int]:
+        """ID доступных номеров, свободных на весь интервал [check_in, check_out)."""
+        rows = self._db.execute_query(
+            f"""
+            SELECT r.id
+            FROM rooms r
+            WHERE r.is_available = TRUE
+              AND r.id NOT IN (SELECT b.room_id
+                               FROM bookings b
+                               WHERE {STAY_RANGE_SQL.format(alias="b.")}
+                                     && daterange(%s, %s, '[)')
+                                 AND {ACTIVE_SQL.format(alias="b.")})
+            ORDER BY r.room_number
+            """,
+            (check_in, check_out),
+        )
+        return [r[0] for r in rows] if rows else []
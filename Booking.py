@@ -7,6 +7,18 @@ from decimal import Decimal
 class Booking:
     """Класс для хранения информации о бронировании."""
 
+    __slots__ = (
+        "_id",
+        "_client_id",
+        "_room_id",
+        "_check_in",
+        "_check_out",
+        "_total_sum",
+        "_status",
+        "_notes",
+        "_created_at",
+    )
+
     def __init__(self, *args, **kwargs):
         """Инициализирует бронирование из различных источников."""
         if kwargs.get("from_string"):
@@ -76,6 +88,26 @@ class Booking:
         self._notes = notes if notes else ""
         self._created_at = datetime.now()
 
+    @classmethod
+    def from_row(cls, row):
+        """Создает бронирование из строки БД в порядке BookingRepDB.COLUMNS
+        без валидации. created_at берется из строки (None, если его нет),
+        а не из datetime.now()."""
+        booking = cls.__new__(cls)
+        (
+            booking._id,
+            booking._client_id,
+            booking._room_id,
+            booking._check_in,
+            booking._check_out,
+            booking._total_sum,
+            booking._status,
+            notes,
+        ) = row[:8]
+        booking._notes = notes or ""
+        booking._created_at = row[8] if len(row) > 8 else None
+        return booking
+
     @staticmethod
     def validate_required(value, field_name: str):
         """Проверяет что значение не пустое."""
@@ -142,7 +174,8 @@ class Booking:
             if price_decimal < 0:
                 raise ValueError(f"{field_name} не может быть отрицательной!")
             return price_decimal
-        except (ValueError, TypeError) as exc:
+        except (ValueError, TypeError, ArithmeticError) as exc:
+            # Decimal сообщает о нечисловой строке и NaN через InvalidOperation
             raise ValueError(f"{field_name} должна быть числом!") from exc
 
     @staticmethod
@@ -89,6 +89,7 @@ class BookingController:
         filters: Optional[Dict[str, Any]] = None,
         sort_by: Optional[str] = None,
         sort_order: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         page = max(page, 1)
         filters = filters or {}
@@ -96,27 +97,23 @@ class BookingController:
 
         need_decorator = bool(filters) or sort_by is not None
         if need_decorator:
+            # декоратор выполняет фильтры, сортировку и пагинацию в базе данных
             repo_to_use = self.apply_filters(filters, sort_by, sort_order)
-            # Получаем Booking объекты из декоратора
-            bookings_objects = repo_to_use.get_all()
-            total = len(bookings_objects)
         else:
             repo_to_use = self.repository
-            total = repo_to_use.get_count()
-            bookings_objects = []
+        total = repo_to_use.get_count()
 
+        next_cursor = None
         if page_size is None or page_size <= 0:
-            if need_decorator:
-                data_slice = bookings_objects
-            else:
-                data_slice = repo_to_use.read_all()
+            data_slice = repo_to_use.read_all()
             page_size = total if total > 0 else 1
         else:
-            if need_decorator:
-                offset = (page - 1) * page_size
-                data_slice = bookings_objects[offset : offset + page_size]
-            else:
-                data_slice = repo_to_use.get_k_n_short_list(page_size, page)
+            # страница выбирается по ключу сортировки, если передан курсор;
+            # next_cursor строится в любом случае
+            if not need_decorator:
+                repo_to_use = self.apply_filters(filters, sort_by, sort_order)
+                need_decorator = True  # дальше работаем с объектами модели
+            data_slice, next_cursor = repo_to_use.get_page(page_size, page, cursor)
 
         booking_list = []
         if need_decorator:
@@ -153,6 +150,7 @@ class BookingController:
             "total": total,
             "page": page,
             "page_size": page_size,
+            "next_cursor": next_cursor,
             "filters_applied": bool(filters),
             "sort_by": sort_by,
             "sort_order": sort_order,
@@ -0,0 +1,22 @@
+"""Снимок бронирований в столбцовом формате."""
+
+from Booking import Booking
+from ColumnarRepository import ColumnarRepository
+
+
+class BookingRepColumnar(ColumnarRepository):
+    """Бронирования в файле ColumnarSnapshot (резервные копии и тестовые данные)."""
+
+    MODEL = Booking
+    # порядок столбцов совпадает с BookingRepDB.COLUMNS
+    SCHEMA = (
+        ("id", "int"),
+        ("client_id", "int"),
+        ("room_id", "int"),
+        ("check_in", "date"),
+        ("check_out", "date"),
+        ("total_sum", "decimal"),
+        ("status", "str"),
+        ("notes", "str"),
+        ("created_at", "datetime"),
+    )
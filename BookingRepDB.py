@@ -1,21 +1,107 @@
 """Реализация репозитория бронирований в базе данных PostgreSQL."""
 
-from typing import List, Optional
+import csv
+import io
+import json
+from bisect import bisect_right
+from collections import defaultdict
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 # from datetime import date, datetime
 
+from psycopg2 import errors
+
+from AvailabilityEngine import ACTIVE_SQL, STAY_RANGE_SQL, AvailabilityEngine
 from ClientRepDB import DatabaseConnection
 from Booking import Booking
+from EntityCache import EntityCache
+from OccupancyCache import OccupancyCache
+from QueryBuilder import QueryBuilder, copy_csv_row
+
+IMPORT_CONFIG = {  # константа с настройками пакетного импорта бронирований
+    "batch_size": 5000,  # строк в одной транзакции COPY
+    "max_errors": 1000,  # ошибок строк в отчете (остальные только считаются)
+}
+
+# порядок столбцов COPY при импорте
+IMPORT_COLUMNS = (
+    "client_id",
+    "room_id",
+    "check_in",
+    "check_out",
+    "total_sum",
+    "status",
+    "notes",
+)
+
+# total_sum хранится в DECIMAL(10, 2): не больше 8 цифр до точки и 2 после
+IMPORT_SUM_LIMIT = Decimal(10) ** 8
+IMPORT_SUM_STEP = Decimal("0.01")
 
 
 class BookingRepDB:
     """Репозиторий для работы с бронированиями в базе данных."""
 
+    TABLE = "bookings"
+    COLUMNS = (
+        "id",
+        "client_id",
+        "room_id",
+        "check_in",
+        "check_out",
+        "total_sum",
+        "status",
+        "notes",
+        "created_at",
+    )
+    EXPORT_COLUMNS = COLUMNS
+
     def __init__(self):
         self._db = DatabaseConnection()
+        self._availability = AvailabilityEngine(self._db)
+        self._occupancy = OccupancyCache()
+        self._cache = EntityCache.named("bookings")
+
+    def new_query(self) -> QueryBuilder:
+        """Создает построитель запроса по бронированиям."""
+        return QueryBuilder(self.TABLE, self.COLUMNS)
+
+    def export_rows(self) -> Iterator[tuple]:
+        """Все бронирования потоком кортежей в порядке EXPORT_COLUMNS (по ID)."""
+        return self._db.stream_query(
+            f"SELECT {', '.join(self.EXPORT_COLUMNS)} FROM bookings ORDER BY id"
+        )
+
+    def find(self, builder: QueryBuilder) -> List[Booking]:
+        """Выполняет запрос построителя и возвращает бронирования."""
+        query, params = builder.build_select()
+        return self._rows_to_bookings(self._db.execute_query(query, params))
+
+    def find_page(self, builder: QueryBuilder) -> Tuple[List[Booking], Optional[str]]:
+        """Выполняет keyset-запрос построителя: страница и курсор следующей."""
+        query, params = builder.build_select()
+        rows, next_cursor = builder.split_page(self._db.execute_query(query, params))
+        return self._rows_to_bookings(rows), next_cursor
+
+    @staticmethod
+    def _rows_to_bookings(rows: List[tuple]) -> List[Booking]:
+        """Преобразует строки выборки в объекты модели. Строки из БД уже
+        проверены ограничениями таблицы и не проходят валидацию повторно."""
+        return [Booking.from_row(r) for r in rows]
+
+    def count_where(self, builder: QueryBuilder) -> int:
+        """Количество бронирований, удовлетворяющих условиям построителя."""
+        query, params = builder.build_count()
+        rows = self._db.execute_query(query, params)
+        return rows[0][0] if rows else 0
 
     def get_by_id(self, booking_id: int) -> Optional[Booking]:
-        """Получает бронирование по ID."""
+        """Получает бронирование по ID (через кэш)."""
+        return self._cache.get_or_load(booking_id, lambda: self._load_by_id(booking_id))
+
+    def _load_by_id(self, booking_id: int) -> Optional[Booking]:
+        """Загружает бронирование по ID из базы данных."""
         rows = self._db.execute_query(
             """
             SELECT id,
@@ -34,19 +120,7 @@ class BookingRepDB:
         )
         if rows:
             r = rows[0]
-            return Booking(
-                {
-                    "id": r[0],
-                    "client_id": r[1],
-                    "room_id": r[2],
-                    "check_in": r[3],
-                    "check_out": r[4],
-                    "total_sum": r[5],
-                    "status": r[6],
-                    "notes": r[7],
-                },
-                from_dict=True,
-            )
+            return Booking.from_row(r)
         return None
 
     def get_all(self) -> List[Booking]:
@@ -66,22 +140,7 @@ class BookingRepDB:
             ORDER BY created_at DESC
             """
         )
-        return [
-            Booking(
-                {
-                    "id": r[0],
-                    "client_id": r[1],
-                    "room_id": r[2],
-                    "check_in": r[3],
-                    "check_out": r[4],
-                    "total_sum": r[5],
-                    "status": r[6],
-                    "notes": r[7],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        return [Booking.from_row(r) for r in rows]
 
     def get_k_n_short_list(self, k: int, n: int) -> List[Booking]:
         """Пагинация бронирований."""
@@ -104,22 +163,7 @@ class BookingRepDB:
             """,
             (k, offset),
         )
-        return [
-            Booking(
-                {
-                    "id": r[0],
-                    "client_id": r[1],
-                    "room_id": r[2],
-                    "check_in": r[3],
-                    "check_out": r[4],
-                    "total_sum": r[5],
-                    "status": r[6],
-                    "notes": r[7],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        return [Booking.from_row(r) for r in rows]
 
     def get_by_client_id(self, client_id: int) -> List[Booking]:
         """Получает все бронирования клиента."""
@@ -140,22 +184,7 @@ class BookingRepDB:
             """,
             (client_id,),
         )
-        return [
-            Booking(
-                {
-                    "id": r[0],
-                    "client_id": r[1],
-                    "room_id": r[2],
-                    "check_in": r[3],
-                    "check_out": r[4],
-                    "total_sum": r[5],
-                    "status": r[6],
-                    "notes": r[7],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        return [Booking.from_row(r) for r in rows]
 
     def get_by_room_id(self, room_id: int) -> List[Booking]:
         """Получает все бронирования номера."""
@@ -176,22 +205,7 @@ class BookingRepDB:
             """,
             (room_id,),
         )
-        return [
-            Booking(
-                {
-                    "id": r[0],
-                    "client_id": r[1],
-                    "room_id": r[2],
-                    "check_in": r[3],
-                    "check_out": r[4],
-                    "total_sum": r[5],
-                    "status": r[6],
-                    "notes": r[7],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        return [Booking.from_row(r) for r in rows]
 
     def get_active_bookings(self) -> List[Booking]:
         """Получает активные бронирования (confirmed)."""
@@ -211,183 +225,162 @@ class BookingRepDB:
             ORDER BY check_in
             """
         )
-        return [
-            Booking(
-                {
-                    "id": r[0],
-                    "client_id": r[1],
-                    "room_id": r[2],
-                    "check_in": r[3],
-                    "check_out": r[4],
-                    "total_sum": r[5],
-                    "status": r[6],
-                    "notes": r[7],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        return [Booking.from_row(r) for r in rows]
 
     def add_booking(self, booking_data: dict) -> bool:
-        """Добавляет новое бронирование."""
-
-        # Проверка доступности номера на даты
-        check_availability = self._db.execute_query(
-            """
-            SELECT COUNT(*)
-            FROM bookings
-            WHERE room_id = %s
-              AND status != 'cancelled'
-              AND (
-                (check_in <= %s
-              AND check_out >= %s)
-               OR
-                (check_in <= %s
-              AND check_out >= %s)
-               OR
-                (%s <= check_in
-              AND %s >= check_out)
-                )
-            """,
-            (
-                booking_data["room_id"],
-                booking_data["check_out"],
-                booking_data["check_in"],
-                booking_data["check_in"],
-                booking_data["check_out"],
-                booking_data["check_in"],
-                booking_data["check_out"],
-            ),
-        )
-
-        if check_availability and check_availability[0][0] > 0:
-            raise ValueError("Номер уже забронирован на указанные даты!")
-
-        # Проверка, что клиент и номер существуют
-        client_exists = self._db.execute_query(
-            "SELECT COUNT(*) FROM clients WHERE id = %s",
-            (booking_data["client_id"],),
-        )
-
-        if not client_exists or client_exists[0][0] == 0:
-            raise ValueError(f"Клиент с ID {booking_data['client_id']} не найден!")
-
-        room_exists = self._db.execute_query(
-            "SELECT COUNT(*) FROM rooms WHERE id = %s AND is_available = TRUE",
-            (booking_data["room_id"],),
-        )
-
-        if not room_exists or room_exists[0][0] == 0:
-            raise ValueError(
-                f"Номер с ID {booking_data['room_id']} не найден или недоступен!"
-            )
-
-        # Добавление
-        self._db.execute_insert(
-            """
-            INSERT INTO bookings
-            (client_id, room_id, check_in, check_out,
-             total_sum, status, notes)
-            VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
-            """,
-            (
-                booking_data["client_id"],
-                booking_data["room_id"],
-                booking_data["check_in"],
-                booking_data["check_out"],
-                booking_data["total_sum"],
-                booking_data.get("status", "confirmed"),
-                booking_data.get("notes", ""),
-            ),
-        )
-
-        return True
-
-    def update_booking(self, booking_id: int, booking_data: dict) -> bool:
-        """Обновляет бронирование. Возвращает True, если обновлён."""
-
-        # При обновлении дат проверяем доступность (исключая текущее бронирование)
-        if "check_in" in booking_data or "check_out" in booking_data:
-            check_availability = self._db.execute_query(
+        """Добавляет новое бронирование.
+
+        Проверки и вставка - одна транзакция. Сначала отдельным запросом
+        блокируется строка номера, поэтому add_booking одного номера выполняются
+        по очереди. Пересечения проверяются следующим запросом: в READ COMMITTED
+        у него свой снимок, и он видит бронирование, зафиксированное, пока
+        блокировка ожидалась (условие в запросе с FOR UPDATE смотрело бы в
+        снимок до ожидания). Импорт блокирует номера так же; от гонок с
+        update_booking, который номер не блокирует, защищает ограничение
+        bookings_no_overlap."""
+        room_id = booking_data["room_id"]
+        check_in, check_out = booking_data["check_in"], booking_data["check_out"]
+        status = booking_data.get("status", "confirmed")
+
+        with self._db.transaction():
+            rows = self._db.execute_query(
                 """
-                SELECT COUNT(*)
-                FROM bookings
-                WHERE room_id = %s
-                  AND id != %s
-                  AND status != 'cancelled'
-                  AND (
-                    (check_in <= %s
-                  AND check_out >= %s)
-                   OR
-                    (check_in <= %s
-                  AND check_out >= %s)
-                   OR
-                    (%s <= check_in
-                  AND %s >= check_out)
-                    )
+                SELECT r.is_available,
+                       EXISTS (SELECT 1 FROM clients c WHERE c.id = %s)
+                FROM rooms r
+                WHERE r.id = %s
+                FOR UPDATE OF r
                 """,
-                (
-                    booking_data.get("room_id", self.get_by_id(booking_id).room_id),
-                    booking_id,
-                    booking_data.get("check_out", self.get_by_id(booking_id).check_out),
-                    booking_data.get("check_in", self.get_by_id(booking_id).check_in),
-                    booking_data.get("check_in", self.get_by_id(booking_id).check_in),
-                    booking_data.get("check_out", self.get_by_id(booking_id).check_out),
-                    booking_data.get("check_in", self.get_by_id(booking_id).check_in),
-                    booking_data.get("check_out", self.get_by_id(booking_id).check_out),
-                ),
+                (booking_data["client_id"], room_id),
             )
+            if not rows:
+                raise ValueError(f"Номер с ID {room_id} не найден или недоступен!")
+            room_available, client_exists = rows[0]
 
-            if check_availability and check_availability[0][0] > 0:
+            # Проверка доступности номера на даты (после получения блокировки)
+            if self._availability.has_conflict(room_id, check_in, check_out):
                 raise ValueError("Номер уже забронирован на указанные даты!")
 
-        # Обновление
-        update_fields = []
-        params = []
-
-        if "client_id" in booking_data:
-            update_fields.append("client_id=%s")
-            params.append(booking_data["client_id"])
-
-        if "room_id" in booking_data:
-            update_fields.append("room_id=%s")
-            params.append(booking_data["room_id"])
-
-        if "check_in" in booking_data:
-            update_fields.append("check_in=%s")
-            params.append(booking_data["check_in"])
-
-        if "check_out" in booking_data:
-            update_fields.append("check_out=%s")
-            params.append(booking_data["check_out"])
-
-        if "total_sum" in booking_data:
-            update_fields.append("total_sum=%s")
-            params.append(booking_data["total_sum"])
+            # Проверка, что клиент и номер существуют
+            if not client_exists:
+                raise ValueError(f"Клиент с ID {booking_data['client_id']} не найден!")
+            if not room_available:
+                raise ValueError(f"Номер с ID {room_id} не найден или недоступен!")
+
+            # Добавление (ограничение bookings_no_overlap - последняя линия защиты)
+            try:
+                booking_id = self._db.execute_insert(
+                    """
+                    INSERT INTO bookings
+                    (client_id, room_id, check_in, check_out,
+                     total_sum, status, notes)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s) RETURNING id
+                    """,
+                    (
+                        booking_data["client_id"],
+                        room_id,
+                        check_in,
+                        check_out,
+                        booking_data["total_sum"],
+                        status,
+                        booking_data.get("notes", ""),
+                    ),
+                )
+            except errors.ExclusionViolation as exc:
+                raise ValueError("Номер уже забронирован на указанные даты!") from exc
 
-        if "status" in booking_data:
-            update_fields.append("status=%s")
-            params.append(booking_data["status"])
+            self._db.after_commit(
+                lambda: self._occupancy.booking_saved(
+                    booking_id, room_id, check_in, check_out, status
+                )
+            )
+        return True
 
-        if "notes" in booking_data:
-            update_fields.append("notes=%s")
-            params.append(booking_data.get("notes", ""))
+    # изменяемые через update_booking столбцы, в порядке SET
+    UPDATABLE_COLUMNS = (
+        "client_id",
+        "room_id",
+        "check_in",
+        "check_out",
+        "total_sum",
+        "status",
+        "notes",
+    )
+    # столбцы, от которых зависит занятость номера
+    STAY_COLUMNS = ("room_id", "check_in", "check_out", "status")
 
-        # Добавляем updated_at и ID
-        update_fields.append("updated_at=CURRENT_TIMESTAMP")
-        params.append(booking_id)
+    def update_booking(self, booking_id: int, booking_data: dict) -> bool:
+        """Обновляет бронирование. Возвращает True, если обновлён.
 
-        if not update_fields:
+        Одна транзакция на одном соединении и два оператора: строка
+        блокируется SELECT ... FOR UPDATE, затем UPDATE с проверкой
+        пересечений в том же запросе возвращает новую версию строки."""
+        columns = [c for c in self.UPDATABLE_COLUMNS if c in booking_data]
+        if not columns:
             return False
+        values = [booking_data[c] for c in columns]
+
+        # пересечения проверяем, если меняются номер, даты или статус
+        check_conflict = any(c in booking_data for c in self.STAY_COLUMNS)
+        try:
+            with self._db.connection() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        """
+                        SELECT room_id, check_in, check_out, status
+                        FROM bookings
+                        WHERE id = %s FOR UPDATE
+                        """,
+                        (booking_id,),
+                    )
+                    current = cursor.fetchone()
+                    if current is None:
+                        return False
+
+                    room_id, check_in, check_out, status = (
+                        booking_data.get(column, value)
+                        for column, value in zip(self.STAY_COLUMNS, current)
+                    )
+                    query = f"""
+                        UPDATE bookings b SET
+                            {", ".join(f"{c}=%s" for c in columns)},
+                            updated_at=CURRENT_TIMESTAMP
+                        WHERE b.id = %s
+                        """
+                    params = tuple(values) + (booking_id,)
+                    if check_conflict and status != "cancelled":
+                        query += f"""
+                        AND NOT EXISTS (SELECT 1 FROM bookings o
+                                        WHERE {self._availability.conflict_condition("o")}
+                                          AND o.id <> b.id)
+                        """
+                        params += self._availability.conflict_params(
+                            room_id, check_in, check_out
+                        )
+                    query += " RETURNING room_id, check_in, check_out, status"
+                    cursor.execute(query, params)
+                    updated = cursor.fetchone()
+                self._db.commit(conn)
+        except errors.ExclusionViolation as exc:
+            raise ValueError("Номер уже забронирован на указанные даты!") from exc
+        finally:
+            self._forget(booking_id)
+
+        if updated is None:
+            # строка заблокирована и существует - значит, условие пересечения
+            raise ValueError("Номер уже забронирован на указанные даты!")
 
-        query = f"""
-        UPDATE bookings SET
-            {', '.join(update_fields)}
-        WHERE id=%s
-        """
+        self._db.after_commit(
+            lambda: self._occupancy.booking_saved(booking_id, *updated)
+        )
+        return True
 
-        rows_affected = self._db.execute_update(query, tuple(params))
-        return rows_affected > 0
+    def _forget(self, booking_id: int) -> None:
+        """Убирает бронирование из кэша сейчас и, в транзакции, еще раз после COMMIT
+        (чтобы параллельное чтение не закэшировало незафиксированное состояние)."""
+        self._cache.invalidate(booking_id)
+        if self._db.in_transaction():
+            self._db.after_commit(lambda: self._cache.invalidate(booking_id))
 
     def delete_booking(self, booking_id: int) -> bool:
         """Удаление бронирования по ID."""
@@ -395,6 +388,9 @@ class BookingRepDB:
             "DELETE FROM bookings WHERE id=%s",
             (booking_id,),
         )
+        self._forget(booking_id)
+        if rows_affected > 0:
+            self._db.after_commit(lambda: self._occupancy.booking_removed(booking_id))
         return rows_affected > 0
 
     def get_count(self) -> int:
@@ -414,10 +410,17 @@ class BookingRepDB:
             """,
             (booking_id,),
         )
+        self._forget(booking_id)
+        if rows_affected > 0:
+            self._db.after_commit(lambda: self._occupancy.booking_removed(booking_id))
         return rows_affected > 0
 
     def get_bookings_for_period(self, start_date: str, end_date: str) -> List[Booking]:
         """Получает бронирования за указанный период."""
+        start_date = Booking.validate_date(start_date, "start_date")
+        end_date = Booking.validate_date(end_date, "end_date")
+        if start_date > end_date:
+            return []
         rows = self._db.execute_query(
             """
             SELECT id,
@@ -430,56 +433,287 @@ class BookingRepDB:
                    notes,
                    created_at
             FROM bookings
-            WHERE (
-                      (check_in BETWEEN %s AND %s) OR
-                      (check_out BETWEEN %s AND %s) OR
-                      (check_in <= %s AND check_out >= %s)
-                      )
+            WHERE daterange(check_in, check_out, '[]') && daterange(%s, %s, '[]')
             ORDER BY check_in
             """,
-            (start_date, end_date, start_date, end_date, start_date, end_date),
+            (start_date, end_date),
         )
-        return [
-            Booking(
-                {
-                    "id": r[0],
-                    "client_id": r[1],
-                    "room_id": r[2],
-                    "check_in": r[3],
-                    "check_out": r[4],
-                    "total_sum": r[5],
-                    "status": r[6],
-                    "notes": r[7],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        return [Booking.from_row(r) for r in rows]
 
     def get_available_rooms_for_dates(self, check_in: str, check_out: str) -> List[int]:
         """Получает список ID доступных номеров на указанные даты."""
         rows = self._db.execute_query(
-            """
-            SELECT r.id
-            FROM rooms r
-            WHERE r.is_available = TRUE
-              AND r.id NOT IN (SELECT b.room_id
-                               FROM bookings b
-                               WHERE b.status
-                != 'cancelled'
-              AND (
-                (b.check_in <= %s
-              AND b.check_out >= %s)
-               OR
-                (b.check_in <= %s
-              AND b.check_out >= %s)
-               OR
-                (%s <= b.check_in
-              AND %s >= b.check_out)
+            "SELECT id FROM rooms WHERE is_available = TRUE ORDER BY room_number"
+        )
+        room_ids = [r[0] for r in rows] if rows else []
+        return self._occupancy.free_room_ids(room_ids, check_in, check_out)
+
+    # ---- пакетный импорт ----
+
+    @staticmethod
+    def read_import_rows(
+        lines: Iterable[str], fmt: str = "ndjson"
+    ) -> Iterator[Tuple[int, Any]]:
+        """Разбирает NDJSON или CSV (с заголовком) построчно.
+        Выдает (номер строки, dict) или (номер строки, ValueError)."""
+        if fmt == "ndjson":
+            for line_no, line in enumerate(lines, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield line_no, ValueError(f"Неверный формат JSON: {exc.msg}")
+                    continue
+                if isinstance(data, dict):
+                    yield line_no, data
+                else:
+                    yield line_no, ValueError("Строка должна быть JSON-объектом")
+        elif fmt == "csv":
+            reader = csv.DictReader(lines)
+            for data in reader:
+                yield reader.line_num, data
+        else:
+            raise ValueError(f"Неизвестный формат импорта: {fmt}")
+
+    def import_bookings(
+        self, lines: Iterable[str], fmt: str = "ndjson", batch_size: int = None
+    ) -> Dict[str, Any]:
+        """Пакетный импорт бронирований из NDJSON/CSV.
+
+        Строки проверяются моделью Booking, пересечения с базой и внутри
+        пакета ищутся одним проходом, принятые строки загружаются через COPY.
+        Ошибочные строки попадают в отчет и не прерывают импорт."""
+        batch_size = batch_size or IMPORT_CONFIG["batch_size"]
+        report = {"total": 0, "imported": 0, "failed": 0, "errors": []}
+
+        batch = []
+        for line_no, data in self.read_import_rows(lines, fmt):
+            report["total"] += 1
+            batch.append((line_no, data))
+            if len(batch) >= batch_size:
+                self._import_batch(batch, report)
+                batch = []
+        if batch:
+            self._import_batch(batch, report)
+
+        if report["imported"]:
+            self._occupancy.invalidate()
+        return report
+
+    @staticmethod
+    def _import_error(report: Dict[str, Any], line_no: int, message: str) -> None:
+        """Записывает ошибку строки в отчет импорта."""
+        report["failed"] += 1
+        if len(report["errors"]) < IMPORT_CONFIG["max_errors"]:
+            report["errors"].append({"row": line_no, "message": message})
+
+    def _import_batch(
+        self, batch: List[Tuple[int, Any]], report: Dict[str, Any]
+    ) -> None:
+        """Проверяет и загружает один пакет в одной транзакции."""
+        # 1. проверка полей моделью
+        candidates = []  # (номер строки, Booking, сумма не задана)
+        for line_no, data in batch:
+            if isinstance(data, Exception):
+                self._import_error(report, line_no, str(data))
+                continue
+            try:
+                no_sum = data.get("total_sum") in (None, "")
+                booking = Booking(
+                    {**data, "id": 0, "total_sum": 0 if no_sum else data["total_sum"]},
+                    from_dict=True,
                 )
+            except ValueError as exc:
+                self._import_error(report, line_no, str(exc))
+                continue
+            message = self._table_error(booking)
+            if message:
+                self._import_error(report, line_no, message)
+                continue
+            candidates.append((line_no, booking, no_sum))
+        if not candidates:
+            return
+
+        room_ids = sorted({b.room_id for _, b, _ in candidates})
+        client_ids = list({b.client_id for _, b, _ in candidates})
+        first_day = min(b.check_in for _, b, _ in candidates)
+        last_day = max(b.check_out for _, b, _ in candidates)
+
+        accepted = None  # (номер строки, Booking) прошедших проверки
+        try:
+            with self._db.transaction() as conn:
+                # 2. номера пакета блокируются, как в add_booking
+                rooms = {
+                    r[0]: (r[1], r[2])
+                    for r in self._db.execute_query(
+                        """
+                        SELECT id, is_available, price_per_night
+                        FROM rooms
+                        WHERE id = ANY(%s)
+                        ORDER BY id
+                        FOR UPDATE
+                        """,
+                        (room_ids,),
+                    )
+                }
+                clients = {
+                    r[0]
+                    for r in self._db.execute_query(
+                        "SELECT id FROM clients WHERE id = ANY(%s)", (client_ids,)
+                    )
+                }
+                busy = defaultdict(list)  # room_id -> [(заезд, выезд)] из базы
+                for room_id, check_in, check_out in self._db.execute_query(
+                    f"""
+                    SELECT room_id, check_in, check_out
+                    FROM bookings
+                    WHERE room_id = ANY(%s)
+                      AND {STAY_RANGE_SQL.format(alias="")} && daterange(%s, %s, '[)')
+                      AND {ACTIVE_SQL.format(alias="")}
+                    ORDER BY room_id, check_in
+                    """,
+                    (room_ids, first_day, last_day),
+                ):
+                    busy[room_id].append((check_in, check_out))
+
+                # 3. ссылки и пересечения
+                accepted = self._accept_import_rows(
+                    candidates, rooms, clients, busy, report
                 )
-            ORDER BY r.room_number
-            """,
-            (check_out, check_in, check_in, check_out, check_in, check_out),
+                if not accepted:
+                    return
+
+                # 4. загрузка через COPY; если база отклоняет COPY, строки
+                # загружаются по одной, и в отчет попадают только ошибочные
+                buffer = io.StringIO()
+                for _, booking in accepted:
+                    buffer.write(copy_csv_row(self._import_values(booking)))
+                buffer.seek(0)
+                with conn.cursor() as cursor:
+                    cursor.execute("SAVEPOINT import_copy")
+                    try:
+                        cursor.copy_expert(
+                            f"COPY bookings ({', '.join(IMPORT_COLUMNS)})"
+                            " FROM STDIN WITH (FORMAT csv)",
+                            buffer,
+                        )
+                    except errors.Error:
+                        cursor.execute("ROLLBACK TO SAVEPOINT import_copy")
+                        accepted = self._insert_import_rows(cursor, accepted, report)
+        except errors.Error as exc:
+            # пакет откатывается целиком, остальные пакеты импортируются;
+            # отклоненные проверками строки уже есть в отчете
+            if accepted is None:
+                line_numbers = [line_no for line_no, _, _ in candidates]
+            else:
+                line_numbers = [line_no for line_no, _ in accepted]
+            for line_no in line_numbers:
+                self._import_error(report, line_no, f"Ошибка загрузки пакета: {exc}")
+            return
+        report["imported"] += len(accepted)
+
+    @staticmethod
+    def _import_values(booking: Booking) -> tuple:
+        """Значения строки импорта в порядке IMPORT_COLUMNS."""
+        return (
+            booking.client_id,
+            booking.room_id,
+            booking.check_in.isoformat(),
+            booking.check_out.isoformat(),
+            booking.total_sum,
+            booking.status,
+            booking.notes,
         )
-        return [r[0] for r in rows] if rows else []
+
+    @staticmethod
+    def _table_error(booking: Booking) -> Optional[str]:
+        """Ошибка строки, которую пропускает модель, но отклонит таблица
+        (а вместе с ней и COPY всего пакета), или None."""
+        total_sum = booking.total_sum
+        if (
+            not total_sum.is_finite()
+            or total_sum >= IMPORT_SUM_LIMIT
+            or total_sum != total_sum.quantize(IMPORT_SUM_STEP)
+        ):
+            return (
+                "Общая сумма должна быть меньше 100 000 000 "
+                "и иметь не больше двух знаков после запятой!"
+            )
+        if "\x00" in booking.notes:
+            return "Примечания не могут содержать нулевой символ!"
+        return None
+
+    def _insert_import_rows(
+        self, cursor, accepted: List[Tuple[int, Booking]], report: Dict[str, Any]
+    ) -> List[Tuple[int, Booking]]:
+        """Вставляет строки по одной, каждую под своей точкой сохранения:
+        строка, отклоненная базой, попадает в отчет, остальные загружаются.
+        Возвращает загруженные строки."""
+        inserted = []
+        for line_no, booking in accepted:
+            cursor.execute("SAVEPOINT import_row")
+            try:
+                cursor.execute(
+                    f"INSERT INTO bookings ({', '.join(IMPORT_COLUMNS)})"
+                    f" VALUES ({', '.join(['%s'] * len(IMPORT_COLUMNS))})",
+                    self._import_values(booking),
+                )
+            except errors.Error as exc:
+                cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                self._import_error(report, line_no, f"Ошибка загрузки строки: {exc}")
+                continue
+            cursor.execute("RELEASE SAVEPOINT import_row")
+            inserted.append((line_no, booking))
+        return inserted
+
+    def _accept_import_rows(
+        self, candidates, rooms, clients, busy, report
+    ) -> List[Tuple[int, Booking]]:
+        """Отбирает строки без ошибок ссылок и пересечений: (номер строки, Booking).
+
+        Строки каждого номера сортируются по заезду и сливаются с занятыми
+        интервалами из базы за один проход; из пересекающихся строк пакета
+        принимается начинающаяся раньше."""
+        by_room = defaultdict(list)
+        for line_no, booking, no_sum in candidates:
+            room = rooms.get(booking.room_id)
+            if booking.client_id not in clients:
+                self._import_error(
+                    report, line_no, f"Клиент с ID {booking.client_id} не найден!"
+                )
+            elif room is None or not room[0]:
+                self._import_error(
+                    report,
+                    line_no,
+                    f"Номер с ID {booking.room_id} не найден или недоступен!",
+                )
+            else:
+                if no_sum:
+                    booking.total_sum = room[1] * booking.nights
+                    message = self._table_error(booking)
+                    if message:
+                        self._import_error(report, line_no, message)
+                        continue
+                by_room[booking.room_id].append((booking.check_in, line_no, booking))
+
+        accepted = []
+        for room_id, rows in by_room.items():
+            rows.sort(key=lambda r: (r[0], r[1]))
+            existing = busy.get(room_id, [])
+            ends = [out for _, out in existing]  # интервалы в базе не пересекаются
+            accepted_until = None  # выезд последней принятой строки пакета
+            for check_in, line_no, booking in rows:
+                if booking.status != "cancelled":
+                    # первый интервал базы, заканчивающийся после заезда
+                    i = bisect_right(ends, check_in)
+                    if (i < len(existing) and existing[i][0] < booking.check_out) or (
+                        accepted_until is not None and check_in < accepted_until
+                    ):
+                        self._import_error(
+                            report, line_no, "Номер уже забронирован на указанные даты!"
+                        )
+                        continue
+                    accepted_until = max(accepted_until or check_in, booking.check_out)
+                accepted.append((line_no, booking))
+        return accepted
@@ -3,7 +3,7 @@
 Предоставляет единый интерфейс для работы с репозиторием.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from datetime import date, datetime
 from decimal import Decimal
 
@@ -35,6 +35,10 @@ class BookingRepDBAdapter:
         bookings = self._db_repo.get_all()
         return [self._booking_to_dict(booking) for booking in bookings]
 
+    def export(self) -> Tuple[Tuple[str, ...], Iterator[tuple]]:
+        """Заголовок и поток строк для выгрузки бронирований (без загрузки в память)."""
+        return self._db_repo.EXPORT_COLUMNS, self._db_repo.export_rows()
+
     def get_count(self) -> int:
         """Количество бронирований."""
         return self._db_repo.get_count()
@@ -52,6 +56,10 @@ class BookingRepDBAdapter:
             booking_data["total_sum"] = Decimal(str(booking_data["total_sum"]))
         return self._db_repo.update_booking(booking_id, booking_data)
 
+    def import_bookings(self, lines, fmt: str = "ndjson") -> Dict[str, Any]:
+        """Пакетный импорт бронирований из строк NDJSON/CSV. Возвращает отчет."""
+        return self._db_repo.import_bookings(lines, fmt)
+
     def delete_booking(self, booking_id: int) -> bool:
         """Удаляет бронирование по ID."""
         return self._db_repo.delete_booking(booking_id)
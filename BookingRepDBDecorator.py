@@ -4,12 +4,13 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Tuple
 from datetime import date, datetime
 from decimal import Decimal
 
 from Booking import Booking
 from BookingRepDB import BookingRepDB
+from QueryBuilder import QueryBuilder
 
 
 class BookingFilter(ABC):
@@ -20,6 +21,12 @@ class BookingFilter(ABC):
         """Возвращает True, если бронирование проходит фильтр."""
         pass
 
+    def to_sql(self) -> Optional[Tuple[str, tuple]]:
+        """Возвращает SQL-условие и параметры (пустое условие - без ограничений)
+        или None, если у фильтра нет SQL-представления: тогда фильтры
+        применяются на стороне Python."""
+        return None
+
 
 class ClientIdFilter(BookingFilter):
     """Фильтр по ID клиента."""
@@ -30,6 +37,9 @@ class ClientIdFilter(BookingFilter):
     def filter(self, booking: Booking) -> bool:
         return booking.client_id == self.client_id
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        return "client_id = %s", (self.client_id,)
+
 
 class RoomIdFilter(BookingFilter):
     """Фильтр по ID номера."""
@@ -40,6 +50,9 @@ class RoomIdFilter(BookingFilter):
     def filter(self, booking: Booking) -> bool:
         return booking.room_id == self.room_id
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        return "room_id = %s", (self.room_id,)
+
 
 class DateRangeFilter(BookingFilter):
     """Фильтр по диапазону дат."""
@@ -57,6 +70,17 @@ class DateRangeFilter(BookingFilter):
             return False
         return True
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        conditions = []
+        params = []
+        if self.start_date:
+            conditions.append("check_out >= %s")
+            params.append(self.start_date)
+        if self.end_date:
+            conditions.append("check_in <= %s")
+            params.append(self.end_date)
+        return " AND ".join(conditions), tuple(params)
+
 
 class StatusFilter(BookingFilter):
     """Фильтр по статусу бронирования."""
@@ -67,6 +91,9 @@ class StatusFilter(BookingFilter):
     def filter(self, booking: Booking) -> bool:
         return booking.status == self.status
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        return "status = %s", (self.status,)
+
 
 class PriceRangeFilter(BookingFilter):
     """Фильтр по диапазону суммы."""
@@ -84,6 +111,26 @@ class PriceRangeFilter(BookingFilter):
             return False
         return True
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        conditions = []
+        params = []
+        if self.min_price is not None:
+            conditions.append("total_sum >= %s")
+            params.append(self.min_price)
+        if self.max_price is not None:
+            conditions.append("total_sum <= %s")
+            params.append(self.max_price)
+        return " AND ".join(conditions), tuple(params)
+
+
+def _sql_sorter(
+    sort_func: Callable[[List[Booking]], List[Booking]], expression: str, reverse: bool
+) -> Callable[[List[Booking]], List[Booking]]:
+    """Прикрепляет к сортировщику эквивалентное SQL-выражение и направление."""
+    sort_func.sql_expression = expression
+    sort_func.sql_descending = reverse
+    return sort_func
+
 
 class BookingSorter:
     """Фабричные методы для создания функций сортировки бронирований."""
@@ -95,7 +142,11 @@ class BookingSorter:
         def sorter(booking: Booking) -> date:
             return booking.check_in
 
-        return lambda bookings: sorted(bookings, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda bookings: sorted(bookings, key=sorter, reverse=reverse),
+            "check_in",
+            reverse,
+        )
 
     @staticmethod
     def by_check_out(reverse: bool = False) -> Callable[[Booking], any]:
@@ -104,7 +155,11 @@ class BookingSorter:
         def sorter(booking: Booking) -> date:
             return booking.check_out
 
-        return lambda bookings: sorted(bookings, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda bookings: sorted(bookings, key=sorter, reverse=reverse),
+            "check_out",
+            reverse,
+        )
 
     @staticmethod
     def by_total_sum(reverse: bool = False) -> Callable[[Booking], any]:
@@ -113,7 +168,11 @@ class BookingSorter:
         def sorter(booking: Booking) -> Decimal:
             return booking.total_sum
 
-        return lambda bookings: sorted(bookings, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda bookings: sorted(bookings, key=sorter, reverse=reverse),
+            "total_sum",
+            reverse,
+        )
 
     @staticmethod
     def by_created_at(reverse: bool = False) -> Callable[[Booking], any]:
@@ -122,7 +181,11 @@ class BookingSorter:
         def sorter(booking: Booking) -> datetime:
             return booking.created_at
 
-        return lambda bookings: sorted(bookings, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda bookings: sorted(bookings, key=sorter, reverse=reverse),
+            "created_at",
+            reverse,
+        )
 
     @staticmethod
     def by_client_id(reverse: bool = False) -> Callable[[Booking], any]:
@@ -131,7 +194,11 @@ class BookingSorter:
         def sorter(booking: Booking) -> int:
             return booking.client_id
 
-        return lambda bookings: sorted(bookings, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda bookings: sorted(bookings, key=sorter, reverse=reverse),
+            "client_id",
+            reverse,
+        )
 
     @staticmethod
     def by_room_id(reverse: bool = False) -> Callable[[Booking], any]:
@@ -140,7 +207,11 @@ class BookingSorter:
         def sorter(booking: Booking) -> int:
             return booking.room_id
 
-        return lambda bookings: sorted(bookings, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda bookings: sorted(bookings, key=sorter, reverse=reverse),
+            "room_id",
+            reverse,
+        )
 
     @staticmethod
     def by_id(reverse: bool = False) -> Callable[[Booking], any]:
@@ -149,7 +220,11 @@ class BookingSorter:
         def sorter(booking: Booking) -> int:
             return booking.id
 
-        return lambda bookings: sorted(bookings, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda bookings: sorted(bookings, key=sorter, reverse=reverse),
+            "id",
+            reverse,
+        )
 
 
 class BookingRepDBDecorator:
@@ -174,27 +249,74 @@ class BookingRepDBDecorator:
         """Получает бронирование по ID."""
         return self._base_repo.get_by_id(booking_id)
 
-    def get_all(self) -> List[Booking]:
-        """Получает все бронирования с применением фильтров и сортировки."""
+    def _build_query(self) -> Optional[QueryBuilder]:
+        """Переводит фильтры и сортировку в один SQL-запрос.
+        Возвращает None, если что-то из них нельзя выполнить в базе данных."""
+        builder = self._base_repo.new_query()
+        for booking_filter in self._filters:
+            sql = booking_filter.to_sql()
+            if sql is None:
+                return None
+            builder.where(*sql)
+
+        if self._sorter:
+            expression = getattr(self._sorter, "sql_expression", None)
+            if expression is None:
+                return None
+            builder.order_by(expression, self._sorter.sql_descending)
+            # id по возрастанию при любом направлении делает порядок однозначным,
+            # совпадает с резервным путем и замыкает ключ keyset-пагинации
+            builder.order_by("id")
+            return builder
+        # порядок по умолчанию совпадает с BookingRepDB.get_all
+        builder.order_by("created_at", descending=True)
+        builder.order_by("id", descending=True)
+        return builder
+
+    def _filter_and_sort_in_python(self) -> List[Booking]:
+        """Резервный путь: загружает все бронирования и обрабатывает их в Python."""
         bookings = self._base_repo.get_all()
 
         # Применяем фильтры
         for booking_filter in self._filters:
             bookings = [b for b in bookings if booking_filter.filter(b)]
 
-        # Применяем сортировку
+        # Применяем сортировку. Сортировка устойчива (и при reverse): после
+        # предварительной сортировки по id равные по ключу идут по
+        # возрастанию id - как в SQL
         if self._sorter:
+            bookings.sort(key=lambda booking: booking.id)
             bookings = self._sorter(bookings)
 
         return bookings
 
+    def get_all(self) -> List[Booking]:
+        """Получает все бронирования с применением фильтров и сортировки."""
+        builder = self._build_query()
+        if builder is not None:
+            return self._base_repo.find(builder)
+        return self._filter_and_sort_in_python()
+
     def get_k_n_short_list(self, k: int, n: int) -> List[Booking]:
         """Пагинация с применением фильтров и сортировки."""
-        all_bookings = self.get_all()
+        offset = (n - 1) * k
+        builder = self._build_query()
+        if builder is not None:
+            return self._base_repo.find(builder.paginate(k, offset))
 
         # Пагинация
-        offset = (n - 1) * k
-        return all_bookings[offset : offset + k]
+        return self._filter_and_sort_in_python()[offset : offset + k]
+
+    def get_page(
+        self, k: int, n: int = 1, cursor: Optional[str] = None
+    ) -> Tuple[List[Booking], Optional[str]]:
+        """Возвращает k записей после курсора (или со страницы n) и курсор следующей."""
+        builder = self._build_query()
+        if builder is None:
+            if cursor:
+                raise ValueError("Курсор не поддерживается для выбранных фильтров!")
+            return self.get_k_n_short_list(k, n), None
+        return self._base_repo.find_page(builder.after_cursor(cursor, k, (n - 1) * k))
 
     def read_all(self) -> List[Booking]:
         """Алиас для get_all (для совместимости)."""
@@ -202,7 +324,10 @@ class BookingRepDBDecorator:
 
     def get_count(self) -> int:
         """Получает количество отфильтрованных бронирований."""
-        return len(self.get_all())
+        builder = self._build_query()
+        if builder is not None:
+            return self._base_repo.count_where(builder)
+        return len(self._filter_and_sort_in_python())
 
     def get_by_client_id(self, client_id: int) -> List[Booking]:
         """Получает бронирования клиента с фильтрами."""
@@ -10,6 +10,8 @@ from ClientShortInfo import ClientShort
 class Client(ClientShort):
     """Класс для хранения полной информации о клиенте."""
 
+    __slots__ = ("_passport", "_email", "_comment")
+
     def __init__(self, *args, **kwargs):
         """Инициализирует клиента из различных источников."""
         if kwargs.get("from_client_short"):
@@ -91,6 +93,16 @@ class Client(ClientShort):
             self._email = self.validate_email(email) if email else None
             self._comment = comment or ""
 
+    @classmethod
+    def from_row(cls, row):
+        """Создает клиента из строки БД в порядке ClientRepDB.EXPORT_COLUMNS
+        без валидации: данные уже проверены при записи."""
+        client = super().from_row(row[:5])
+        client._passport = row[5] or None
+        client._email = row[6] or None
+        client._comment = row[7] or ""
+        return client
+
     @staticmethod
     def validate_passport(passport: str):
         """Валидирует номер паспорта."""
@@ -147,21 +159,29 @@ class Client(ClientShort):
         self._comment = value or ""
 
     @staticmethod
-    def read_clients_from_txt(path):
-        """Читает клиентов из текстового файла."""
-        clients = []
+    def iter_clients_from_txt(path, errors=None):
+        """Потоково читает клиентов из текстового файла (генератор).
+        Ошибки строк не печатаются, а добавляются в список errors в виде
+        {"row": номер строки, "message": текст ошибки}."""
+        if errors is None:
+            errors = []
         if not os.path.exists(path):
-            print(f"Файл {path} не найден!")
-            return clients
+            errors.append({"row": 0, "message": f"Файл {path} не найден!"})
+            return
         with open(path, "r", encoding="utf-8") as f:
-            for line in f:
+            for line_no, line in enumerate(f, 1):
                 line = line.strip()
                 if line:
                     try:
-                        clients.append(Client(line, from_string=True))
-                    except Exception as e:
-                        print(f"Ошибка при чтении строки '{line}': {e}")
-        return clients
+                        yield Client(line, from_string=True)
+                    except (ValueError, TypeError) as e:
+                        errors.append({"row": line_no, "message": str(e)})
+
+    @staticmethod
+    def read_clients_from_txt(path, errors=None):
+        """Читает клиентов из текстового файла. Ошибки строк собираются в
+        список errors (см. iter_clients_from_txt)."""
+        return list(Client.iter_clients_from_txt(path, errors))
 
     @staticmethod
     def read_clients_from_json(path):
@@ -181,19 +201,43 @@ class Client(ClientShort):
                 print(f"Ошибка при чтении JSON {path}: {e}")
         return clients
 
+    @staticmethod
+    def identity_of(data: dict) -> tuple:
+        """Ключ идентичности клиента по словарю полей: пустые значения
+        (None и "") считаются одинаковыми. Порядок полей совпадает с
+        уникальным индексом idx_clients_identity в ClientRepDB."""
+        return tuple(
+            str(data.get(field) or "")
+            for field in (
+                "surname",
+                "name",
+                "patronymic",
+                "phone",
+                "passport",
+                "email",
+                "comment",
+            )
+        )
+
+    def identity_key(self) -> tuple:
+        """Ключ идентичности клиента: одинаковый у равных по equals клиентов."""
+        return self.identity_of(
+            {
+                "surname": self.surname,
+                "name": self.name,
+                "patronymic": self.patronymic,
+                "phone": self.phone,
+                "passport": self.passport,
+                "email": self.email,
+                "comment": self.comment,
+            }
+        )
+
     def equals(self, other):
         """Сравнивает клиентов по содержанию."""
         if not isinstance(other, Client):
             return False
-        return (
-            self.surname == other.surname
-            and self.name == other.name
-            and self.patronymic == other.patronymic
-            and self.passport == other.passport
-            and self.phone == other.phone
-            and self.email == other.email
-            and self.comment == other.comment
-        )
+        return self.identity_key() == other.identity_key()
 
     def __str__(self):
         """Возвращает строковое представление клиента."""
@@ -12,9 +12,14 @@ from ClientRepDBDecorator import (
     NameFilter,
     PatronymicFilter,
     PhoneFilter,
+    SearchFilter,
     ClientRepDBDecorator,
     ClientSorter,
 )
+from ClientSearch import ClientSearch
+
+SUGGEST_LIMIT = 10  # подсказок по умолчанию
+SUGGEST_MAX_LIMIT = 50  # максимум подсказок за запрос
 
 
 class ClientController:
@@ -61,6 +66,10 @@ class ClientController:
             if phone_substring:
                 decorated.add_filter(PhoneFilter(phone_substring))
 
+            search = filters.get("q")
+            if search:
+                decorated.add_filter(SearchFilter(search))
+
         # сортировкa
         if sort_by:
             sorters = {  # словарь маппинга имени поля на фабричный метод сортировки
@@ -88,10 +97,12 @@ class ClientController:
         filters: Optional[Dict[str, Any]] = None,
         sort_by: Optional[str] = None,
         sort_order: Optional[str] = None,
+        cursor: Optional[str] = None,
     ) -> Dict[
         str, Any
     ]:  # метод получения списка клиентов с поддержкой: пагинации, фильтрации и сортировки
-        """получает список клиентов с краткой информацией."""
+        """получает список клиентов с краткой информацией.
+        cursor - непрозрачный курсор keyset-пагинации из next_cursor предыдущего ответа."""
 
         # гарантируем корректный номер страницы
         page = max(page, 1)  # страница не может быть < 1
@@ -100,6 +111,10 @@ class ClientController:
         )  # гарантируем, что filters - словарь (фильтры не установлены)
         sort_order = sort_order or "asc"  # по умолчанию сортировка по возрастанию
 
+        # поиск без явной сортировки возвращает клиентов по релевантности
+        if filters.get("q") and sort_by is None:
+            return self._search_clients(page_size, page, filters, cursor)
+
         # выбираем репозиторий с учетом фильтров и сортировки
         need_decorator = (
             bool(filters) or sort_by is not None
@@ -116,14 +131,20 @@ class ClientController:
             )  # получаем общее количество (уже отфильтрованных) записей
 
         # Обработка пагинации
+        next_cursor = None
         if page_size is None or page_size <= 0:
             # если page_size не задан или ≤0: возвращаем все записи
             data_slice = repo_to_use.read_all()
             page_size = total if total > 0 else 1
         else:
-            data_slice = repo_to_use.get_k_n_short_list(
-                page_size, page
-            )  # получаем срез через get_k_n_short_list
+            # страница выбирается по ключу (id или ключу сортировки), а не через OFFSET,
+            # если передан курсор; next_cursor строится в любом случае
+            page_repo = (
+                repo_to_use
+                if need_decorator
+                else self.apply_filters(filters, sort_by, sort_order)
+            )
+            data_slice, next_cursor = page_repo.get_page(page_size, page, cursor)
 
         # преобразует объекты ClientShort в словари для JSON-сериализации
         # подготовка данных для передачи по сети
@@ -145,11 +166,75 @@ class ClientController:
             "total": total,  # кол-во после фильтрации
             "page": page,
             "page_size": page_size,  # даннные пагинации
+            "next_cursor": next_cursor,  # курсор следующей страницы (None - последняя)
             "filters_applied": bool(filters),
             "sort_by": sort_by,
             "sort_order": sort_order,  # инфа о сортировке
         }
 
+    def _search_clients(
+        self,
+        page_size: Optional[int],
+        page: int,
+        filters: Dict[str, Any],
+        cursor: Optional[str],
+    ) -> Dict[str, Any]:
+        """страница результатов ранжированного поиска (ClientSearch) с учетом
+        остальных фильтров. порядок по рангу не поддерживает keyset-курсор."""
+        if cursor:
+            raise ValueError("Курсор не поддерживается для поиска по релевантности!")
+
+        query = filters["q"]
+        other_filters = {k: v for k, v in filters.items() if k != "q"}
+        extra = self.apply_filters(other_filters, None, None).sql_condition()
+        if extra is None:
+            raise ValueError("Эти фильтры не поддерживаются поиском по релевантности!")
+        search = ClientSearch(self.repository._db_repo)
+
+        total = search.count(query, extra)
+        if page_size is None or page_size <= 0:
+            page_size = total if total > 0 else 1
+            page = 1
+        clients = search.search(query, page_size, (page - 1) * page_size, extra)
+
+        return {
+            "items": [
+                {
+                    "id": client.id,
+                    "surname": client.surname,
+                    "name": client.name,
+                    "patronymic": client.patronymic,
+                    "phone": client.phone,
+                }
+                for client in clients
+            ],
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "next_cursor": None,
+            "filters_applied": True,
+            "sort_by": "relevance",
+            "sort_order": "desc",
+        }
+
+    def suggest_clients(self, query: str = "", limit: int = SUGGEST_LIMIT) -> Dict[str, Any]:
+        """подсказки для выбора клиента по началу фамилии или телефона."""
+        limit = min(max(limit, 1), SUGGEST_MAX_LIMIT)
+        clients = self.repository.suggest(query, limit)
+        return {
+            "items": [
+                {
+                    "id": client.id,
+                    "surname": client.surname,
+                    "name": client.name,
+                    "patronymic": client.patronymic,
+                    "phone": client.phone,
+                }
+                for client in clients
+            ],
+            "query": query,
+        }
+
     def get_client(self, client_id: int) -> Optional[Dict[str, Any]]:
         """получает полную информацию о клиенте по id."""
 
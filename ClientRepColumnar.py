@@ -0,0 +1,145 @@
+"""Реализация репозитория клиентов в столбцовом снимке (ColumnarSnapshot)."""
+
+import os
+from array import array
+from typing import Any, Iterator, List, Optional, Tuple
+
+from ClientBase import Client
+from ClientRepNdjson import LazyClientMap
+from ClientRepository import CLIENT_FIELDS, ClientRepository
+from ColumnarSnapshot import ColumnarSnapshot
+
+# порядок столбцов совпадает с CLIENT_FIELDS и ClientRepDB.EXPORT_COLUMNS
+CLIENT_SCHEMA = tuple(
+    (field, "int" if field == "id" else "str") for field in CLIENT_FIELDS
+)
+
+
+def _client_row(client: Client) -> tuple:
+    return tuple(getattr(client, field) for field in CLIENT_FIELDS)
+
+
+class SnapshotClientMap(LazyClientMap):
+    """Словарь "ID -> клиент" поверх открытого снимка: столбец id читается из
+    отображения без копирования, клиент собирается из столбцов при обращении.
+    Изменения хранятся поверх снимка, как в LazyClientMap."""
+
+    def __init__(self, snapshot: Optional[ColumnarSnapshot]) -> None:
+        ids = snapshot.raw("id") if snapshot is not None else array("q")
+        super().__init__(None, ids, array("q"))
+        self._snapshot = snapshot
+
+    def _parse(self, position: int) -> Client:
+        return Client.from_row(self._snapshot.rows([position])[0])
+
+    def release(self) -> None:
+        """Освобождает столбец id: после этого снимок можно закрыть."""
+        if isinstance(self._ids, memoryview):
+            self._ids.release()
+
+    def rows(self) -> Iterator[tuple]:
+        """Строки всех клиентов (в порядке CLIENT_FIELDS) в порядке обхода.
+        Неизмененные записи берутся из столбцов снимка, без объектов Client."""
+        changed = self._changed
+        if self._snapshot is not None:
+            for row in self._snapshot.rows():
+                if row[0] not in changed:
+                    yield row
+                elif changed[row[0]] is not None:
+                    yield _client_row(changed[row[0]])
+        for client in self._added.values():
+            yield _client_row(client)
+
+    def identity_pairs(self) -> Iterator[Tuple[tuple, int]]:
+        for row in self.rows():
+            yield Client.identity_of(dict(zip(CLIENT_FIELDS, row))), row[0]
+
+    def find(self, field: str, value: Any) -> List[Client]:
+        """Клиенты с полем field, равным value, в порядке обхода: записи
+        снимка ищутся по столбцу, измененные и добавленные - перебором."""
+        matches = []  # (позиция в снимке, клиент)
+        if self._snapshot is not None:
+            positions = [
+                position
+                for position in self._snapshot.where(field, value)
+                if self._ids[position] not in self._changed
+            ]
+            # найденные строки собираются из столбцов одним проходом
+            rows = self._snapshot.rows(positions)
+            matches.extend(zip(positions, map(Client.from_row, rows)))
+        for client_id, client in self._changed.items():
+            if client is not None and getattr(client, field) == value:
+                matches.append((self._position(client_id), client))
+        matches.sort(key=lambda match: match[0])
+        added = [c for c in self._added.values() if getattr(c, field) == value]
+        return [client for _, client in matches] + added
+
+
+class ClientRepColumnar(ClientRepository):
+    """Реализация ClientRepository для хранения клиентов в столбцовом снимке.
+
+    Основной файл - ColumnarSnapshot, открытый на все время жизни
+    репозитория: клиенты собираются из столбцов при обращении, таблицы строк
+    разбираются один раз. Изменения между сжатиями - в журнале изменений
+    ClientRepository."""
+
+    def __init__(self, path: str):
+        self._snapshot: Optional[ColumnarSnapshot] = None
+        super().__init__(path)
+
+    def _load(self) -> None:
+        """Открывает снимок без создания объектов клиентов."""
+        self._open_snapshot()
+        self._by_id = SnapshotClientMap(self._snapshot)
+        self._reindex()
+
+    def read_all(self) -> List[Client]:
+        """Считывает всех клиентов из снимка (без повторной валидации)."""
+        if not os.path.exists(self.path):
+            return []
+        with ColumnarSnapshot(self.path) as snapshot:
+            return [Client.from_row(row) for row in snapshot.rows()]
+
+    def _identity_pairs(self) -> Iterator[Tuple[tuple, int]]:
+        if isinstance(self._by_id, SnapshotClientMap):
+            return self._by_id.identity_pairs()
+        return super()._identity_pairs()
+
+    def _rows(self) -> Iterator[tuple]:
+        if isinstance(self._by_id, SnapshotClientMap):
+            return self._by_id.rows()
+        return (_client_row(c) for c in self._by_id.values())
+
+    def write_all(self) -> None:
+        """Атомарно перезаписывает снимок всеми клиентами (сжатие журнала).
+        Новый снимок пишется рядом, пока старый еще открыт и читается."""
+        new_path = self.path + ".new"
+        ColumnarSnapshot.write(new_path, CLIENT_SCHEMA, self._rows())
+        self._close_snapshot()
+        os.replace(new_path, self.path)
+        self._open_snapshot()
+        self._by_id = SnapshotClientMap(self._snapshot)
+
+    def find_by(self, field: str, value: Any) -> List[Client]:
+        """Клиенты, у которых поле field равно value: поиск по столбцу
+        снимка и перебор только изменений, накопленных в журнале."""
+        if isinstance(self._by_id, SnapshotClientMap):
+            return self._by_id.find(field, value)
+        return [c for c in self._by_id.values() if getattr(c, field) == value]
+
+    def close(self) -> None:
+        """Закрывает журнал изменений и снимок."""
+        super().close()
+        self._close_snapshot()
+
+    def _open_snapshot(self) -> None:
+        if os.path.exists(self.path):
+            self._snapshot = ColumnarSnapshot(self.path)
+
+    def _close_snapshot(self) -> None:
+        # словарь держит столбец id снимка: он освобождается вместе с ним
+        if isinstance(self._by_id, SnapshotClientMap):
+            self._by_id.release()
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
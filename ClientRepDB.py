@@ -1,11 +1,20 @@
 """Реализация репозитория клиентов в базе данных PostgreSQL."""
 
-from typing import List
+import io
+import itertools
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import psycopg2
+from psycopg2 import errors
+from psycopg2.extras import execute_values
 
 from ClientBase import Client
 from ClientShortInfo import ClientShort
+from ConnectionPool import ConnectionPool
+from EntityCache import EntityCache
+from QueryBuilder import QueryBuilder, copy_csv_row, escape_like
 
 DB_CONFIG = {  # константа с настройками бд
     "db_name": "clientdb",
@@ -15,29 +24,56 @@ DB_CONFIG = {  # константа с настройками бд
     "password": "4523",
 }
 
+# Хэш идентичности клиента: те же поля и та же нормализация пустых значений,
+# что и в Client.identity_key(). По нему построен уникальный индекс.
+# concat_ws не IMMUTABLE и не годится для индекса, поэтому склейка через ||.
+CLIENT_IDENTITY_SQL = (
+    "md5(surname || chr(31) || name || chr(31) || coalesce(patronymic, '')"
+    " || chr(31) || phone || chr(31) || coalesce(passport, '')"
+    " || chr(31) || coalesce(email, '') || chr(31) || coalesce(comment, ''))"
+)
+CLIENT_IDENTITY_PARAMS_SQL = "md5(" + " || chr(31) || ".join(["%s::text"] * 7) + ")"
+
+POOL_CONFIG = {  # константа с настройками пула соединений
+    "min_size": 1,
+    "max_size": 10,
+    "max_lifetime": 1800,  # секунды жизни соединения до пересоздания
+    "health_check_interval": 30,  # простой, после которого соединение проверяется
+    "checkout_timeout": 10,  # ожидание свободного соединения
+}
+
+STREAM_ITERSIZE = 2000  # строк за одно обращение серверного курсора при выгрузке
+
 
 class DatabaseConnection:
     """Подключениек базе данных PostgreSQL."""
 
     _instance = None
+    _instance_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance.initialize_connection()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance.initialize_connection()
+                    cls._instance = instance
         return cls._instance
 
     def initialize_connection(self) -> None:
-        """Инициализация параметров подключения и создание таблицы."""
+        """Инициализация параметров подключения (схему создает Migrations.migrate)."""
         self._db_name = DB_CONFIG["db_name"]
         self._host = DB_CONFIG["host"]
         self._port = DB_CONFIG["port"]
         self._user = DB_CONFIG["user"]
         self._password = DB_CONFIG["password"]
-        self.create_table()
+        self._pool = ConnectionPool(self._connect, **POOL_CONFIG)
+        # соединение и отложенные действия текущей транзакции потока
+        self._local = threading.local()
+        self._stream_ids = itertools.count(1)  # имена серверных курсоров
 
-    def get_connection(self):
-        """Возвращает соединение с базой данных."""
+    def _connect(self):
+        """Открывает новое физическое соединение с базой данных."""
         return psycopg2.connect(
             dbname=self._db_name,
             host=self._host,
@@ -46,121 +82,115 @@ class DatabaseConnection:
             password=self._password,
         )
 
-    def create_table(self) -> None:
-        """Создает таблицу clients, если она не существует."""
-        conn = self.get_connection()
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS clients (
-                        id SERIAL PRIMARY KEY,
-                        surname VARCHAR(100) NOT NULL,
-                        name VARCHAR(100) NOT NULL,
-                        patronymic VARCHAR(100),
-                        phone VARCHAR(20) NOT NULL,
-                        passport VARCHAR(20),
-                        email VARCHAR(255),
-                        comment TEXT
-                    );
-                    """
-                )
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS rooms (
-                        id SERIAL PRIMARY KEY,
-                        room_number VARCHAR ( 10 ) NOT NULL UNIQUE,
-                        capacity INTEGER NOT NULL CHECK ( capacity > 0 AND capacity <= 10),
-                        is_available BOOLEAN DEFAULT TRUE,
-                        category VARCHAR( 20) NOT NULL,
-                        price_per_night DECIMAL (10, 2 ) NOT NULL CHECK ( price_per_night > 0 ),
-                        description TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                        );
-                    """
-                )
-                cursor.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS bookings (
-                        id SERIAL PRIMARY KEY,
-                        client_id INTEGER NOT NULL,
-                        room_id INTEGER NOT NULL,
-                        check_in DATE NOT NULL,
-                        check_out DATE NOT NULL,
-                        total_sum DECIMAL ( 10, 2 ) NOT NULL CHECK (total_sum >= 0),
-                        status VARCHAR (20) DEFAULT 'confirmed',
-                        notes TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        CONSTRAINT fk_client FOREIGN KEY (client_id)
-                            REFERENCES clients ( id ) ON DELETE CASCADE,
-                        CONSTRAINT fk_room FOREIGN KEY ( room_id )
-                            REFERENCES rooms (id) ON DELETE CASCADE,
-                        CONSTRAINT check_dates CHECK ( check_out > check_in ),
-                        CONSTRAINT max_duration CHECK (( check_out -check_in ) <= 30));
-                    """
-                )
-                cursor.execute(
-                    """
-                    CREATE INDEX IF NOT EXISTS idx_rooms_available
-                        ON rooms(is_available);
-                    """
-                )
-                cursor.execute(
-                    """
-                    CREATE INDEX IF NOT EXISTS idx_bookings_dates
-                        ON bookings(check_in, check_out);
-                    """
-                )
-                cursor.execute(
-                    """
-                    CREATE INDEX IF NOT EXISTS idx_bookings_status
-                        ON bookings(status);
-                    """
-                )
+    def get_connection(self):
+        """Возвращает соединение из пула. Его нужно вернуть через release_connection."""
+        return self._pool.getconn()
+
+    def release_connection(self, conn, discard: bool = False) -> None:
+        """Возвращает соединение в пул."""
+        self._pool.putconn(conn, discard=discard)
+
+    @contextmanager
+    def connection(self):
+        """Выдает соединение из пула на время блока with.
+        Внутри transaction() это соединение, закрепленное за потоком."""
+        pinned = getattr(self._local, "conn", None)
+        if pinned is not None:
+            yield pinned
+            return
+        with self._pool.connection() as conn:
+            yield conn
+
+    @contextmanager
+    def transaction(self):
+        """Единица работы: запросы потока внутри блока идут через одно соединение
+        и фиксируются одним COMMIT, а при исключении откатываются.
+        Вложенный блок присоединяется к внешней транзакции."""
+        if self.in_transaction():
+            yield self._local.conn
+            return
+        with self._pool.connection() as conn:
+            self._local.conn = conn
+            self._local.after_commit = []
+            try:
+                yield conn
                 conn.commit()
-        finally:
-            conn.close()
+            finally:
+                self._local.conn = None
+                callbacks, self._local.after_commit = self._local.after_commit, []
+        # сюда доходим только после успешного COMMIT
+        for callback in callbacks:
+            callback()
+
+    def in_transaction(self) -> bool:
+        """Выполняется ли поток внутри transaction()."""
+        return getattr(self._local, "conn", None) is not None
+
+    def commit(self, conn) -> None:
+        """Фиксирует изменения, если соединение не принадлежит transaction()
+        (тогда фиксация произойдет при выходе из блока)."""
+        if conn is not getattr(self._local, "conn", None):
+            conn.commit()
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """Выполняет callback после фиксации текущей транзакции
+        (сразу, если транзакции нет). При откате callback отбрасывается."""
+        if self.in_transaction():
+            self._local.after_commit.append(callback)
+        else:
+            callback()
+
+    def pool_stats(self) -> Dict[str, int]:
+        """Метрики пула соединений."""
+        return self._pool.stats()
+
+    def create_table(self) -> None:
+        """Создает таблицы и индексы (оставлен для совместимости, см. Migrations)."""
+        from Migrations import migrate
+
+        migrate(self)
 
     def execute_query(self, query: str, params: tuple = None) -> List[tuple]:
         """Выполняет SELECT-запрос и возвращает список кортежей."""
-        conn = self.get_connection()
-        try:
+        with self.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, params or ())
                 if query.strip().upper().startswith("SELECT"):
                     return cursor.fetchall()
-                conn.commit()
+                self.commit(conn)
                 return []
-        finally:
-            conn.close()
+
+    def stream_query(
+        self, query: str, params: tuple = None, itersize: int = STREAM_ITERSIZE
+    ) -> Iterator[tuple]:
+        """Выполняет SELECT через серверный (именованный) курсор и выдает строки
+        порциями по itersize: в памяти не бывает больше одной порции."""
+        name = f"stream_{next(self._stream_ids)}"
+        with self.connection() as conn:
+            with conn.cursor(name=name) as cursor:
+                cursor.itersize = itersize
+                cursor.execute(query, params or ())
+                yield from cursor
 
     def execute_insert(self, query: str, params: tuple = None) -> int:
         """Выполняет INSERT-запрос с RETURNING id и возвращает новый id."""
-        conn = self.get_connection()
-        try:
+        with self.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, params or ())
-                conn.commit()
+                self.commit(conn)
                 return (
                     cursor.fetchone()[0]
                     if "RETURNING" in query.upper()
                     else cursor.rowcount
                 )
-        finally:
-            conn.close()
 
     def execute_update(self, query: str, params: tuple = None) -> int:
         """Выполняет UPDATE-запрос и возвращает количество затронутых строк."""
-        conn = self.get_connection()
-        try:
+        with self.connection() as conn:
             with conn.cursor() as cursor:
                 cursor.execute(query, params or ())
-                conn.commit()
+                self.commit(conn)
                 return cursor.rowcount
-        finally:
-            conn.close()
 
     def execute_delete(self, query: str, params: tuple = None) -> int:
         """Выполняет DELETE-запрос и возвращает количество удалённых строк."""
@@ -170,11 +200,44 @@ class DatabaseConnection:
 class ClientRepDB:
     """Репозиторий для работы с клиентами в базе данных."""
 
+    TABLE = "clients"
+    SHORT_COLUMNS = ("id", "surname", "name", "patronymic", "phone")
+    EXPORT_COLUMNS = SHORT_COLUMNS + ("passport", "email", "comment")
+
     def __init__(self):
         self._db = DatabaseConnection()
+        self._cache = EntityCache.named("clients")
+
+    def new_query(self) -> QueryBuilder:
+        """Создает построитель запроса по краткой информации клиентов."""
+        return QueryBuilder(self.TABLE, self.SHORT_COLUMNS)
+
+    def find_short(self, builder: QueryBuilder) -> List[ClientShort]:
+        """Выполняет запрос построителя и возвращает краткие записи клиентов."""
+        query, params = builder.build_select()
+        rows = self._db.execute_query(query, params)
+        return [ClientShort.from_row(r) for r in rows]
+
+    def find_short_page(
+        self, builder: QueryBuilder
+    ) -> Tuple[List[ClientShort], Optional[str]]:
+        """Выполняет keyset-запрос построителя: страница клиентов и курсор следующей."""
+        query, params = builder.build_select()
+        rows, next_cursor = builder.split_page(self._db.execute_query(query, params))
+        return [ClientShort.from_row(r) for r in rows], next_cursor
+
+    def count_where(self, builder: QueryBuilder) -> int:
+        """Количество клиентов, удовлетворяющих условиям построителя."""
+        query, params = builder.build_count()
+        rows = self._db.execute_query(query, params)
+        return rows[0][0] if rows else 0
 
     def get_by_id(self, client_id: int) -> Client | None:
-        """Получаем клиента по ID"""
+        """Получаем клиента по ID (через кэш)"""
+        return self._cache.get_or_load(client_id, lambda: self._load_by_id(client_id))
+
+    def _load_by_id(self, client_id: int) -> Client | None:
+        """Загружает клиента по ID из базы данных."""
         rows = self._db.execute_query(
             """
             SELECT id, surname, name, patronymic, phone, passport, email, comment
@@ -184,21 +247,30 @@ class ClientRepDB:
         )
         if rows:
             r = rows[0]
-            return Client(
-                {
-                    "id": r[0],
-                    "surname": r[1],
-                    "name": r[2],
-                    "patronymic": r[3],
-                    "phone": r[4],
-                    "passport": r[5],
-                    "email": r[6],
-                    "comment": r[7],
-                },
-                from_dict=True,
-            )
+            return Client.from_row(r)
         return None
 
+    def export_rows(self) -> Iterator[tuple]:
+        """Все клиенты потоком кортежей в порядке EXPORT_COLUMNS (по ID)."""
+        return self._db.stream_query(
+            f"SELECT {', '.join(self.EXPORT_COLUMNS)} FROM clients ORDER BY id"
+        )
+
+    def suggest(self, query: str, limit: int = 10) -> List[ClientShort]:
+        """Подсказки для выбора клиента: первые limit клиентов, у которых
+        с query начинается телефон (если query начинается с цифры или "+")
+        или фамилия. Пустой query - первые клиенты по фамилии."""
+        query = query.strip()
+        builder = self.new_query()
+        if query[:1].isdigit() or query[:1] == "+":
+            builder.where("phone LIKE %s", escape_like(query) + "%")
+            builder.order_by("phone")
+        else:
+            if query:
+                builder.where("lower(surname) LIKE %s", escape_like(query.lower()) + "%")
+            builder.order_by("lower(surname)")
+        return self.find_short(builder.order_by("id").paginate(limit))
+
     def get_k_n_short_list(self, k: int, n: int) -> List[ClientShort]:
         """Пагинация"""
         offset = (n - 1) * k
@@ -211,20 +283,12 @@ class ClientRepDB:
             """,
             (k, offset),
         )
-        return [ClientShort(*r) for r in rows]
+        return [ClientShort.from_row(r) for r in rows]
 
-    def add_client(self, client_data: dict) -> bool:
-        """Добавляет нового клиента."""
-
-        # Проверка дубликатов
-        existing_clients = self._db.execute_query(
-            """
-            SELECT surname, name, patronymic, phone, passport, email, comment
-            FROM clients
-            """
-        )
-
-        temp_tuple = (
+    @staticmethod
+    def _client_values(client_data: dict) -> tuple:
+        """Значения столбцов клиента в порядке INSERT/UPDATE."""
+        return (
             client_data["surname"],
             client_data["name"],
             client_data.get("patronymic"),
@@ -234,63 +298,138 @@ class ClientRepDB:
             client_data.get("comment", ""),
         )
 
-        for row in existing_clients:
-            if tuple(row) == temp_tuple:
-                raise ValueError("Клиент с такими данными уже существует!")
-
-        # Добавление
-        self._db.execute_insert(
-            """
-            INSERT INTO clients
-                (surname, name, patronymic, phone, passport, email, comment)
-            VALUES (%s,%s,%s,%s,%s,%s,%s)
-            RETURNING id
-            """,
-            temp_tuple,
+    def _find_duplicate(self, client_data: dict, exclude_id: Optional[int] = None) -> bool:
+        """Есть ли клиент с той же идентичностью (поиск по индексу idx_clients_identity)."""
+        query = (
+            f"SELECT EXISTS (SELECT 1 FROM clients WHERE {CLIENT_IDENTITY_SQL}"
+            f" = {CLIENT_IDENTITY_PARAMS_SQL}"
         )
+        params = Client.identity_of(client_data)
+        if exclude_id is not None:
+            query += " AND id <> %s"
+            params += (exclude_id,)
+        rows = self._db.execute_query(query + ")", params)
+        return bool(rows and rows[0][0])
+
+    def add_client(self, client_data: dict) -> bool:
+        """Добавляет нового клиента."""
+
+        # Проверка дубликатов
+        if self._find_duplicate(client_data):
+            raise ValueError("Клиент с такими данными уже существует!")
+
+        # Добавление (уникальный индекс защищает от параллельной вставки)
+        try:
+            self._db.execute_insert(
+                """
+                INSERT INTO clients
+                    (surname, name, patronymic, phone, passport, email, comment)
+                VALUES (%s,%s,%s,%s,%s,%s,%s)
+                RETURNING id
+                """,
+                self._client_values(client_data),
+            )
+        except errors.UniqueViolation as exc:
+            raise ValueError("Клиент с такими данными уже существует!") from exc
 
         return True
 
+    def add_clients(self, clients_data: List[dict], page_size: int = 1000) -> int:
+        """Пакетно добавляет клиентов, пропуская дубликаты (в том числе внутри пакета).
+        Возвращает количество добавленных. ON CONFLICT указывает индекс
+        idx_clients_identity явно: без него вставка завершается ошибкой,
+        а не добавляет дубликаты."""
+        seen = set()
+        values = []
+        for client_data in clients_data:
+            key = Client.identity_of(client_data)
+            if key not in seen:
+                seen.add(key)
+                values.append(self._client_values(client_data))
+        if not values:
+            return 0
+
+        with self._db.connection() as conn:
+            with conn.cursor() as cursor:
+                inserted = execute_values(
+                    cursor,
+                    f"""
+                    INSERT INTO clients
+                        (surname, name, patronymic, phone, passport, email, comment)
+                    VALUES %s
+                    ON CONFLICT (({CLIENT_IDENTITY_SQL})) DO NOTHING
+                    RETURNING id
+                    """,
+                    values,
+                    page_size=page_size,
+                    fetch=True,
+                )
+            self._db.commit(conn)
+        return len(inserted)
+
+    def copy_clients(self, clients_data: Iterable[dict]) -> int:
+        """Пакетно загружает клиентов через COPY во временную таблицу и
+        INSERT ... ON CONFLICT DO NOTHING - быстрее add_clients на больших
+        пакетах. Дубликаты (в том числе внутри пакета) пропускаются.
+        Возвращает количество добавленных."""
+        buffer = io.StringIO()
+        for client_data in clients_data:
+            # '' остается '', None - NULL, как у add_client
+            buffer.write(copy_csv_row(self._client_values(client_data)))
+        if not buffer.tell():
+            return 0
+        buffer.seek(0)
+        columns = "surname, name, patronymic, phone, passport, email, comment"
+        with self._db.transaction() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    """
+                    CREATE TEMP TABLE IF NOT EXISTS clients_import (
+                        surname TEXT, name TEXT, patronymic TEXT, phone TEXT,
+                        passport TEXT, email TEXT, comment TEXT
+                    ) ON COMMIT DELETE ROWS
+                    """
+                )
+                cursor.execute("TRUNCATE clients_import")
+                cursor.copy_expert(
+                    f"COPY clients_import ({columns}) FROM STDIN WITH (FORMAT csv)",
+                    buffer,
+                )
+                cursor.execute(
+                    f"""
+                    INSERT INTO clients ({columns})
+                    SELECT {columns} FROM clients_import
+                    ON CONFLICT (({CLIENT_IDENTITY_SQL})) DO NOTHING
+                    """
+                )
+                return cursor.rowcount
+
     def update_client(self, client_id: int, client_data: dict) -> bool:
         """Обновляет клиента. Возвращает True, если обновлён."""
         # Проверка дубликатов
-        existing_clients = self._db.execute_query(
-            """
-            SELECT surname, name, patronymic, phone, passport, email, comment
-            FROM clients WHERE id != %s
-            """,
-            (client_id,),
-        )
-
-        temp_tuple = (
-            client_data["surname"],
-            client_data["name"],
-            client_data.get("patronymic"),
-            client_data["phone"],
-            client_data.get("passport"),
-            client_data.get("email"),
-            client_data.get("comment", ""),
-        )
-
-        for row in existing_clients:
-            if tuple(row) == temp_tuple:
-                raise ValueError("Клиент с такими данными уже существует!")
+        if self._find_duplicate(client_data, exclude_id=client_id):
+            raise ValueError("Клиент с такими данными уже существует!")
 
         # Обновление
-        rows_affected = self._db.execute_update(
-            """
-            UPDATE clients SET
-                surname=%s,
-                name=%s,
-                patronymic=%s,
-                phone=%s,
-                passport=%s,
-                email=%s,
-                comment=%s
-            WHERE id=%s
-            """,
-            temp_tuple + (client_id,),
-        )
+        try:
+            rows_affected = self._db.execute_update(
+                """
+                UPDATE clients SET
+                    surname=%s,
+                    name=%s,
+                    patronymic=%s,
+                    phone=%s,
+                    passport=%s,
+                    email=%s,
+                    comment=%s
+                WHERE id=%s
+                """,
+                self._client_values(client_data) + (client_id,),
+            )
+        except errors.UniqueViolation as exc:
+            raise ValueError("Клиент с такими данными уже существует!") from exc
+        finally:
+            self._cache.invalidate(client_id)
 
         return rows_affected > 0
 
@@ -300,6 +439,13 @@ class ClientRepDB:
             "DELETE FROM clients WHERE id=%s",
             (client_id,),
         )
+        self._cache.invalidate(client_id)
+        if rows_affected > 0:
+            # бронирования клиента удалены каскадно
+            from OccupancyCache import OccupancyCache
+
+            OccupancyCache().invalidate()
+            EntityCache.named("bookings").clear()
         return rows_affected > 0
 
     def get_count(self) -> int:
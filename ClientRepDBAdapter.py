@@ -1,10 +1,11 @@
 """Адаптер между репозиторием клиентов и базой данных."""
 
-from typing import List
+from typing import Iterator, List, Tuple
 
 from ClientBase import Client
 from ClientRepDB import ClientRepDB
 from ClientRepository import ClientRepository
+from ClientShortInfo import ClientShort
 
 
 class ClientRepDBAdapter(ClientRepository):
@@ -13,8 +14,15 @@ class ClientRepDBAdapter(ClientRepository):
     def __init__(self, db_repo: ClientRepDB):
         """Инициализирует адаптер с указанным репозиторием базы данных."""
         self._db_repo = db_repo
-        # вызывает конструктор базового ClientRepository
-        super().__init__("database")
+        self.path = "database"
+        # конструктор ClientRepository не вызывается: он загружает всех клиентов,
+        # а адаптер выполняет каждую операцию запросом к базе данных
+        self._clients: List[Client] = []
+
+    @property
+    def clients(self) -> List[Client]:
+        """Все клиенты (загружаются из базы данных при обращении)."""
+        return self.read_all()
 
     def load(self) -> None:
         """Загружает список клиентов из базы данных."""
@@ -45,9 +53,9 @@ class ClientRepDBAdapter(ClientRepository):
         for client in current_clients:
             self._db_repo.delete_client(client.id)
 
-        # добавляем новых клиентов
-        for client in clients:
-            self._db_repo.add_client(
+        # добавляем новых клиентов одним пакетом
+        self._db_repo.add_clients(
+            [
                 {
                     "surname": client.surname,
                     "name": client.name,
@@ -57,7 +65,9 @@ class ClientRepDBAdapter(ClientRepository):
                     "email": client.email,
                     "comment": client.comment,
                 }
-            )
+                for client in clients
+            ]
+        )
         # обновляем локальный кэш клиентов
         self._clients = clients.copy()
 
@@ -75,21 +85,23 @@ class ClientRepDBAdapter(ClientRepository):
 
     def add_client(self, client_data: dict) -> bool:
         """Добавляет нового клиента в базу данных."""
-        result = self._db_repo.add_client(client_data)
-        self.load()
-        return result
+        return self._db_repo.add_client(client_data)
 
     def update_client(self, client_id: int, client_data: dict) -> bool:
         """Обновляет данные клиента по ID."""
-        result = self._db_repo.update_client(client_id, client_data)
-        self.load()
-        return result
+        return self._db_repo.update_client(client_id, client_data)
 
     def delete_client(self, client_id: int) -> bool:
         """Удаляет клиента по ID."""
-        result = self._db_repo.delete_client(client_id)
-        self.load()  # обновляет локальный кэш после удаления
-        return result
+        return self._db_repo.delete_client(client_id)
+
+    def suggest(self, query: str, limit: int = 10) -> List[ClientShort]:
+        """Подсказки клиентов по началу фамилии или телефона."""
+        return self._db_repo.suggest(query, limit)
+
+    def export(self) -> Tuple[Tuple[str, ...], Iterator[tuple]]:
+        """Заголовок и поток строк для выгрузки клиентов (без загрузки в память)."""
+        return self._db_repo.EXPORT_COLUMNS, self._db_repo.export_rows()
 
     def get_count(self) -> int:
         """Возвращает количество клиентов."""
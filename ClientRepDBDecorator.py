@@ -1,11 +1,13 @@
 """Декораторы для репозиториев клиентов с поддержкой фильтрации и сортировки."""
 
-from typing import Any, Callable, List, Optional
+from typing import Any, Callable, List, Optional, Tuple
 from abc import ABC, abstractmethod
 from ClientBase import Client
 from ClientRepDB import ClientRepDB
 from ClientRepository import ClientRepository
+from ClientSearch import ClientSearch
 from ClientShortInfo import ClientShort
+from QueryBuilder import QueryBuilder, escape_like
 
 
 class ClientFilter(ABC):
@@ -16,6 +18,12 @@ class ClientFilter(ABC):
         """Возвращает True, если клиент проходит фильтр."""
         pass
 
+    def to_sql(self) -> Optional[Tuple[str, tuple]]:
+        """Возвращает SQL-условие и параметры (пустое условие - без ограничений)
+        или None, если у фильтра нет SQL-представления: тогда фильтры
+        применяются на стороне Python."""
+        return None
+
 
 class SurnameFilter(ClientFilter):
     """Фильтр по началу фамилии."""
@@ -28,6 +36,11 @@ class SurnameFilter(ClientFilter):
             return True
         return client.surname.lower().startswith(self.prefix)
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        if not self.prefix:
+            return "", ()
+        return "lower(surname) LIKE %s", (escape_like(self.prefix) + "%",)
+
 
 class NameFilter(ClientFilter):
     """Фильтр по началу имени."""
@@ -40,6 +53,11 @@ class NameFilter(ClientFilter):
             return True
         return client.name.lower().startswith(self.prefix)
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        if not self.prefix:
+            return "", ()
+        return "lower(name) LIKE %s", (escape_like(self.prefix) + "%",)
+
 
 class PatronymicFilter(ClientFilter):
     """Фильтр по началу отчества."""
@@ -63,6 +81,13 @@ class PatronymicFilter(ClientFilter):
         else:
             return True
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        if self.has_patronymic == "yes":
+            return "btrim(coalesce(patronymic, '')) <> ''", ()
+        if self.has_patronymic == "no":
+            return "btrim(coalesce(patronymic, '')) = ''", ()
+        return "", ()
+
 
 class PhoneFilter(ClientFilter):
     """Фильтр по номеру телефона (подстрока)."""
@@ -75,6 +100,25 @@ class PhoneFilter(ClientFilter):
             return True
         return self.phone_substring in client.phone
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        if not self.phone_substring:
+            return "", ()
+        return "phone LIKE %s", ("%" + escape_like(self.phone_substring) + "%",)
+
+
+class SearchFilter(ClientFilter):
+    """Поиск по словам: начало фамилии, имени или отчества,
+    подстрока телефона или паспорта (см. ClientSearch)."""
+
+    def __init__(self, query: str) -> None:
+        self.query = query
+
+    def apply(self, client: Client) -> bool:
+        return ClientSearch.matches(client, self.query)
+
+    def to_sql(self) -> Tuple[str, tuple]:
+        return ClientSearch.condition(self.query)
+
 
 class CompositeFilter(ClientFilter):
     """Композитный фильтр, объединяющий несколько фильтров через AND."""
@@ -93,6 +137,27 @@ class CompositeFilter(ClientFilter):
                 return False
         return True
 
+    def to_sql(self) -> Optional[Tuple[str, tuple]]:
+        """Объединяет SQL-условия вложенных фильтров через AND
+        (None, если хотя бы у одного из них нет SQL-представления)."""
+        conditions = []
+        params: List[Any] = []
+        for filter_obj in self.filters:
+            sql = filter_obj.to_sql()
+            if sql is None:
+                return None
+            condition, filter_params = sql
+            if condition:
+                conditions.append(f"({condition})")
+                params.extend(filter_params)
+        return " AND ".join(conditions), tuple(params)
+
+
+def _sql_sort_key(key: Callable[[Client], Any], expression: str) -> Callable[[Client], Any]:
+    """Прикрепляет к ключу сортировки эквивалентное SQL-выражение."""
+    key.sql_expression = expression
+    return key
+
 
 class ClientSorter:
     """Фабрика для создания функций сортировки."""
@@ -101,36 +166,40 @@ class ClientSorter:
     def by_surname(reverse: bool = False) -> Callable[[Client], Any]:
         """Сортировка по фамилии."""
         if reverse:
-            return lambda c: c.surname.lower()
-        return lambda c: c.surname.lower()
+            return _sql_sort_key(lambda c: c.surname.lower(), "lower(surname)")
+        return _sql_sort_key(lambda c: c.surname.lower(), "lower(surname)")
 
     @staticmethod
     def by_name(reverse: bool = False) -> Callable[[Client], Any]:
         """Сортировка по имени."""
         if reverse:
-            return lambda c: c.name.lower()
-        return lambda c: c.name.lower()
+            return _sql_sort_key(lambda c: c.name.lower(), "lower(name)")
+        return _sql_sort_key(lambda c: c.name.lower(), "lower(name)")
 
     @staticmethod
     def by_patronymic(reverse: bool = False) -> Callable[[Client], Any]:
         """Сортировка по отчеству."""
         if reverse:
-            return lambda c: c.patronymic.lower()
-        return lambda c: c.patronymic.lower()
+            return _sql_sort_key(
+                lambda c: c.patronymic.lower(), "lower(coalesce(patronymic, ''))"
+            )
+        return _sql_sort_key(
+            lambda c: c.patronymic.lower(), "lower(coalesce(patronymic, ''))"
+        )
 
     @staticmethod
     def by_phone(reverse: bool = False) -> Callable[[Client], Any]:
         """Сортировка по телефону."""
         if reverse:
-            return lambda c: c.phone
-        return lambda c: c.phone
+            return _sql_sort_key(lambda c: c.phone, "phone")
+        return _sql_sort_key(lambda c: c.phone, "phone")
 
     @staticmethod
     def by_id(reverse: bool = False) -> Callable[[Client], Any]:
         """Сортировка по ID."""
         if reverse:
-            return lambda c: c.id
-        return lambda c: c.id
+            return _sql_sort_key(lambda c: c.id, "id")
+        return _sql_sort_key(lambda c: c.id, "id")
 
 
 class ClientRepDBDecorator:
@@ -153,48 +222,87 @@ class ClientRepDBDecorator:
         self._sorter = sorter
         self._reverse_sort = reverse
 
-    def get_k_n_short_list(self, k: int, n: int) -> List[Client]:
-        """Возвращает список k клиентов со страницы n с фильтрацией и сортировкой."""
-        # Загружаем всех клиентов из БД
+    def sql_condition(self) -> Optional[Tuple[str, tuple]]:
+        """SQL-условие добавленных фильтров и его параметры
+        (None, если их нельзя выполнить в базе данных)."""
+        return self._filters.to_sql()
+
+    def _build_query(self) -> Optional[QueryBuilder]:
+        """Переводит фильтры и сортировку в SQL.
+        Возвращает None, если что-то из них нельзя выполнить в базе данных."""
+        sql = self._filters.to_sql()
+        if sql is None:
+            return None
+        condition, params = sql
+
+        builder = self._db_repo.new_query().where(condition, *params)
+        if self._sorter:
+            expression = getattr(self._sorter, "sql_expression", None)
+            if expression is None:
+                return None
+            builder.order_by(expression, self._reverse_sort)
+        # id по возрастанию при любом направлении делает порядок однозначным,
+        # совпадает с резервным путем и замыкает ключ keyset-пагинации
+        builder.order_by("id")
+        return builder
+
+    def _filter_and_sort_in_python(self) -> List[Client]:
+        """Резервный путь: загружает всех клиентов и обрабатывает их в Python."""
         total_count = self._db_repo.get_count()
         all_clients: List[Client] = self._db_repo.get_k_n_short_list(total_count, 1)
 
         # Применяем фильтры
         filtered_clients = [c for c in all_clients if self._filters.apply(c)]
 
-        # Применяем сортировку, если установлена
+        # Применяем сортировку, если установлена. Клиенты уже идут по id, а
+        # сортировка устойчива (и при reverse), поэтому равные по ключу
+        # остаются по возрастанию id - как в SQL
         if self._sorter:
             filtered_clients.sort(key=self._sorter, reverse=self._reverse_sort)
 
-        # Применяем пагинацию
+        return filtered_clients
+
+    def get_k_n_short_list(self, k: int, n: int) -> List[Client]:
+        """Возвращает список k клиентов со страницы n с фильтрацией и сортировкой."""
         start_index = (n - 1) * k
+        builder = self._build_query()
+        if builder is not None:
+            # в базу уходит только запрошенная страница
+            return self._db_repo.find_short(builder.paginate(k, start_index))
+
+        filtered_clients = self._filter_and_sort_in_python()
+
+        # Применяем пагинацию
         if start_index >= len(filtered_clients):
             return []
 
         end_index = start_index + k
         return filtered_clients[start_index:end_index]
 
+    def get_page(
+        self, k: int, n: int = 1, cursor: Optional[str] = None
+    ) -> Tuple[List[ClientShort], Optional[str]]:
+        """Возвращает k клиентов после курсора (или со страницы n) и курсор следующей."""
+        builder = self._build_query()
+        if builder is None:
+            if cursor:
+                raise ValueError("Курсор не поддерживается для выбранных фильтров!")
+            return self.get_k_n_short_list(k, n), None
+        return self._db_repo.find_short_page(builder.after_cursor(cursor, k, (n - 1) * k))
+
     def get_count(self) -> int:
         """Возвращает количество клиентов, прошедших фильтрацию."""
-        total_count = self._db_repo.get_count()
-        all_clients: List[Client] = self._db_repo.get_k_n_short_list(total_count, 1)
-
-        filtered_clients = [c for c in all_clients if self._filters.apply(c)]
-        return len(filtered_clients)
+        builder = self._build_query()
+        if builder is not None:
+            return self._db_repo.count_where(builder)
+        return len(self._filter_and_sort_in_python())
 
     def read_all(self) -> List[Client]:
         """Возвращает всех клиентов с применением фильтров и сортировки."""
-        total_count = self._db_repo.get_count()
-        all_clients: List[Client] = self._db_repo.get_k_n_short_list(total_count, 1)
-
-        # Применяем фильтры
-        filtered_clients = [c for c in all_clients if self._filters.apply(c)]
-
-        # Применяем сортировку, если установлена
-        if self._sorter:
-            filtered_clients.sort(key=self._sorter, reverse=self._reverse_sort)
-
-        return filtered_clients
+        builder = self._build_query()
+        if builder is not None:
+            return self._db_repo.find_short(builder)
+        return self._filter_and_sort_in_python()
 
 
 class ClientRepFileDecorator:
@@ -219,8 +327,8 @@ class ClientRepFileDecorator:
 
     def get_k_n_short_list(self, k: int, n: int) -> List[ClientShort]:
         """Возвращает список k клиентов со страницы n с фильтрацией и сортировкой."""
-        # Загружаем всех клиентов из файлового репозитория
-        all_clients: List[Client] = self._file_repo.read_all()
+        # Текущие клиенты файлового репозитория (с учетом журнала изменений)
+        all_clients: List[Client] = self._file_repo.clients
 
         # Применяем фильтры
         filtered_clients = [c for c in all_clients if self._filters.apply(c)]
@@ -245,13 +353,13 @@ class ClientRepFileDecorator:
 
     def get_count(self) -> int:
         """Возвращает количество клиентов, прошедших фильтрацию."""
-        all_clients: List[Client] = self._file_repo.read_all()
+        all_clients: List[Client] = self._file_repo.clients
         filtered_clients = [c for c in all_clients if self._filters.apply(c)]
         return len(filtered_clients)
 
     def read_all(self) -> List[Client]:
         """Возвращает всех клиентов с применением фильтров и сортировки."""
-        all_clients: List[Client] = self._file_repo.read_all()
+        all_clients: List[Client] = self._file_repo.clients
 
         # Применяем фильтры
         filtered_clients = [c for c in all_clients if self._filters.apply(c)]
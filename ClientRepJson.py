@@ -32,21 +32,9 @@ class ClientRepJson(ClientRepository):
                 return []
 
     def write_all(self) -> None:
-        """Сохраняет всех клиентов в JSON-файл."""
-        data = [
-            {
-                "id": c.id,
-                "surname": c.surname,
-                "name": c.name,
-                "patronymic": c.patronymic,
-                "phone": c.phone,
-                "passport": c.passport,
-                "email": c.email,
-                "comment": c.comment,
-            }
-            for c in self.clients  # выполняем действия для каждого элемента
-        ]
-        with open(
-            self.path, "w", encoding="utf-8"
-        ) as f:  # открываем файл в режиме записи
-            json.dump(data, f, ensure_ascii=False, indent=4, sort_keys=False)
+        """Атомарно перезаписывает JSON-файл всеми клиентами (сжатие журнала)."""
+        self._write_file(
+            lambda data, f: json.dump(
+                data, f, ensure_ascii=False, indent=4, sort_keys=False
+            )
+        )
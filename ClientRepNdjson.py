@@ -0,0 +1,284 @@
+"""Реализация репозитория клиентов в файле NDJSON с ленивым чтением."""
+
+import json
+import mmap
+import os
+import re
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ClientBase import Client
+from ClientRepository import ClientRepository
+
+INDEX_VERSION = 1  # версия формата файла индекса path + ".idx"
+# id в начале строки, как ее пишет ClientRepNdjson.write_all
+_ID_PREFIX = re.compile(rb'\s*\{\s*"id"\s*:\s*(\d+)\s*[,}]')
+
+
+class LazyClientMap(MutableMapping):
+    """Словарь "ID -> клиент" поверх отображенного в память файла NDJSON.
+
+    Строка клиента разбирается только при обращении к нему. Изменения хранятся
+    поверх файла до следующего сжатия; порядок обхода - как у dict: записи
+    файла в порядке файла, затем добавленные."""
+
+    def __init__(self, mm: Optional[mmap.mmap], ids: array, offsets: array) -> None:
+        self._mm = mm
+        self._ids = ids  # ID записей в порядке файла
+        self._offsets = offsets  # смещения строк этих записей
+        # позиции записей в порядке ID (None - файл уже упорядочен по ID)
+        self._order: Optional[array] = None
+        if sorted(ids) != ids.tolist():
+            self._order = array("q", sorted(range(len(ids)), key=ids.__getitem__))
+        self._changed: Dict[int, Optional[Client]] = {}  # None - запись удалена
+        self._added: Dict[int, Client] = {}  # ID, которых нет в файле
+        self._deleted = 0
+
+    def _position(self, client_id: int) -> Optional[int]:
+        """Позиция записи файла с этим ID (двоичный поиск)."""
+        ids = self._ids
+        if self._order is None:
+            i = bisect_left(ids, client_id)
+            return i if i < len(ids) and ids[i] == client_id else None
+        order = self._order
+        i = bisect_left(order, client_id, key=ids.__getitem__)
+        return order[i] if i < len(order) and ids[order[i]] == client_id else None
+
+    def _parse(self, position: int) -> Client:
+        return Client(json.loads(self._line(position)), from_dict=True)
+
+    def _line(self, position: int) -> bytes:
+        start = self._offsets[position]
+        end = self._mm.find(b"\n", start)
+        return self._mm[start:end] if end != -1 else self._mm[start:]
+
+    def lines(self) -> Iterator[Tuple[int, Optional[bytes], Optional[Client]]]:
+        """(ID, строка файла, None) для неизмененных записей и (ID, None,
+        клиент) для измененных и добавленных - в порядке обхода."""
+        changed = self._changed
+        for position, client_id in enumerate(self._ids):
+            if client_id not in changed:
+                yield client_id, self._line(position), None
+            elif changed[client_id] is not None:
+                yield client_id, None, changed[client_id]
+        for client_id, client in self._added.items():
+            yield client_id, None, client
+
+    def identity_pairs(self) -> Iterator[Tuple[tuple, int]]:
+        """Пары (ключ идентичности, ID) всех клиентов. Неизмененные записи
+        не превращаются в Client: ключ строится прямо по словарю строки."""
+        for client_id, line, client in self.lines():
+            if client is None:
+                yield Client.identity_of(json.loads(line)), client_id
+            else:
+                yield client.identity_key(), client_id
+
+    def __getitem__(self, client_id: int) -> Client:
+        if client_id in self._added:
+            return self._added[client_id]
+        if client_id in self._changed:
+            client = self._changed[client_id]
+            if client is None:
+                raise KeyError(client_id)
+            return client
+        position = self._position(client_id)
+        if position is None:
+            raise KeyError(client_id)
+        return self._parse(position)
+
+    def __setitem__(self, client_id: int, client: Client) -> None:
+        in_file = client_id not in self._added and (
+            self._changed.get(client_id, client) is not None
+        )
+        if in_file and self._position(client_id) is not None:
+            self._changed[client_id] = client  # замена на месте записи файла
+        else:
+            self._added[client_id] = client
+
+    def __delitem__(self, client_id: int) -> None:
+        if client_id in self._added:
+            del self._added[client_id]
+        elif (
+            self._changed.get(client_id, True) is not None
+            and self._position(client_id) is not None
+        ):
+            self._changed[client_id] = None
+            self._deleted += 1
+        else:
+            raise KeyError(client_id)
+
+    def __iter__(self) -> Iterator[int]:
+        if not self._deleted and not self._added:
+            return iter(self._ids)  # файл без изменений - обход массива
+        return self._iter_changed()
+
+    def _iter_changed(self) -> Iterator[int]:
+        changed = self._changed
+        for client_id in self._ids:
+            if client_id not in changed or changed[client_id] is not None:
+                yield client_id
+        yield from self._added
+
+    def __len__(self) -> int:
+        return len(self._ids) - self._deleted + len(self._added)
+
+    def __contains__(self, client_id) -> bool:
+        try:
+            self[client_id]
+        except KeyError:
+            return False
+        return True
+
+
+class ClientRepNdjson(ClientRepository):
+    """Реализация ClientRepository для больших файлов NDJSON (клиент на строку).
+
+    Файл отображается в память (mmap), а смещения строк хранятся в индексе
+    path + ".idx": при запуске читается только индекс, клиенты разбираются
+    при обращении. Индекс перестраивается, если файл изменен не репозиторием."""
+
+    def __init__(self, path: str):
+        self._mm: Optional[mmap.mmap] = None
+        self._file = None
+        super().__init__(path)
+
+    @property
+    def index_path(self) -> str:
+        return self.path + ".idx"
+
+    def _load(self) -> None:
+        """Открывает файл и его индекс без разбора клиентов."""
+        index = self._read_index()
+        self._map_file()
+        if index is None:
+            index = self._scan()
+            self._write_index(*index)
+        self._by_id = LazyClientMap(self._mm, *index)
+        self._reindex()
+
+    def read_all(self) -> List[Client]:
+        """Считывает и разбирает всех клиентов из файла NDJSON."""
+        if not os.path.exists(self.path):
+            return []
+        clients = []
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    clients.append(Client(json.loads(line), from_dict=True))
+        return clients
+
+    def _identity_pairs(self) -> Iterator[Tuple[tuple, int]]:
+        if isinstance(self._by_id, LazyClientMap):
+            return self._by_id.identity_pairs()
+        return super()._identity_pairs()
+
+    def _lines(self) -> Iterator[Tuple[int, Optional[bytes], Optional[Client]]]:
+        if isinstance(self._by_id, LazyClientMap):
+            return self._by_id.lines()
+        return ((c.id, None, c) for c in self._by_id.values())
+
+    def write_all(self) -> None:
+        """Атомарно перезаписывает файл NDJSON всеми клиентами (сжатие журнала)
+        и его индекс. Клиенты пишутся потоком, без списка в памяти;
+        неизмененные строки копируются из старого файла без разбора."""
+        ids, offsets = array("q"), array("q")
+        position = 0
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for client_id, line, client in self._lines():
+                if client is not None:
+                    line = json.dumps(
+                        self.client_to_dict(client), ensure_ascii=False
+                    ).encode("utf-8")
+                data = line + b"\n"
+                ids.append(client_id)
+                offsets.append(position)
+                f.write(data)
+                position += len(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._unmap_file()
+        os.replace(tmp_path, self.path)
+        self._write_index(ids, offsets)
+        self._map_file()
+        self._by_id = LazyClientMap(self._mm, ids, offsets)
+
+    def close(self) -> None:
+        """Закрывает журнал изменений и отображение файла."""
+        super().close()
+        self._unmap_file()
+
+    def _map_file(self) -> None:
+        if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+            self._file = open(self.path, "rb")
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _unmap_file(self) -> None:
+        # ленивый словарь держит ссылку на mmap: закрывать его можно только
+        # вместе с заменой словаря (при сжатии) или при закрытии репозитория
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _scan(self) -> Tuple[array, array]:
+        """Строит индекс проходом по файлу: ID и смещение каждой строки."""
+        ids, offsets = array("q"), array("q")
+        mm = self._mm
+        if mm is None:
+            return ids, offsets
+        size = len(mm)
+        position = 0
+        while position < size:
+            end = mm.find(b"\n", position)
+            if end == -1:
+                end = size
+            line = mm[position:end]
+            if line.strip():
+                match = _ID_PREFIX.match(line)
+                client_id = int(match.group(1) if match else json.loads(line)["id"])
+                ids.append(client_id)
+                offsets.append(position)
+            position = end + 1
+        return ids, offsets
+
+    def _file_signature(self) -> Tuple[int, int]:
+        """(размер, mtime_ns) файла: по ним индекс сверяется с файлом."""
+        if not os.path.exists(self.path):
+            return 0, 0
+        stat = os.stat(self.path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _read_index(self) -> Optional[Tuple[array, array]]:
+        """Индекс из файла path + ".idx" или None, если он устарел или поврежден."""
+        if not os.path.exists(self.index_path):
+            return None
+        header = array("q")
+        try:
+            with open(self.index_path, "rb") as f:
+                header.fromfile(f, 4)
+                version, size, mtime_ns, count = header
+                if version != INDEX_VERSION:
+                    return None
+                if (size, mtime_ns) != self._file_signature():
+                    return None
+                ids, offsets = array("q"), array("q")
+                ids.fromfile(f, count)
+                offsets.fromfile(f, count)
+        except (EOFError, OSError, ValueError):
+            return None
+        return ids, offsets
+
+    def _write_index(self, ids: array, offsets: array) -> None:
+        """Атомарно сохраняет индекс: заголовок, ID и смещения строк."""
+        header = array("q", (INDEX_VERSION, *self._file_signature(), len(ids)))
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            header.tofile(f)
+            ids.tofile(f)
+            offsets.tofile(f)
+        os.replace(tmp_path, self.index_path)
@@ -28,19 +28,7 @@ class ClientRepYaml(ClientRepository):
                 return []
 
     def write_all(self) -> None:
-        """Сохраняет всех клиентов в YAML-файл."""
-        data = [
-            {
-                "id": c.id,
-                "surname": c.surname,
-                "name": c.name,
-                "patronymic": c.patronymic,
-                "phone": c.phone,
-                "passport": c.passport,
-                "email": c.email,
-                "comment": c.comment,
-            }
-            for c in self.clients  # выполняем действия для каждого элемента
-        ]
-        with open(self.path, "w", encoding="utf-8") as f:
-            yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+        """Атомарно перезаписывает YAML-файл всеми клиентами (сжатие журнала)."""
+        self._write_file(
+            lambda data, f: yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+        )
@@ -1,20 +1,98 @@
 """ClientRepository"""
 
+import json
+import os
 from abc import ABC, abstractmethod
-from typing import List
+from bisect import bisect_left, insort
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+)
 
 from ClientBase import Client
 from ClientShortInfo import ClientShort
 
+LOG_CONFIG = {  # константа с настройками журнала изменений файловых репозиториев
+    "compact_every": 1000,  # записей журнала до перезаписи основного файла
+    "fsync": False,  # fsync после каждой записи (переживает сбой питания)
+}
+
+# поля клиента в основном файле и в журнале изменений
+CLIENT_FIELDS = (
+    "id",
+    "surname",
+    "name",
+    "patronymic",
+    "phone",
+    "passport",
+    "email",
+    "comment",
+)
+
 
 class ClientRepository(ABC):
-    """Абстрактный класс репозитория клиентов."""
+    """Абстрактный класс репозитория клиентов.
+
+    Изменения дописываются в журнал path + ".log" (одна JSON-строка на
+    операцию), а основной файл перезаписывается целиком только при сжатии -
+    раз в LOG_CONFIG["compact_every"] операций. При запуске журнал
+    применяется поверх основного файла.
+
+    Клиенты хранятся в словаре "ID -> клиент" (в порядке файла), рядом
+    поддерживаются индексы: ключ идентичности -> ID для поиска дубликатов и
+    отсортированный список ID для пагинации. Удаленные ID убираются из этого
+    списка лениво, при сжатии журнала: до него они лежат в отсортированном
+    списке надгробий, и удаление не сдвигает весь список ID."""
 
     def __init__(self, path: str):
         self.path = path
-        self.clients: List[Client] = []
+        self.log_path = path + ".log"
+        self._log: Optional[IO[str]] = None
+        self._log_records = 0
+        self._by_id: MutableMapping[int, Client] = {}
+        self._identities: Optional[Dict[tuple, int]] = None
+        self._sorted_ids: List[int] = []
+        self._deleted_ids: List[int] = []  # надгробия в _sorted_ids (по порядку)
+        self._load()
+        self._replay_log()
+
+    def _load(self) -> None:
+        """Загружает клиентов из основного файла в self._by_id."""
         self.clients = self.read_all()
 
+    @property
+    def clients(self) -> List[Client]:
+        """Все клиенты в порядке хранения (копия списка)."""
+        return list(self._by_id.values())
+
+    @clients.setter
+    def clients(self, clients: List[Client]) -> None:
+        """Заменяет всех клиентов и перестраивает индексы."""
+        self._by_id = {c.id: c for c in clients}
+        self._reindex()
+
+    def _reindex(self) -> None:
+        """Строит индексы по self._by_id. Индекс идентичности требует всех
+        клиентов целиком, поэтому строится при первой проверке дубликатов."""
+        self._identities = None
+        self._sorted_ids = sorted(self._by_id)
+        self._deleted_ids = []
+
+    def _identity_index(self) -> Dict[tuple, int]:
+        if self._identities is None:
+            self._identities = dict(self._identity_pairs())
+        return self._identities
+
+    def _identity_pairs(self) -> Iterator[Tuple[tuple, int]]:
+        """Пары (ключ идентичности, ID) всех клиентов."""
+        return ((c.identity_key(), c.id) for c in self._by_id.values())
+
     @abstractmethod  # декоратор, указывающий что метод должен быть реализован в дочерних классах
     def read_all(self) -> List[Client]:
         """Считывает всех клиентов из источника данных."""
@@ -23,19 +101,150 @@ class ClientRepository(ABC):
     def write_all(self) -> None:
         """Сохраняет всех клиентов в источник данных."""
 
+    @staticmethod
+    def client_to_dict(client: Client) -> dict:
+        """Поля клиента для записи в файл."""
+        return {field: getattr(client, field) for field in CLIENT_FIELDS}
+
+    def _write_file(self, dump: Callable[[List[dict], IO[str]], None]) -> None:
+        """Атомарно перезаписывает основной файл: данные пишутся во временный
+        файл рядом с ним, который затем подменяет основной (os.replace)."""
+        data = [self.client_to_dict(c) for c in self.clients]
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            dump(data, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def compact(self) -> None:
+        """Переносит журнал в основной файл и очищает журнал."""
+        self.write_all()
+        self._purge_deleted_ids()
+        # журнал очищается только после подмены основного файла: при сбое
+        # между этими шагами записи журнала повторно применятся без изменений
+        self._close_log()
+        with open(self.log_path, "w", encoding="utf-8"):
+            pass
+        self._log_records = 0
+
+    def close(self) -> None:
+        """Закрывает файлы репозитория (журнал откроется снова при записи)."""
+        self._close_log()
+
+    def _close_log(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def _append_log(self, record: dict) -> None:
+        """Дописывает операцию в журнал; при переполнении сжимает журнал."""
+        if self._log is None:
+            self._log = open(self.log_path, "a", encoding="utf-8")
+        self._log.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._log.flush()
+        if LOG_CONFIG["fsync"]:
+            os.fsync(self._log.fileno())
+        self._log_records += 1
+        if self._log_records >= LOG_CONFIG["compact_every"]:
+            self.compact()
+
+    def _replay_log(self) -> None:
+        """Применяет журнал изменений к клиентам, прочитанным из основного
+        файла. Операции идемпотентны: повторное применение ничего не меняет.
+
+        Недописанной при сбое считается только последняя строка без перевода
+        строки: если она не разбирается, она отрезается от журнала. Ошибка в
+        любой другой строке - ValueError, журнал при этом не изменяется."""
+        if not os.path.exists(self.log_path):
+            return
+        # dict сохраняет порядок вставки: замена оставляет клиента на месте,
+        # новый клиент попадает в конец - как при исходных операциях
+        clients = self._by_id
+        torn_at: Optional[int] = None  # начало недописанной последней строки
+        unterminated = False
+        with open(self.log_path, "rb") as f:
+            position = 0
+            for line_no, line in enumerate(f, 1):
+                line_start, position = position, position + len(line)
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                    if record["op"] == "put":
+                        data = record["client"]
+                        client = Client.from_row(
+                            tuple(data.get(field) for field in CLIENT_FIELDS)
+                        )
+                        clients[client.id] = client
+                    elif record["op"] == "delete":
+                        clients.pop(record["id"], None)
+                    else:
+                        raise ValueError(f"неизвестная операция {record['op']!r}")
+                except (ValueError, KeyError, TypeError) as exc:
+                    if line.endswith(b"\n"):
+                        raise ValueError(
+                            f"Журнал {self.log_path} поврежден в строке {line_no}: "
+                            f"{exc}"
+                        ) from exc
+                    torn_at = line_start
+                    break
+                unterminated = not line.endswith(b"\n")
+                self._log_records += 1
+        if torn_at is not None:
+            # следующие записи не должны дописываться к обрывку строки
+            with open(self.log_path, "r+b") as f:
+                f.truncate(torn_at)
+        elif unterminated:
+            with open(self.log_path, "ab") as f:
+                f.write(b"\n")
+        self._reindex()
+        if self._log_records >= LOG_CONFIG["compact_every"]:
+            self.compact()
+
+    def _purge_deleted_ids(self) -> None:
+        """Убирает надгробия из _sorted_ids за один проход (O(N) - вместе со
+        сжатием, которое и так перезаписывает весь файл)."""
+        if self._deleted_ids:
+            deleted = set(self._deleted_ids)
+            self._sorted_ids = [i for i in self._sorted_ids if i not in deleted]
+            self._deleted_ids = []
+
+    def _is_deleted(self, client_id: int) -> bool:
+        deleted = self._deleted_ids
+        i = bisect_left(deleted, client_id)
+        return i < len(deleted) and deleted[i] == client_id
+
+    def _page_ids(self, start: int, count: int) -> List[int]:
+        """count живых ID по порядку, начиная с start-го: двоичный поиск
+        позиции с учетом надгробий (O(log N * log T)), затем O(count + T)."""
+        ids, deleted = self._sorted_ids, self._deleted_ids
+        if not deleted:
+            return ids[start : start + count]
+        # перед позицией i живых ID: i минус надгробия с меньшим ID
+        low, high = 0, len(ids)
+        while low < high:
+            middle = (low + high) // 2
+            if middle - bisect_left(deleted, ids[middle]) < start:
+                low = middle + 1
+            else:
+                high = middle
+        page: List[int] = []
+        while low < len(ids) and len(page) < count:
+            if not self._is_deleted(ids[low]):
+                page.append(ids[low])
+            low += 1
+        return page
+
     def get_by_id(self, client_id: int) -> Client | None:
         """Возвращает клиента по его ID или None, если не найден."""
-        for client in self.clients:
-            if client.id == client_id:
-                return client
-        return None
+        return self._by_id.get(client_id)
 
     def get_k_n_short_list(self, k: int, n: int) -> List[ClientShort]:
         """Возвращает список из k клиентов со страницы n."""
-        sorted_clients = sorted(self.clients, key=lambda x: x.id)
         start = (n - 1) * k
         end = start + k
-        slice_clients = sorted_clients[start:end]
+        slice_clients = [self._by_id[i] for i in self._page_ids(start, end - start)]
         return [
             ClientShort(c.id, c.surname, c.name, c.patronymic, c.phone)
             for c in slice_clients
@@ -43,43 +252,65 @@ class ClientRepository(ABC):
 
     def sort_by_surname(self) -> None:
         """Сортирует список клиентов по фамилии и сохраняет изменения."""
-        self.clients.sort(key=lambda c: c.surname)
-        self.write_all()
+        ordered = sorted(self._by_id.values(), key=lambda c: c.surname)
+        self._by_id = {c.id: c for c in ordered}
+        self.compact()  # порядок клиентов хранится только в основном файле
+
+    def _check_unique(self, client: Client, client_id: Optional[int] = None) -> tuple:
+        """Проверяет, что такого клиента (кроме client_id) еще нет.
+        Возвращает ключ идентичности клиента."""
+        key = client.identity_key()
+        existing_id = self._identity_index().get(key)
+        if existing_id is not None and existing_id != client_id:
+            raise ValueError("Клиент с такими данными уже существует!")
+        return key
+
+    def _forget_identity(self, client: Client) -> None:
+        key = client.identity_key()
+        identities = self._identity_index()
+        if identities.get(key) == client.id:
+            del identities[key]
 
     def add_client(self, client: Client) -> bool:
         """Добавляет нового клиента"""
-        for existing in self.clients:  # цикл проверки по существующим клиентам
-            if existing.equals(client):  # проверка дубликатов
-                raise ValueError("Клиент с такими данными уже существует!")
-        new_id = max((c.id for c in self.clients), default=0) + 1
+        key = self._check_unique(client)  # проверка дубликатов
+        # ID только растут, поэтому следующий - после последнего живого ID;
+        # надгробия в конце списка снимаются (каждое один раз)
+        while self._deleted_ids and self._sorted_ids[-1] == self._deleted_ids[-1]:
+            self._sorted_ids.pop()
+            self._deleted_ids.pop()
+        new_id = (self._sorted_ids[-1] if self._sorted_ids else 0) + 1
         client.id = new_id  # присвоили новый id и добавили в список
-        self.clients.append(client)
-        self.write_all()
+        self._by_id[new_id] = client
+        self._identity_index()[key] = new_id
+        self._sorted_ids.append(new_id)
+        self._append_log({"op": "put", "client": self.client_to_dict(client)})
         return True
 
     def update_client(self, client_id: int, new_client: Client) -> bool:
         """Заменяет клиента по ID новым клиентом.
         Возвращает True при успешной замене."""
-        for i, client in enumerate(self.clients):
-            if client.id == client_id:
-                for existing in self.clients:
-                    if existing.id != client_id and existing.equals(new_client):
-                        raise ValueError("Клиент с такими данными уже существует!")
-                new_client.id = client_id
-                self.clients[i] = new_client
-                self.write_all()
-                return True
-        raise ValueError(f"Клиент с ID {client_id} не найден")
+        client = self._by_id.get(client_id)
+        if client is None:
+            raise ValueError(f"Клиент с ID {client_id} не найден")
+        key = self._check_unique(new_client, client_id)
+        new_client.id = client_id
+        self._forget_identity(client)
+        self._by_id[client_id] = new_client  # позиция в словаре сохраняется
+        self._identity_index()[key] = client_id
+        self._append_log({"op": "put", "client": self.client_to_dict(new_client)})
+        return True
 
     def delete_client(self, client_id: int) -> bool:
         """Удаляет клиента по ID.
         Возвращает True при успешном удалении."""
-        for i, client in enumerate(self.clients):  # цикл с индексом
-            if client.id == client_id:
-                del self.clients[i]
-                self.write_all()
-                return True
-        raise ValueError(f"Клиент с ID {client_id} не найден")
+        client = self._by_id.pop(client_id, None)
+        if client is None:
+            raise ValueError(f"Клиент с ID {client_id} не найден")
+        self._forget_identity(client)
+        insort(self._deleted_ids, client_id)  # из _sorted_ids - при сжатии
+        self._append_log({"op": "delete", "id": client_id})
+        return True
 
     # def delete_client_test(self, client_id: int) -> bool:
     #     for i in range (len(self.clients)):
@@ -91,4 +322,4 @@ class ClientRepository(ABC):
 
     def get_count(self) -> int:
         """Возвращает количество клиентов в репозитории."""
-        return len(self.clients)
+        return len(self._by_id)
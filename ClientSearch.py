@@ -0,0 +1,115 @@
+"""Ранжированный поиск клиентов по ФИО, телефону и паспорту."""
+
+from typing import Any, List, Tuple
+
+from ClientRepDB import ClientRepDB
+from ClientShortInfo import ClientShort
+from QueryBuilder import QueryBuilder, escape_like
+
+# Поле -> (SQL-выражение, вид совпадения, вес в ранге). ФИО ищется по началу
+# слова без учета регистра (индексы text_pattern_ops), телефон и паспорт - по
+# подстроке (GIN-индексы pg_trgm, если расширение установлено).
+SEARCH_FIELDS: Tuple[Tuple[str, str, int], ...] = (
+    ("lower(surname)", "prefix", 6),
+    ("lower(name)", "prefix", 4),
+    ("lower(patronymic)", "prefix", 3),
+    ("phone", "substring", 2),
+    ("passport", "substring", 2),
+)
+EXACT_SURNAME_BONUS = 4  # фамилия совпала целиком
+
+
+class ClientSearch:
+    """Поиск клиентов по строке из нескольких слов.
+
+    Каждое слово должно совпасть хотя бы с одним полем SEARCH_FIELDS.
+    Ранг клиента - сумма лучших весов совпавших полей по всем словам."""
+
+    def __init__(self, db_repo: ClientRepDB = None) -> None:
+        self._db_repo = db_repo or ClientRepDB()
+
+    @staticmethod
+    def tokens(query: str) -> List[str]:
+        """Слова поискового запроса в нижнем регистре."""
+        return [token for token in query.lower().split() if token]
+
+    @staticmethod
+    def _pattern(token: str, kind: str) -> str:
+        escaped = escape_like(token)
+        return escaped + "%" if kind == "prefix" else "%" + escaped + "%"
+
+    @classmethod
+    def condition(cls, query: str) -> Tuple[str, tuple]:
+        """SQL-условие "все слова запроса нашлись" и его параметры."""
+        conditions = []
+        params: List[Any] = []
+        for token in cls.tokens(query):
+            arms = []
+            for expression, kind, _ in SEARCH_FIELDS:
+                arms.append(f"{expression} LIKE %s")
+                params.append(cls._pattern(token, kind))
+            conditions.append(f"({' OR '.join(arms)})")
+        return " AND ".join(conditions), tuple(params)
+
+    @classmethod
+    def rank(cls, query: str) -> Tuple[str, tuple]:
+        """SQL-выражение ранга и его параметры."""
+        terms = []
+        params: List[Any] = []
+        for token in cls.tokens(query):
+            exact_weight = SEARCH_FIELDS[0][2] + EXACT_SURNAME_BONUS
+            branches = [f"WHEN lower(surname) = %s THEN {exact_weight}"]
+            params.append(token)
+            for expression, kind, weight in SEARCH_FIELDS:
+                branches.append(f"WHEN {expression} LIKE %s THEN {weight}")
+                params.append(cls._pattern(token, kind))
+            terms.append(f"CASE {' '.join(branches)} ELSE 0 END")
+        return " + ".join(terms) or "0", tuple(params)
+
+    @classmethod
+    def matches(cls, client: Any, query: str) -> bool:
+        """То же условие, что condition(), для объекта клиента в Python."""
+        values = {
+            "lower(surname)": (client.surname or "").lower(),
+            "lower(name)": (client.name or "").lower(),
+            "lower(patronymic)": (client.patronymic or "").lower(),
+            "phone": (client.phone or "").lower(),
+            "passport": (getattr(client, "passport", None) or "").lower(),
+        }
+        for token in cls.tokens(query):
+            if not any(
+                values[expression].startswith(token)
+                if kind == "prefix"
+                else token in values[expression]
+                for expression, kind, _ in SEARCH_FIELDS
+            ):
+                return False
+        return True
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        offset: int = 0,
+        extra: Tuple[str, tuple] = ("", ()),
+    ) -> List[ClientShort]:
+        """Страница найденных клиентов: сначала наиболее релевантные.
+        extra - дополнительное SQL-условие (например, из фильтров декоратора)."""
+        builder = self._query(query, extra)
+        if self.tokens(query):
+            # без слов ранг - константа "0", а ORDER BY 0 - номер столбца
+            rank_sql, rank_params = self.rank(query)
+            builder.order_by(rank_sql, descending=True, params=rank_params)
+        builder.order_by("lower(surname)").order_by("id")
+        return self._db_repo.find_short(builder.paginate(limit, offset))
+
+    def count(self, query: str, extra: Tuple[str, tuple] = ("", ())) -> int:
+        """Количество найденных клиентов."""
+        return self._db_repo.count_where(self._query(query, extra))
+
+    def _query(self, query: str, extra: Tuple[str, tuple]) -> QueryBuilder:
+        """Запрос клиентов, подходящих под строку поиска и условие extra."""
+        builder = self._db_repo.new_query()
+        for condition, params in (self.condition(query), extra):
+            builder.where(condition, *params)
+        return builder
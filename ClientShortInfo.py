@@ -7,6 +7,9 @@ import re
 class ClientShort:
     """Класс для хранения краткой информации о клиенте."""
 
+    # без __dict__ у каждого экземпляра: списки клиентов занимают меньше памяти
+    __slots__ = ("_id", "_surname", "_name", "_patronymic", "_phone")
+
     def __init__(self, *args, **kwargs):
         """Инициализирует клиента из различных источников."""
         if kwargs.get("from_string"):
@@ -61,6 +64,15 @@ class ClientShort:
             self.validate_fio(patronymic, "Отчество") if patronymic else ""
         )
 
+    @classmethod
+    def from_row(cls, row):
+        """Создает клиента из строки БД в порядке ClientRepDB.SHORT_COLUMNS
+        без валидации: данные уже проверены при записи."""
+        client = cls.__new__(cls)
+        client._id, client._surname, client._name, patronymic, client._phone = row
+        client._patronymic = patronymic or ""
+        return client
+
     @staticmethod
     def validate_required(value, field_name: str):
         """Проверяет что значение не пустое."""
@@ -0,0 +1,147 @@
+"""Потоковая загрузка клиентов из текстового файла (clients.txt) в базу данных.
+
+Запуск: python ClientTxtLoader.py путь_к_файлу [--workers N]
+Формат строки - как у Client(line, from_string=True):
+id, фамилия, имя, отчество, телефон, паспорт, email, комментарий
+"""
+
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ClientBase import Client
+from ClientRepDB import ClientRepDB
+from ClientRepository import CLIENT_FIELDS
+
+TXT_LOAD_CONFIG = {  # константа с настройками загрузки клиентов из txt
+    "batch_size": 5000,  # клиентов в одном COPY (ClientRepDB.copy_clients)
+    "chunk_lines": 20000,  # строк в одной порции разбора процессом
+    "workers": 0,  # процессов разбора (0 - разбор в текущем процессе)
+    "max_errors": 1000,  # ошибок строк в отчете (остальные только считаются)
+}
+
+
+def _parse_chunk(
+    chunk: List[Tuple[int, str]]
+) -> Tuple[List[tuple], List[Dict[str, Any]]]:
+    """Разбирает порцию строк (номер, текст) в процессе-обработчике.
+    Возвращает значения клиентов в порядке CLIENT_FIELDS и ошибки строк."""
+    rows, errors = [], []
+    for line_no, line in chunk:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            client = Client(line, from_string=True)
+        except (ValueError, TypeError) as exc:
+            errors.append({"row": line_no, "message": str(exc)})
+            continue
+        rows.append(tuple(getattr(client, field) for field in CLIENT_FIELDS))
+    return rows, errors
+
+
+class ClientTxtLoader:
+    """Загрузчик клиентов из текстового файла в ClientRepDB.
+
+    Файл читается потоком, клиенты загружаются ClientRepDB.copy_clients
+    пакетами по batch_size (дубликаты пропускаются). При workers > 0 строки
+    разбираются порциями в нескольких процессах; порядок клиентов сохраняется,
+    а в работе одновременно не больше 2 * workers порций."""
+
+    def __init__(
+        self,
+        db_repo: Optional[ClientRepDB] = None,
+        workers: Optional[int] = None,
+        chunk_lines: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        self._db_repo = db_repo
+        self._workers = TXT_LOAD_CONFIG["workers"] if workers is None else workers
+        self._chunk_lines = chunk_lines or TXT_LOAD_CONFIG["chunk_lines"]
+        self._batch_size = batch_size or TXT_LOAD_CONFIG["batch_size"]
+
+    def iter_clients(
+        self, path: str, errors: Optional[List[Dict[str, Any]]] = None
+    ) -> Iterator[Client]:
+        """Клиенты файла по порядку; ошибки строк добавляются в errors."""
+        if errors is None:
+            errors = []
+        if self._workers <= 0:
+            yield from Client.iter_clients_from_txt(path, errors)
+            return
+        try:
+            f = open(path, "r", encoding="utf-8")
+        except FileNotFoundError:
+            errors.append({"row": 0, "message": f"Файл {path} не найден!"})
+            return
+        with f, ProcessPoolExecutor(max_workers=self._workers) as pool:
+            lines = enumerate(f, 1)
+            pending = deque()
+            while True:
+                chunk = list(islice(lines, self._chunk_lines))
+                if chunk:
+                    pending.append(pool.submit(_parse_chunk, chunk))
+                if not pending:
+                    break
+                if chunk and len(pending) < 2 * self._workers:
+                    continue
+                rows, chunk_errors = pending.popleft().result()
+                errors.extend(chunk_errors)
+                # строки уже проверены обработчиком
+                for row in rows:
+                    yield Client.from_row(row)
+
+    def load(self, path: str) -> Dict[str, Any]:
+        """Загружает клиентов файла в базу данных.
+
+        Отчет: total - непустых строк, imported - добавлено, duplicates -
+        пропущено как уже существующие, failed - ошибочных строк, errors -
+        первые TXT_LOAD_CONFIG["max_errors"] ошибок {"row", "message"}."""
+        db_repo = self._db_repo or ClientRepDB()
+        report = {"total": 0, "imported": 0, "duplicates": 0, "failed": 0, "errors": []}
+        errors: List[Dict[str, Any]] = []
+
+        def flush_errors() -> None:
+            # строка 0 - ошибка файла целиком, а не его строки
+            report["total"] += sum(1 for error in errors if error["row"])
+            report["failed"] += len(errors)
+            room = TXT_LOAD_CONFIG["max_errors"] - len(report["errors"])
+            report["errors"].extend(errors[: max(room, 0)])
+            errors.clear()
+
+        clients = self.iter_clients(path, errors)
+        while True:
+            batch = [
+                {field: getattr(c, field) for field in CLIENT_FIELDS}
+                for c in islice(clients, self._batch_size)
+            ]
+            flush_errors()
+            if not batch:
+                break
+            inserted = db_repo.copy_clients(batch)
+            report["total"] += len(batch)
+            report["imported"] += inserted
+            report["duplicates"] += len(batch) - inserted
+        return report
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        sys.exit(2)
+    workers = None
+    if "--workers" in args:
+        i = args.index("--workers")
+        workers = int(args[i + 1])
+        del args[i : i + 2]
+    result = ClientTxtLoader(workers=workers).load(args[0])
+    print(
+        f"Строк: {result['total']}, добавлено: {result['imported']}, "
+        f"дубликатов: {result['duplicates']}, ошибок: {result['failed']}"
+    )
+    for error in result["errors"]:
+        print(f"  строка {error['row']}: {error['message']}")
+    sys.exit(1 if result["failed"] else 0)
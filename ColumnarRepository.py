@@ -0,0 +1,72 @@
+"""Базовый репозиторий поверх столбцового снимка (ColumnarSnapshot)."""
+
+import os
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+from ColumnarSnapshot import ColumnarSnapshot
+
+
+class ColumnarRepository:
+    """Набор записей одной сущности в файле снимка: чтение целиком, запись
+    целиком и поиск по столбцу без разбора остальных строк.
+
+    В подклассе задаются MODEL (класс модели с from_row) и SCHEMA - столбцы
+    (имя, тип) в порядке строки модели и COLUMNS репозитория БД.
+    Снимок открывается при первом чтении и остается открытым до close() или
+    перезаписи, поэтому таблицы строк разбираются один раз."""
+
+    MODEL: Any = None
+    SCHEMA: Tuple[Tuple[str, str], ...] = ()
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._snapshot: Optional[ColumnarSnapshot] = None
+
+    def _open(self) -> Optional[ColumnarSnapshot]:
+        """Открытый снимок (None, если файла нет)."""
+        if self._snapshot is None and os.path.exists(self.path):
+            self._snapshot = ColumnarSnapshot(self.path)
+        return self._snapshot
+
+    def close(self) -> None:
+        """Закрывает снимок (он откроется снова при следующем чтении)."""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def __enter__(self) -> "ColumnarRepository":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @classmethod
+    def to_row(cls, item: Any) -> tuple:
+        """Строка снимка из объекта модели."""
+        return tuple(getattr(item, name) for name, _ in cls.SCHEMA)
+
+    def read_all(self) -> List[Any]:
+        """Все записи снимка (пустой список, если файла нет)."""
+        snapshot = self._open()
+        if snapshot is None:
+            return []
+        return [self.MODEL.from_row(row) for row in snapshot.rows()]
+
+    def find_by(self, name: str, value: Any) -> List[Any]:
+        """Записи, у которых столбец name равен value."""
+        snapshot = self._open()
+        if snapshot is None:
+            return []
+        positions = snapshot.where(name, value)
+        return [self.MODEL.from_row(row) for row in snapshot.rows(positions)]
+
+    def write_all(self, items: Iterable[Any]) -> int:
+        """Перезаписывает снимок объектами модели. Возвращает их количество."""
+        return self.write_rows(self.to_row(item) for item in items)
+
+    def write_rows(self, rows: Iterable[Sequence[Any]]) -> int:
+        """Перезаписывает снимок строками в порядке SCHEMA (например, из
+        export_rows() репозитория БД). Возвращает количество строк."""
+        count = ColumnarSnapshot.write(self.path, self.SCHEMA, rows)
+        self.close()  # следующее чтение откроет новый файл
+        return count
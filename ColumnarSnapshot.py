@@ -0,0 +1,303 @@
+"""Бинарный столбцовый снимок набора записей (клиентов, номеров, бронирований).
+
+Формат файла (все числа - little-endian):
+    b"CSNP", версия (uint32), длина заголовка (uint64), заголовок JSON,
+    затем сегменты данных, каждый выровнен на 8 байт.
+Заголовок описывает количество строк и столбцы: имя, тип и сегменты
+(смещение от начала данных и длина в байтах).
+Типы столбцов и их хранение:
+    int      - int64 на строку;
+    bool     - int8 на строку;
+    decimal  - int64, значение * 100 (денежные суммы DECIMAL(10, 2));
+    date     - int32, date.toordinal();
+    datetime - int64, микросекунды от 0001-01-01 (NULL - минимум int64);
+    str      - таблица строк (смещения int64 + UTF-8) и коды int32 на строку
+               (индекс в таблице, NULL - -1): повторяющиеся значения
+               (фамилии, категории, статусы) хранятся один раз.
+Файл отображается в память, числовые столбцы читаются через memoryview без
+копирования, поиск по столбцу - поиском байтового образца в отображении.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+MAGIC = b"CSNP"
+VERSION = 1
+_PREAMBLE = struct.Struct("<4sIQ")
+_NULL_DATETIME = -(2**63)
+_EPOCH = datetime(1, 1, 1)
+
+# тип столбца -> код array/memoryview
+_CODES = {
+    "int": "q",
+    "bool": "b",
+    "decimal": "q",
+    "date": "i",
+    "datetime": "q",
+    "str": "i",
+}
+
+
+def _encode(kind: str, value: Any) -> int:
+    """Значение столбца в хранимое целое (кроме строк)."""
+    if kind == "int":
+        return int(value)
+    if kind == "bool":
+        return 1 if value else 0
+    if kind == "decimal":
+        cents = Decimal(value) * 100
+        if cents != cents.to_integral_value():
+            raise ValueError(f"Сумма {value}: больше двух знаков после запятой!")
+        return int(cents)
+    if kind == "date":
+        return value.toordinal()
+    if kind == "datetime":
+        if value is None:
+            return _NULL_DATETIME
+        return (value - _EPOCH) // timedelta(microseconds=1)
+    raise ValueError(f"Неизвестный тип столбца: {kind}")
+
+
+def _decode(kind: str, values: List[int]) -> List[Any]:
+    """Хранимые целые в значения столбца."""
+    if kind == "int":
+        return values
+    if kind == "bool":
+        return [bool(v) for v in values]
+    if kind == "decimal":
+        return [Decimal(v).scaleb(-2) for v in values]
+    if kind == "date":
+        return [date.fromordinal(v) for v in values]
+    if kind == "datetime":
+        return [
+            None if v == _NULL_DATETIME else _EPOCH + timedelta(microseconds=v)
+            for v in values
+        ]
+    raise ValueError(f"Неизвестный тип столбца: {kind}")
+
+
+class ColumnarSnapshot:
+    """Снимок, открытый для чтения: столбцы поверх отображенного в память файла.
+
+    schema - последовательность (имя столбца, тип) в порядке строк."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, header_len = _PREAMBLE.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path}: не снимок CSNP версии {VERSION}")
+        header = json.loads(self._mm[_PREAMBLE.size : _PREAMBLE.size + header_len])
+        self._data_start = _PREAMBLE.size + header_len
+        self.rows_count: int = header["rows"]
+        self.schema: Tuple[Tuple[str, str], ...] = tuple(
+            (c["name"], c["type"]) for c in header["columns"]
+        )
+        self._columns: Dict[str, Dict[str, Any]] = {
+            c["name"]: c for c in header["columns"]
+        }
+        self._view = memoryview(self._mm)
+        self._strings: Dict[str, List[str]] = {}  # таблицы строк (по запросу)
+        self._string_codes: Dict[str, Dict[str, int]] = {}
+        self._native = sys.byteorder == "little"
+
+    def close(self) -> None:
+        """Освобождает отображение файла. Последовательности, полученные из
+        raw(), к этому моменту должны быть освобождены."""
+        self._view.release()
+        self._mm.close()
+
+    def __enter__(self) -> "ColumnarSnapshot":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.rows_count
+
+    def _segment(self, name: str, segment: str, code: str) -> Sequence[int]:
+        """Сегмент столбца как последовательность целых (без копирования)."""
+        offset, length = self._columns[name][segment]
+        offset += self._data_start
+        view = self._view[offset : offset + length]
+        if self._native:
+            return view.cast(code)
+        values = array(code, view.tobytes())
+        values.byteswap()
+        return values
+
+    def string_table(self, name: str) -> List[str]:
+        """Таблица различных значений строкового столбца."""
+        table = self._strings.get(name)
+        if table is None:
+            offsets = self._segment(name, "offsets", "q")
+            start = self._data_start + self._columns[name]["blob"][0]
+            blob = self._mm[start : start + offsets[-1]] if len(offsets) else b""
+            table = [
+                blob[offsets[i] : offsets[i + 1]].decode("utf-8")
+                for i in range(len(offsets) - 1)
+            ]
+            self._strings[name] = table
+        return table
+
+    def string_at(self, name: str, code: int) -> str:
+        """Одно значение таблицы строк по коду - без разбора всей таблицы."""
+        table = self._strings.get(name)
+        if table is not None:
+            return table[code]
+        offsets = self._segment(name, "offsets", "q")
+        try:
+            start, end = offsets[code], offsets[code + 1]
+        finally:
+            if isinstance(offsets, memoryview):
+                offsets.release()
+        base = self._data_start + self._columns[name]["blob"][0]
+        return self._mm[base + start : base + end].decode("utf-8")
+
+    def raw(self, name: str) -> Sequence[int]:
+        """Хранимые целые столбца (для строк - коды таблицы строк)."""
+        kind = self._columns[name]["type"]
+        segment = "codes" if kind == "str" else "values"
+        return self._segment(name, segment, _CODES[kind])
+
+    def column(self, name: str, positions: Optional[Sequence[int]] = None) -> List[Any]:
+        """Значения столбца: все или в указанных позициях."""
+        kind = self._columns[name]["type"]
+        raw = self.raw(name)
+        try:
+            values = raw.tolist() if positions is None else [raw[i] for i in positions]
+        finally:
+            if isinstance(raw, memoryview):
+                raw.release()  # иначе отображение файла нельзя закрыть
+        if kind != "str":
+            return _decode(kind, values)
+        entries = self._columns[name]["offsets"][1] // 8 - 1
+        if name not in self._strings and len(values) * 16 < entries:
+            # немного строк из большой таблицы: вся таблица не нужна
+            return [self.string_at(name, v) if v >= 0 else None for v in values]
+        table = self.string_table(name)
+        return [table[v] if v >= 0 else None for v in values]
+
+    def rows(self, positions: Optional[Sequence[int]] = None) -> List[tuple]:
+        """Строки снимка (все или в указанных позициях) в порядке schema."""
+        return list(zip(*(self.column(name, positions) for name, _ in self.schema)))
+
+    def where(self, name: str, value: Any) -> List[int]:
+        """Позиции строк, где столбец равен value.
+
+        Значение переводится в хранимое представление (для строк - код в
+        таблице строк), и его байты ищутся прямо в отображении файла."""
+        kind = self._columns[name]["type"]
+        if kind == "str":
+            if value is None:
+                stored = -1
+            else:
+                codes = self._string_codes.get(name)
+                if codes is None:
+                    table = self.string_table(name)
+                    codes = {v: i for i, v in enumerate(table)}
+                    self._string_codes[name] = codes
+                stored = codes.get(value)
+                if stored is None:
+                    return []
+            offset, length = self._columns[name]["codes"]
+        else:
+            stored = _encode(kind, value)
+            offset, length = self._columns[name]["values"]
+        offset += self._data_start
+        code = _CODES[kind]
+        pattern = array(code, [stored])
+        if not self._native:
+            pattern.byteswap()
+        needle = pattern.tobytes()
+        width = len(needle)
+        end = offset + length
+        positions = []
+        found = self._mm.find(needle, offset, end)
+        while found != -1:
+            if (found - offset) % width == 0:
+                positions.append((found - offset) // width)
+                found = self._mm.find(needle, found + width, end)
+            else:  # образец на границе соседних значений
+                found = self._mm.find(needle, found + 1, end)
+        return positions
+
+    @staticmethod
+    def write(
+        path: str, schema: Sequence[Tuple[str, str]], rows: Iterable[Sequence[Any]]
+    ) -> int:
+        """Атомарно записывает строки в снимок: временный файл, fsync и
+        os.replace. Возвращает количество строк."""
+        columns: List[array] = [array(_CODES[kind]) for _, kind in schema]
+        tables: List[Dict[str, int]] = [{} for _ in schema]
+        count = 0
+        for row in rows:
+            for i, (_, kind) in enumerate(schema):
+                value = row[i]
+                if kind == "str":
+                    if value is None:
+                        columns[i].append(-1)
+                    else:
+                        table = tables[i]
+                        code = table.get(value)
+                        if code is None:
+                            code = table[value] = len(table)
+                        columns[i].append(code)
+                else:
+                    columns[i].append(_encode(kind, value))
+            count += 1
+
+        segments: List[bytes] = []
+        header_columns = []
+        position = 0
+
+        def add_segment(data: bytes) -> List[int]:
+            nonlocal position
+            padding = -len(data) % 8
+            segments.append(data + b"\0" * padding)
+            segment = [position, len(data)]
+            position += len(data) + padding
+            return segment
+
+        for i, (name, kind) in enumerate(schema):
+            values = columns[i]
+            if sys.byteorder != "little":
+                values.byteswap()
+            entry = {"name": name, "type": kind}
+            if kind == "str":
+                encoded = [s.encode("utf-8") for s in tables[i]]
+                offsets = array("q", [0])
+                for item in encoded:
+                    offsets.append(offsets[-1] + len(item))
+                if sys.byteorder != "little":
+                    offsets.byteswap()
+                entry["offsets"] = add_segment(offsets.tobytes())
+                entry["blob"] = add_segment(b"".join(encoded))
+                entry["codes"] = add_segment(values.tobytes())
+            else:
+                entry["values"] = add_segment(values.tobytes())
+            header_columns.append(entry)
+
+        header = json.dumps({"rows": count, "columns": header_columns})
+        header_bytes = header.encode("utf-8")
+        header_bytes += b" " * (-(_PREAMBLE.size + len(header_bytes)) % 8)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for segment in segments:
+                f.write(segment)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return count
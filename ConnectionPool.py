@@ -0,0 +1,210 @@
+"""Потокобезопасный пул соединений с базой данных PostgreSQL."""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from psycopg2 import extensions
+
+
+class PoolExhaustedError(Exception):
+    """Все соединения пула заняты и не освободились за время ожидания."""
+
+
+class _PooledConnection:
+    """Служебная запись о соединении, которым владеет пул."""
+
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn) -> None:
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class ConnectionPool:
+    """Ограниченный пул соединений с проверкой здоровья и пересозданием старых соединений."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        min_size: int = 1,
+        max_size: int = 10,
+        max_lifetime: float = 1800.0,
+        health_check_interval: float = 30.0,
+        checkout_timeout: float = 10.0,
+    ) -> None:
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Некорректные размеры пула соединений!")
+        self._connect = connect  # фабрика новых соединений
+        self._min_size = min_size
+        self._max_size = max_size
+        self._max_lifetime = max_lifetime  # после этого срока соединение пересоздается
+        self._health_check_interval = health_check_interval
+        self._checkout_timeout = checkout_timeout
+
+        self._lock = threading.Condition()
+        self._idle: deque = deque()  # свободные соединения (LIFO - самые "теплые" первыми)
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._size = 0  # общее количество открытых соединений
+        self._closed = False
+
+        self._stats = {
+            "checkouts": 0,
+            "waits": 0,
+            "exhausted": 0,
+            "created": 0,
+            "recycled": 0,
+            "failed_health_checks": 0,
+            "discarded": 0,
+            "peak_in_use": 0,
+        }
+
+        for _ in range(min_size):
+            self._idle.append(self._open())
+
+    def _open(self) -> _PooledConnection:
+        """Открывает новое соединение (вызывается при зарезервированном месте в пуле)."""
+        conn = self._connect()
+        self._size += 1
+        self._stats["created"] += 1
+        return _PooledConnection(conn)
+
+    def _close_quietly(self, item: _PooledConnection) -> None:
+        """Закрывает соединение, игнорируя ошибки сети."""
+        try:
+            if not item.conn.closed:
+                item.conn.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, item: _PooledConnection) -> bool:
+        """Проверяет соединение перед выдачей: закрыто, устарело или не отвечает."""
+        if item.conn.closed:
+            return False
+        now = time.monotonic()
+        if self._max_lifetime and now - item.created_at > self._max_lifetime:
+            self._stats["recycled"] += 1
+            return False
+        if now - item.last_used > self._health_check_interval:
+            try:
+                with item.conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                item.conn.rollback()
+            except Exception:
+                self._stats["failed_health_checks"] += 1
+                return False
+        return True
+
+    def getconn(self):
+        """Выдает соединение из пула, при необходимости ожидая освобождения."""
+        deadline = time.monotonic() + self._checkout_timeout
+        with self._lock:
+            waited = False
+            while True:
+                if self._closed:
+                    raise PoolExhaustedError("Пул соединений закрыт!")
+
+                while self._idle:
+                    item = self._idle.pop()
+                    if self._is_healthy(item):
+                        return self._checkout(item)
+                    self._close_quietly(item)
+                    self._size -= 1
+
+                if self._size < self._max_size:
+                    self._size += 1  # резервируем место до выхода из-под блокировки
+                    break
+
+                if not waited:
+                    waited = True
+                    self._stats["waits"] += 1
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats["exhausted"] += 1
+                    raise PoolExhaustedError(
+                        f"Нет свободных соединений (максимум {self._max_size})!"
+                    )
+                self._lock.wait(remaining)
+
+        # соединение открывается вне блокировки, чтобы не задерживать другие потоки
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._lock:
+                self._size -= 1
+                self._lock.notify()
+            raise
+        with self._lock:
+            self._stats["created"] += 1
+            return self._checkout(_PooledConnection(conn))
+
+    def _checkout(self, item: _PooledConnection):
+        """Отмечает соединение как занятое (вызывается под блокировкой)."""
+        self._in_use[id(item.conn)] = item
+        self._stats["checkouts"] += 1
+        self._stats["peak_in_use"] = max(self._stats["peak_in_use"], len(self._in_use))
+        return item.conn
+
+    def putconn(self, conn, discard: bool = False) -> None:
+        """Возвращает соединение в пул или закрывает его, если оно испорчено."""
+        if not discard and not conn.closed:
+            try:
+                # незавершенная транзакция не должна попасть к следующему владельцу
+                if conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        with self._lock:
+            item = self._in_use.pop(id(conn), None)
+            if item is None:
+                return
+            if discard or conn.closed or self._closed:
+                self._close_quietly(item)
+                self._size -= 1
+                self._stats["discarded"] += 1
+            else:
+                item.last_used = time.monotonic()
+                self._idle.append(item)
+            self._lock.notify()
+
+    @contextmanager
+    def connection(self):
+        """Контекстный менеджер: выдает соединение и гарантированно возвращает его."""
+        conn = self.getconn()
+        discard = False
+        try:
+            yield conn
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                discard = True
+            raise
+        finally:
+            self.putconn(conn, discard=discard or conn.closed)
+
+    def closeall(self) -> None:
+        """Закрывает все свободные соединения и запрещает выдачу новых."""
+        with self._lock:
+            self._closed = True
+            while self._idle:
+                self._close_quietly(self._idle.pop())
+                self._size -= 1
+            self._lock.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """Возвращает метрики пула, включая число отказов из-за исчерпания."""
+        with self._lock:
+            return {
+                **self._stats,
+                "size": self._size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "min_size": self._min_size,
+                "max_size": self._max_size,
+            }
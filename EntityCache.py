@@ -0,0 +1,97 @@
+"""LRU-кэш сущностей по ID со сроком жизни записей."""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+CACHE_CONFIG = {  # константа с настройками кэшей сущностей
+    "max_size": 1024,  # записей в кэше одной сущности
+    "ttl": 60.0,  # секунды жизни записи
+}
+
+
+class EntityCache:
+    """Потокобезопасный LRU+TTL кэш "ID -> объект модели" для чтения через кэш.
+
+    Объекты копируются при записи и чтении: изменение полученного объекта
+    не затрагивает кэш. Отсутствующие записи (None) не кэшируются.
+    """
+
+    _caches: Dict[str, "EntityCache"] = {}
+    _caches_lock = threading.Lock()
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0) -> None:
+        if max_size < 1 or ttl <= 0:
+            raise ValueError("Некорректные параметры кэша!")
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (срок, объект)
+        # номер поколения: загрузка, начатая до инвалидации, не попадает в кэш
+        self._generation = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+    @classmethod
+    def named(cls, name: str) -> "EntityCache":
+        """Общий для процесса кэш сущности (например, "clients")."""
+        cache = cls._caches.get(name)
+        if cache is None:
+            with cls._caches_lock:
+                cache = cls._caches.get(name)
+                if cache is None:
+                    cache = cls._caches[name] = cls(**CACHE_CONFIG)
+        return cache
+
+    @classmethod
+    def all_stats(cls) -> Dict[str, Dict[str, int]]:
+        """Метрики всех общих кэшей."""
+        with cls._caches_lock:
+            caches = dict(cls._caches)
+        return {name: cache.stats() for name, cache in caches.items()}
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Optional[Any]:
+        """Возвращает объект из кэша или загружает его через loader и запоминает."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return copy.copy(entry[1])
+            if entry is not None:
+                del self._entries[key]  # запись устарела
+            self._stats["misses"] += 1
+            generation = self._generation
+
+        value = loader()  # загрузка вне блокировки
+
+        if value is not None:
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[key] = (time.monotonic() + self._ttl, copy.copy(value))
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self._max_size:
+                        self._entries.popitem(last=False)
+                        self._stats["evictions"] += 1
+        return value
+
+    def invalidate(self, key: Hashable) -> None:
+        """Удаляет запись (вызывается после изменения или удаления сущности)."""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+            self._stats["invalidations"] += 1
+
+    def clear(self) -> None:
+        """Очищает кэш (например, после каскадного удаления)."""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Счетчики попаданий и промахов, размер кэша."""
+        with self._lock:
+            return {**self._stats, "size": len(self._entries), "max_size": self._max_size}
@@ -0,0 +1,333 @@
+"""Версионные миграции схемы базы данных: таблицы, индексы и ограничения."""
+
+from typing import Dict, List, Optional, Tuple
+
+from ClientRepDB import CLIENT_IDENTITY_SQL, DatabaseConnection
+
+# Одинаковые по Client.equals клиенты не допускаются. На индекс опираются
+# проверка дубликатов и ON CONFLICT в ClientRepDB.add_clients/copy_clients;
+# если дубликаты уже есть, миграция прерывается со списком первых из них.
+CLIENTS_IDENTITY_INDEX = f"""
+    DO $$
+    DECLARE
+        duplicates TEXT;
+    BEGIN
+        IF to_regclass('idx_clients_identity') IS NULL THEN
+            SELECT string_agg(ids, '; ')
+              INTO duplicates
+              FROM (SELECT string_agg(id::text, ', ' ORDER BY id) AS ids
+                      FROM clients
+                     GROUP BY ({CLIENT_IDENTITY_SQL})
+                    HAVING count(*) > 1
+                     ORDER BY min(id)
+                     LIMIT 20) AS groups;
+            IF duplicates IS NOT NULL THEN
+                RAISE EXCEPTION 'idx_clients_identity: клиенты-дубликаты %',
+                    duplicates
+                    USING HINT = 'Удалите или исправьте их и повторите миграцию.';
+            END IF;
+            CREATE UNIQUE INDEX idx_clients_identity
+                ON clients (({CLIENT_IDENTITY_SQL}));
+        END IF;
+    END
+    $$;
+"""
+
+# Активные бронирования одного номера не пересекаются по датам
+# [check_in, check_out). GiST-индекс ограничения используется
+# AvailabilityEngine для проверки конфликта одним обращением.
+# int4range(room_id) вместо room_id - чтобы не требовать btree_gist.
+# Если пересечения уже есть, миграция прерывается со списком первых из них:
+# без ограничения add_booking, update_booking и импорт не защищены от гонок.
+BOOKINGS_NO_OVERLAP = """
+    DO $$
+    DECLARE
+        conflicts TEXT;
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM pg_constraint
+                       WHERE conname = 'bookings_no_overlap') THEN
+            SELECT string_agg(
+                       format('%s и %s (номер %s)', a_id, b_id, room_id), ', ')
+              INTO conflicts
+              FROM (SELECT a.id AS a_id, b.id AS b_id, a.room_id
+                      FROM bookings a
+                      JOIN bookings b
+                        ON b.room_id = a.room_id AND b.id > a.id
+                       AND daterange(b.check_in, b.check_out, '[)')
+                           && daterange(a.check_in, a.check_out, '[)')
+                     WHERE a.status <> 'cancelled' AND b.status <> 'cancelled'
+                     ORDER BY a.id, b.id
+                     LIMIT 20) AS pairs;
+            IF conflicts IS NOT NULL THEN
+                RAISE EXCEPTION 'bookings_no_overlap: пересекаются бронирования %',
+                    conflicts
+                    USING HINT = 'Отмените или исправьте их и повторите миграцию.';
+            END IF;
+            ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap
+                EXCLUDE USING gist (
+                    int4range(room_id, room_id, '[]') WITH =,
+                    daterange(check_in, check_out, '[)') WITH &&
+                ) WHERE (status <> 'cancelled');
+        END IF;
+    END
+    $$;
+"""
+
+# Исходная схема. Операторы идемпотентны: базы, созданные до появления
+# schema_migrations, проходят эту миграцию без изменений.
+INITIAL_SCHEMA: List[str] = [
+    """
+    CREATE TABLE IF NOT EXISTS clients (
+        id SERIAL PRIMARY KEY,
+        surname VARCHAR(100) NOT NULL,
+        name VARCHAR(100) NOT NULL,
+        patronymic VARCHAR(100),
+        phone VARCHAR(20) NOT NULL,
+        passport VARCHAR(20),
+        email VARCHAR(255),
+        comment TEXT
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS rooms (
+        id SERIAL PRIMARY KEY,
+        room_number VARCHAR ( 10 ) NOT NULL UNIQUE,
+        capacity INTEGER NOT NULL CHECK ( capacity > 0 AND capacity <= 10),
+        is_available BOOLEAN DEFAULT TRUE,
+        category VARCHAR( 20) NOT NULL,
+        price_per_night DECIMAL (10, 2 ) NOT NULL CHECK ( price_per_night > 0 ),
+        description TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS bookings (
+        id SERIAL PRIMARY KEY,
+        client_id INTEGER NOT NULL,
+        room_id INTEGER NOT NULL,
+        check_in DATE NOT NULL,
+        check_out DATE NOT NULL,
+        total_sum DECIMAL ( 10, 2 ) NOT NULL CHECK (total_sum >= 0),
+        status VARCHAR (20) DEFAULT 'confirmed',
+        notes TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT fk_client FOREIGN KEY (client_id)
+            REFERENCES clients ( id ) ON DELETE CASCADE,
+        CONSTRAINT fk_room FOREIGN KEY ( room_id )
+            REFERENCES rooms (id) ON DELETE CASCADE,
+        CONSTRAINT check_dates CHECK ( check_out > check_in ),
+        CONSTRAINT max_duration CHECK (( check_out -check_in ) <= 30));
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_rooms_available
+        ON rooms(is_available);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_bookings_dates
+        ON bookings(check_in, check_out);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_bookings_status
+        ON bookings(status);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_bookings_created_at
+        ON bookings(created_at DESC, id DESC);
+    """,
+    CLIENTS_IDENTITY_INDEX,
+    BOOKINGS_NO_OVERLAP,
+]
+
+
+# Индексы под запросы репозиториев (проверяются скриптом QueryPlanCheck)
+QUERY_INDEXES: List[str] = [
+    # get_by_client_id, фильтр по клиенту и каскадное удаление клиента
+    """
+    CREATE INDEX IF NOT EXISTS idx_bookings_client_check_in
+        ON bookings(client_id, check_in DESC);
+    """,
+    # get_by_room_id, фильтр по номеру и каскадное удаление номера
+    """
+    CREATE INDEX IF NOT EXISTS idx_bookings_room_check_in
+        ON bookings(room_id, check_in DESC);
+    """,
+    # get_active_bookings: подтвержденные бронирования в порядке заезда
+    """
+    CREATE INDEX IF NOT EXISTS idx_bookings_confirmed_check_in
+        ON bookings(check_in) WHERE status = 'confirmed';
+    """,
+    # get_bookings_for_period: пересечение закрытых интервалов дат
+    """
+    CREATE INDEX IF NOT EXISTS idx_bookings_stay
+        ON bookings USING gist (daterange(check_in, check_out, '[]'));
+    """,
+    # сортировка и поиск по префиксу фамилии в списке клиентов
+    """
+    CREATE INDEX IF NOT EXISTS idx_clients_lower_surname
+        ON clients(lower(surname), id);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_clients_lower_name
+        ON clients(lower(name), id);
+    """,
+    # фильтр и сортировка номеров по категории и цене
+    """
+    CREATE INDEX IF NOT EXISTS idx_rooms_category
+        ON rooms(category, room_number);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_rooms_price
+        ON rooms(price_per_night, id);
+    """,
+]
+
+# Префиксные индексы подсказок (/api/clients/suggest, /api/rooms/suggest).
+# text_pattern_ops позволяет искать LIKE 'префикс%' по индексу при любой
+# collation базы данных, а не только при "C".
+SUGGEST_INDEXES: List[str] = [
+    """
+    CREATE INDEX IF NOT EXISTS idx_clients_surname_prefix
+        ON clients(lower(surname) text_pattern_ops);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_clients_phone_prefix
+        ON clients(phone text_pattern_ops);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_rooms_number_prefix
+        ON rooms(room_number text_pattern_ops);
+    """,
+]
+
+# Индексы поиска клиентов (ClientSearch) по началу ФИО - text_pattern_ops.
+SEARCH_INDEXES: List[str] = [
+    """
+    CREATE INDEX IF NOT EXISTS idx_clients_name_prefix
+        ON clients(lower(name) text_pattern_ops);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_clients_patronymic_prefix
+        ON clients(lower(patronymic) text_pattern_ops);
+    """,
+]
+
+# Индексы поиска по подстроке телефона и паспорта - GIN pg_trgm. Расширение
+# есть не в каждой сборке PostgreSQL; без него поиск работает, но по
+# подстроке - сканированием.
+TRIGRAM_INDEXES: List[str] = [
+    """
+    CREATE EXTENSION IF NOT EXISTS pg_trgm;
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_clients_phone_trgm
+        ON clients USING gin (phone gin_trgm_ops);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS idx_clients_passport_trgm
+        ON clients USING gin (passport gin_trgm_ops);
+    """,
+]
+
+# (версия, описание, операторы). Новые миграции добавляются только в конец.
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "initial schema", INITIAL_SCHEMA),
+    (2, "indexes for repository queries", QUERY_INDEXES),
+    (3, "prefix indexes for typeahead", SUGGEST_INDEXES),
+    (4, "client search indexes", SEARCH_INDEXES),
+    # версии 5 и 6 были у удаленных миграций и могут быть записаны в базе
+    (7, "trigram indexes for client search", TRIGRAM_INDEXES),
+]
+
+# Миграции, требующие расширения PostgreSQL. Если его нет среди доступных,
+# миграция пропускается без записи и повторяется при следующем запуске.
+REQUIRED_EXTENSIONS: Dict[int, str] = {7: "pg_trgm"}
+
+# произвольный ключ advisory-блокировки: миграции не выполняются параллельно
+_MIGRATION_LOCK_KEY = 7_340_001
+
+
+def applied_versions(db: Optional[DatabaseConnection] = None) -> List[int]:
+    """Версии миграций, уже примененных к базе данных."""
+    db = db or DatabaseConnection()
+    if not _has_migrations_table(db):
+        return []
+    rows = db.execute_query("SELECT version FROM schema_migrations ORDER BY version")
+    return [r[0] for r in rows]
+
+
+def _has_migrations_table(db: DatabaseConnection) -> bool:
+    rows = db.execute_query("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    return bool(rows and rows[0][0])
+
+
+def pending_versions(db: Optional[DatabaseConnection] = None) -> List[int]:
+    """Версии миграций, еще не примененных к базе данных (например,
+    пропущенных из-за недоступного расширения)."""
+    applied = set(applied_versions(db))
+    return [version for version, _, _ in MIGRATIONS if version not in applied]
+
+
+def migrate(db: Optional[DatabaseConnection] = None) -> List[int]:
+    """Применяет недостающие миграции, каждую в своей транзакции.
+    Миграции без нужного расширения (REQUIRED_EXTENSIONS) пропускаются.
+    Возвращает версии, примененные при этом вызове."""
+    db = db or DatabaseConnection()
+    applied_now = []
+    with db.connection() as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(
+                """
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                """
+            )
+            conn.commit()
+
+            for version, name, statements in MIGRATIONS:
+                # блокировка держится до конца транзакции этой миграции
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", (_MIGRATION_LOCK_KEY,))
+                cursor.execute(
+                    "SELECT 1 FROM schema_migrations WHERE version = %s", (version,)
+                )
+                if cursor.fetchone():
+                    conn.rollback()
+                    continue
+                extension = REQUIRED_EXTENSIONS.get(version)
+                if extension:
+                    cursor.execute(
+                        "SELECT 1 FROM pg_available_extensions WHERE name = %s",
+                        (extension,),
+                    )
+                    if not cursor.fetchone():
+                        conn.rollback()
+                        continue
+                for statement in statements:
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                    (version, name),
+                )
+                conn.commit()
+                applied_now.append(version)
+    return applied_now
+
+
+if __name__ == "__main__":
+    versions = migrate()
+    pending = pending_versions()
+    if versions:
+        print(f"Применены миграции: {', '.join(map(str, versions))}")
+    elif not pending:
+        print("Схема базы данных актуальна")
+    if pending:
+        missing = ", ".join(
+            f"{version} ({REQUIRED_EXTENSIONS[version]})"
+            for version in pending
+            if version in REQUIRED_EXTENSIONS
+        )
+        print(f"Пропущены миграции без нужного расширения: {missing}")
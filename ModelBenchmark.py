@@ -0,0 +1,161 @@
+"""Замер памяти и скорости создания объектов моделей.
+
+Запуск: python ModelBenchmark.py [количество объектов]
+Для каждой модели сравниваются три варианта:
+  * "__dict__"   - прежняя раскладка (копия класса и его баз без __slots__)
+                   и валидирующий конструктор;
+  * "__slots__"  - текущий класс и валидирующий конструктор;
+  * "from_row"   - текущий класс и создание из доверенной строки БД.
+База данных не нужна: строки генерируются в памяти.
+"""
+
+import sys
+import time
+import tracemalloc
+import types
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Tuple
+
+from Booking import Booking
+from ClientBase import Client
+from ClientShortInfo import ClientShort
+from Room import Room
+
+DEFAULT_COUNT = 50_000
+
+
+def _rebind(value: Any, cls: type) -> Any:
+    """Копия функции (или обертки над ней), у которой ячейка __class__,
+    используемая super(), указывает на cls."""
+    if isinstance(value, (classmethod, staticmethod)):
+        return type(value)(_rebind(value.__func__, cls))
+    if isinstance(value, property):
+        accessors = (value.fget, value.fset, value.fdel)
+        return property(*(f and _rebind(f, cls) for f in accessors), value.__doc__)
+    if not isinstance(value, types.FunctionType):
+        return value
+    code = value.__code__
+    if "__class__" not in code.co_freevars:
+        return value
+    closure = tuple(
+        types.CellType(cls) if name == "__class__" else cell
+        for name, cell in zip(code.co_freevars, value.__closure__)
+    )
+    function = types.FunctionType(
+        code, value.__globals__, value.__name__, value.__defaults__, closure
+    )
+    function.__kwdefaults__ = value.__kwdefaults__
+    function.__doc__ = value.__doc__
+    return function
+
+
+@lru_cache(maxsize=None)
+def _legacy(cls: type) -> type:
+    """Копия класса и его баз без __slots__ - прежняя раскладка, где поля
+    хранятся в __dict__ экземпляра. Подкласс не годится: поля остались бы
+    в слотах родителя, а __dict__ - пустым."""
+    if cls is object:
+        return object
+    slots = set(vars(cls).get("__slots__", ()))
+    namespace = {
+        name: value
+        for name, value in vars(cls).items()
+        if name not in slots and name not in ("__slots__", "__dict__", "__weakref__")
+    }
+    legacy = type(
+        f"Legacy{cls.__name__}", tuple(_legacy(b) for b in cls.__bases__), namespace
+    )
+    for name, value in namespace.items():
+        rebound = _rebind(value, legacy)
+        if rebound is not value:
+            setattr(legacy, name, rebound)
+    return legacy
+
+
+def _rows(count: int) -> Dict[type, List[tuple]]:
+    """Строки в порядке столбцов репозиториев, как их возвращает psycopg2."""
+    created_at = datetime(2024, 1, 1, 12, 0)
+    check_in = date(2024, 1, 1)
+    return {
+        ClientShort: [
+            (i, "Иванов", "Иван", "Иванович", f"+7900{i:07d}") for i in range(count)
+        ],
+        Client: [
+            (
+                i,
+                "Иванов",
+                "Иван",
+                "Иванович",
+                f"+7900{i:07d}",
+                f"{i:010d}",
+                f"user{i}@example.com",
+                "",
+            )
+            for i in range(count)
+        ],
+        Room: [
+            (i, f"{i % 900 + 100}", 2, True, "Стандарт", Decimal("3500.00"), "")
+            for i in range(count)
+        ],
+        Booking: [
+            (
+                i,
+                i % 1000 + 1,
+                i % 90 + 1,
+                check_in + timedelta(days=i % 300),
+                check_in + timedelta(days=i % 300 + 3),
+                Decimal("10500.00"),
+                "confirmed",
+                "",
+                created_at,
+            )
+            for i in range(count)
+        ],
+    }
+
+
+def _validated(model: type, cls: type) -> Callable[[tuple], object]:
+    """Создание объекта класса cls (модель или ее копия) через валидирующий
+    конструктор."""
+    if model is Booking:
+        return lambda row: cls(*row[:8])
+    return lambda row: cls(*row)
+
+
+def _measure(
+    factory: Callable[[tuple], object], rows: List[tuple]
+) -> Tuple[float, float]:
+    """(байт на объект, объектов в секунду)."""
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    objects = [factory(row) for row in rows]
+    size = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+    del objects
+
+    started = time.perf_counter()
+    objects = [factory(row) for row in rows]
+    elapsed = time.perf_counter() - started
+    del objects
+    return size / len(rows), len(rows) / elapsed
+
+
+def run(count: int = DEFAULT_COUNT) -> None:
+    """Печатает таблицу результатов для всех моделей."""
+    print(f"Объектов на замер: {count}")
+    print(f"{'модель':12} {'вариант':10} {'байт/объект':>12} {'объектов/с':>12}")
+    for cls, rows in _rows(count).items():
+        variants = (
+            ("__dict__", _validated(cls, _legacy(cls))),
+            ("__slots__", _validated(cls, cls)),
+            ("from_row", cls.from_row),
+        )
+        for variant, factory in variants:
+            size, rate = _measure(factory, rows)
+            print(f"{cls.__name__:12} {variant:10} {size:12.0f} {rate:12.0f}")
+
+
+if __name__ == "__main__":
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT)
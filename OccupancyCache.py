@@ -0,0 +1,163 @@
+"""Кэш занятости номеров: битовые карты ночей на скользящем горизонте."""
+
+import threading
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from AvailabilityEngine import AvailabilityEngine
+from ClientRepDB import DatabaseConnection
+
+HORIZON_DAYS = 366  # сколько ночей, начиная с сегодняшней, хранится в памяти
+
+
+def _to_date(value) -> date:
+    """Приводит дату из запроса (строка ISO) или из базы к типу date."""
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value))
+
+
+class OccupancyCache:
+    """Занятость номеров по ночам в памяти процесса.
+
+    Для каждой ночи горизонта хранится целое число - битовая строка по номерам
+    (бит позиции номера = номер занят в эту ночь). Свободные на [check_in, check_out)
+    номера - это нулевые биты в OR ночей интервала: число операций зависит от длины
+    проживания, а не от количества номеров. Активные бронирования одного номера
+    не пересекаются (ограничение bookings_no_overlap), поэтому снятие брони
+    просто обнуляет ее биты.
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._initialize()
+                    cls._instance = instance
+        return cls._instance
+
+    def _initialize(self) -> None:
+        self._db = DatabaseConnection()
+        self._engine = AvailabilityEngine(self._db)
+        self._lock = threading.RLock()
+        self._origin: Optional[date] = None  # первая ночь горизонта; None - не загружен
+        self._nights: List[int] = []
+        self._positions: Dict[int, int] = {}  # room_id -> номер бита
+        self._bookings: Dict[int, Tuple[int, date, date]] = {}  # id -> (room, in, out)
+
+    def _position(self, room_id: int) -> int:
+        position = self._positions.get(room_id)
+        if position is None:
+            position = self._positions[room_id] = len(self._positions)
+        return position
+
+    def _night_slice(self, check_in: date, check_out: date) -> Tuple[int, int]:
+        """Индексы ночей интервала, обрезанные по горизонту."""
+        start = max((check_in - self._origin).days, 0)
+        end = min((check_out - self._origin).days, HORIZON_DAYS)
+        return start, end
+
+    def _mark(self, room_id: int, check_in: date, check_out: date, occupied: bool) -> None:
+        bit = 1 << self._position(room_id)
+        start, end = self._night_slice(check_in, check_out)
+        for night in range(start, end):
+            if occupied:
+                self._nights[night] |= bit
+            else:
+                self._nights[night] &= ~bit
+
+    def _ensure_loaded(self) -> None:
+        """Загружает горизонт одним запросом; при смене дня горизонт сдвигается."""
+        today = date.today()
+        if self._origin == today:
+            return
+        rows = self._db.execute_query(
+            """
+            SELECT id, room_id, check_in, check_out
+            FROM bookings
+            WHERE status <> 'cancelled'
+              AND daterange(check_in, check_out, '[)') && daterange(%s, %s, '[)')
+            """,
+            (today, today + timedelta(days=HORIZON_DAYS)),
+        )
+        self._origin = today
+        self._nights = [0] * HORIZON_DAYS
+        self._positions = {}
+        self._bookings = {}
+        for booking_id, room_id, check_in, check_out in rows:
+            self._bookings[booking_id] = (room_id, check_in, check_out)
+            self._mark(room_id, check_in, check_out, True)
+
+    def _covers(self, check_in: date, check_out: date) -> bool:
+        return (
+            self._origin <= check_in
+            and check_out <= self._origin + timedelta(days=HORIZON_DAYS)
+        )
+
+    def booking_saved(
+        self, booking_id: int, room_id: int, check_in, check_out, status: str
+    ) -> None:
+        """Учитывает добавленное или измененное бронирование."""
+        with self._lock:
+            if self._origin is None:
+                return  # кэш еще не загружен - изменение попадет в первую загрузку
+            self._forget(booking_id)
+            if status == "cancelled":
+                return
+            check_in, check_out = _to_date(check_in), _to_date(check_out)
+            self._bookings[booking_id] = (room_id, check_in, check_out)
+            self._mark(room_id, check_in, check_out, True)
+
+    def booking_removed(self, booking_id: int) -> None:
+        """Учитывает удаленное или отмененное бронирование."""
+        with self._lock:
+            if self._origin is not None:
+                self._forget(booking_id)
+
+    def _forget(self, booking_id: int) -> None:
+        previous = self._bookings.pop(booking_id, None)
+        if previous is not None:
+            self._mark(*previous, occupied=False)
+
+    def invalidate(self) -> None:
+        """Сбрасывает кэш (например, после каскадного удаления бронирований)."""
+        with self._lock:
+            self._origin = None
+
+    def free_room_ids(
+        self, room_ids: Iterable[int], check_in, check_out
+    ) -> List[int]:
+        """Оставляет из room_ids номера, свободные на весь интервал [check_in, check_out).
+        За пределами горизонта ответ берется из базы через AvailabilityEngine."""
+        check_in, check_out = _to_date(check_in), _to_date(check_out)
+        if check_out <= check_in:
+            raise ValueError("Дата выезда должна быть позже даты заезда!")
+        with self._lock:
+            self._ensure_loaded()
+            if self._covers(check_in, check_out):
+                start, end = self._night_slice(check_in, check_out)
+                occupied = 0
+                for night in self._nights[start:end]:
+                    occupied |= night
+                positions = self._positions
+                return [
+                    room_id
+                    for room_id in room_ids
+                    if room_id not in positions or not occupied >> positions[room_id] & 1
+                ]
+        free = set(self._engine.free_room_ids(check_in, check_out))
+        return [room_id for room_id in room_ids if room_id in free]
+
+    def stats(self) -> Dict[str, int]:
+        """Размер кэша."""
+        with self._lock:
+            return {
+                "horizon_days": HORIZON_DAYS,
+                "loaded": self._origin is not None,
+                "rooms": len(self._positions),
+                "bookings": len(self._bookings),
+            }
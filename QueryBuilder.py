@@ -0,0 +1,175 @@
+"""Построитель параметризованных SQL-запросов для фильтрации, сортировки и пагинации."""
+
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+
+def escape_like(value: str) -> str:
+    """Экранирует спецсимволы шаблона LIKE во входной строке."""
+    return (
+        str(value).replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    )
+
+
+def copy_csv_row(values: Sequence[Any]) -> str:
+    """Строка данных для COPY ... WITH (FORMAT csv).
+
+    None пишется пустым полем без кавычек (COPY читает его как NULL), остальные
+    значения - в кавычках, поэтому пустая строка загружается как '', а не NULL."""
+    return (
+        ",".join(
+            "" if value is None else '"' + str(value).replace('"', '""') + '"'
+            for value in values
+        )
+        + "\n"
+    )
+
+
+def _cursor_value(value: Any) -> Any:
+    """Приводит значение ключа сортировки к виду, пригодному для JSON."""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+class QueryBuilder:
+    """Собирает SELECT с условиями WHERE, ORDER BY и LIMIT/OFFSET."""
+
+    def __init__(self, table: str, columns: Sequence[str]) -> None:
+        self._table = table
+        self._columns = list(columns)
+        self._where: List[str] = []
+        self._params: List[Any] = []
+        self._order_by: List[str] = []
+        self._order_params: List[Any] = []
+        self._order_keys: List[Tuple[str, bool]] = []
+        self._limit: Optional[int] = None
+        self._offset: Optional[int] = None
+        self._keyset = False
+
+    def where(self, condition: str, *params: Any) -> "QueryBuilder":
+        """Добавляет условие (объединяется с остальными через AND)."""
+        if condition:
+            self._where.append(f"({condition})")
+            self._params.extend(params)
+        return self
+
+    def order_by(
+        self, expression: str, descending: bool = False, params: Sequence[Any] = ()
+    ) -> "QueryBuilder":
+        """Добавляет выражение сортировки; params - параметры выражения
+        (такая сортировка не поддерживает keyset-пагинацию)."""
+        self._order_by.append(f"{expression} {'DESC' if descending else 'ASC'}")
+        self._order_params.extend(params)
+        self._order_keys.append((expression, descending))
+        return self
+
+    def paginate(self, limit: int, offset: int = 0) -> "QueryBuilder":
+        """Ограничивает выборку одной страницей."""
+        self._limit = limit
+        self._offset = offset
+        return self
+
+    def _order_signature(self) -> str:
+        """Короткий отпечаток сортировки: курсор действителен только для нее."""
+        return hashlib.sha1("|".join(self._order_by).encode("utf-8")).hexdigest()[:12]
+
+    def after_cursor(
+        self, cursor: Optional[str], limit: int, offset: int = 0
+    ) -> "QueryBuilder":
+        """Keyset-пагинация: limit строк, следующих за курсором.
+        Без курсора выбирается страница по offset, но курсор на следующую все равно
+        строится. Ключ сортировки должен заканчиваться уникальным столбцом (id)."""
+        if self._order_params:
+            raise ValueError("Курсор не поддерживается для этой сортировки!")
+        self._keyset = True
+        self._limit = limit + 1  # лишняя строка показывает, есть ли следующая страница
+        self._offset = None if cursor else offset
+        if not cursor:
+            return self
+
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+            signature, values = payload["o"], payload["v"]
+        except (ValueError, TypeError, KeyError) as exc:
+            raise ValueError("Некорректный курсор пагинации!") from exc
+        if signature != self._order_signature() or len(values) != len(
+            self._order_keys
+        ):
+            raise ValueError("Курсор не соответствует текущей сортировке!")
+
+        directions = {descending for _, descending in self._order_keys}
+        expressions = [expression for expression, _ in self._order_keys]
+        if len(directions) == 1:
+            # одинаковое направление: сравнение кортежей использует составной индекс
+            operator = "<" if directions.pop() else ">"
+            placeholders = ", ".join(["%s"] * len(values))
+            self.where(
+                f"({', '.join(expressions)}) {operator} ({placeholders})", *values
+            )
+        else:
+            # разные направления: (k1 > v1) OR (k1 = v1 AND k2 < v2) OR ...
+            alternatives = []
+            params: List[Any] = []
+            for i, (expression, descending) in enumerate(self._order_keys):
+                parts = [f"{prefix} = %s" for prefix in expressions[:i]]
+                parts.append(f"{expression} {'<' if descending else '>'} %s")
+                alternatives.append(f"({' AND '.join(parts)})")
+                params.extend(values[: i + 1])
+            self.where(" OR ".join(alternatives), *params)
+        return self
+
+    def split_page(self, rows: List[tuple]) -> Tuple[List[tuple], Optional[str]]:
+        """Отделяет служебные ключи сортировки от строк страницы и строит курсор
+        на следующую страницу (None, если страница последняя)."""
+        if not self._keyset:
+            return rows, None
+        key_count = len(self._order_keys)
+        has_more = self._limit is not None and len(rows) >= self._limit
+        if has_more:
+            rows = rows[: self._limit - 1]
+        next_cursor = None
+        if has_more and rows:
+            payload = {
+                "o": self._order_signature(),
+                "v": [_cursor_value(v) for v in rows[-1][-key_count:]],
+            }
+            encoded = base64.urlsafe_b64encode(
+                json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            )
+            next_cursor = encoded.decode("ascii").rstrip("=")
+        return [row[:-key_count] for row in rows], next_cursor
+
+    def _where_sql(self) -> str:
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def build_select(self) -> Tuple[str, tuple]:
+        """Возвращает SELECT-запрос и его параметры."""
+        columns = list(self._columns)
+        if self._keyset:
+            # значения ключей сортировки нужны для построения следующего курсора
+            columns.extend(expression for expression, _ in self._order_keys)
+        query = f"SELECT {', '.join(columns)} FROM {self._table}{self._where_sql()}"
+        params = list(self._params)
+        if self._order_by:
+            query += f" ORDER BY {', '.join(self._order_by)}"
+            params.extend(self._order_params)
+        if self._limit is not None:
+            query += " LIMIT %s"
+            params.append(self._limit)
+        if self._offset:
+            query += " OFFSET %s"
+            params.append(self._offset)
+        return query, tuple(params)
+
+    def build_count(self) -> Tuple[str, tuple]:
+        """Возвращает COUNT(*) с тем же условием отбора."""
+        query = f"SELECT COUNT(*) FROM {self._table}{self._where_sql()}"
+        return query, tuple(self._params)
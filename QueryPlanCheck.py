@@ -0,0 +1,369 @@
+"""Проверка планов запросов репозиториев: ни один запрос не должен
+выполняться последовательным сканированием таблицы без необходимости.
+
+Запуск: python QueryPlanCheck.py [-v]
+Скрипт наполняет базу тестовыми данными внутри транзакции, выполняет EXPLAIN
+для запросов ClientRepDB, RoomRepDB и BookingRepDB (в том числе построенных
+декораторами) и откатывает транзакцию. Код возврата 1 - есть регрессии.
+"""
+
+import sys
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from AvailabilityEngine import AvailabilityEngine
+from BookingRepDB import BookingRepDB
+from BookingRepDBDecorator import (
+    BookingRepDBDecorator,
+    BookingSorter,
+    ClientIdFilter,
+    DateRangeFilter,
+    RoomIdFilter,
+    StatusFilter,
+)
+from ClientRepDB import ClientRepDB, DatabaseConnection
+from ClientRepDBDecorator import (
+    ClientRepDBDecorator,
+    ClientSorter,
+    NameFilter,
+    PhoneFilter,
+    SurnameFilter,
+)
+from ClientSearch import ClientSearch
+from Migrations import migrate
+from RoomRepDB import RoomRepDB
+from RoomRepDBDecorator import CategoryFilter, RoomRepDBDecorator, RoomSorter
+
+TABLES = {"clients", "rooms", "bookings"}
+
+SEED = {"clients": 20000, "rooms": 400, "bookings_per_room": 150}
+
+# Запросы, которым последовательное сканирование разрешено, и причина
+ALLOWED_SEQ_SCANS: Dict[str, str] = {
+    "ClientRepDB.get_count": "подсчет всех строк",
+    "RoomRepDB.get_count": "подсчет всех строк",
+    "BookingRepDB.get_count": "подсчет всех строк",
+    "RoomRepDB.get_all": "выгрузка всей таблицы",
+    "BookingRepDB.get_all": "выгрузка всей таблицы",
+    "RoomRepDB.get_available_rooms": "почти все номера доступны",
+    "RoomRepDecorator.available_rooms": "почти все номера доступны",
+    "AvailabilityEngine.free_room_ids": "почти все номера доступны",
+}
+
+# Поиск по подстроке использует GIN-индексы pg_trgm. Если расширения нет
+# в сборке PostgreSQL, сканирование этих запросов ожидаемо.
+TRIGRAM_SEQ_SCANS: Dict[str, str] = {
+    "ClientRepDecorator.phone_substring": "нет pg_trgm",
+    "ClientSearch.search": "нет pg_trgm",
+    "ClientSearch.count": "нет pg_trgm",
+}
+
+
+class _RecordingDatabase:
+    """Подменяет DatabaseConnection в репозиториях и запоминает запросы."""
+
+    def __init__(self) -> None:
+        self.queries: List[Tuple[str, tuple]] = []
+
+    def execute_query(self, query: str, params: tuple = None) -> List[tuple]:
+        self.queries.append((query, tuple(params or ())))
+        return []
+
+
+def _seed(cursor) -> Dict[str, Any]:
+    """Заполняет таблицы данными, похожими на рабочие. Возвращает образцы ID."""
+    cursor.execute(
+        """
+        INSERT INTO clients (surname, name, patronymic, phone, comment)
+        SELECT 'S' || substr(md5(i::text), 1, 8),
+               'N' || substr(md5((i * 7)::text), 1, 6),
+               '',
+               '+7' || lpad(i::text, 9, '0'),
+               'query-plan-check'
+        FROM generate_series(1, %s) AS i
+        """,
+        (SEED["clients"],),
+    )
+    cursor.execute(
+        """
+        INSERT INTO rooms (room_number, capacity, category, price_per_night, description)
+        SELECT 'Q' || i,
+               1 + i %% 4,
+               (ARRAY ['Стандарт', 'Полулюкс', 'Люкс', 'Эконом'])[1 + i %% 4],
+               1000 + (i %% 50) * 100,
+               'query-plan-check'
+        FROM generate_series(1, %s) AS i
+        """,
+        (SEED["rooms"],),
+    )
+    # у каждого номера цепочка непересекающихся броней: прошлые завершены,
+    # будущие подтверждены, каждая двадцатая отменена
+    cursor.execute(
+        """
+        INSERT INTO bookings (client_id, room_id, check_in, check_out,
+                              total_sum, status, notes, created_at)
+        SELECT c.ids[1 + (r.n * 151 + k) %% array_length(c.ids, 1)],
+               r.id,
+               CURRENT_DATE - 365 + k * 3,
+               CURRENT_DATE - 363 + k * 3,
+               3000,
+               CASE
+                   WHEN (r.n + k) %% 20 = 0 THEN 'cancelled'
+                   WHEN k * 3 < 365 THEN 'completed'
+                   ELSE 'confirmed'
+                   END,
+               'query-plan-check',
+               (CURRENT_DATE - 375 + k * 3)::timestamp
+        FROM (SELECT id, row_number() OVER (ORDER BY id) AS n
+              FROM rooms
+              WHERE description = 'query-plan-check') AS r,
+             generate_series(0, %s) AS k,
+             (SELECT array_agg(id) AS ids
+              FROM clients
+              WHERE comment = 'query-plan-check') AS c
+        """,
+        (SEED["bookings_per_room"] - 1,),
+    )
+    cursor.execute("ANALYZE clients")
+    cursor.execute("ANALYZE rooms")
+    cursor.execute("ANALYZE bookings")
+    cursor.execute(
+        """
+        SELECT (SELECT max(id) FROM clients),
+               (SELECT max(id) FROM rooms),
+               (SELECT max(id) FROM bookings)
+        """
+    )
+    client_id, room_id, booking_id = cursor.fetchone()
+    return {"client_id": client_id, "room_id": room_id, "booking_id": booking_id}
+
+
+def _cursor_for(builder, columns: int, values: list) -> Optional[str]:
+    """Строит курсор keyset-пагинации, как если бы страница закончилась на values."""
+    builder.after_cursor(None, 1)
+    row = (None,) * columns + tuple(values)
+    return builder.split_page([row, row])[1]
+
+
+def _cases(sample: Dict[str, Any]) -> List[Tuple[str, Callable[[Any, Any, Any], Any]]]:
+    """Вызовы репозиториев, запросы которых проверяются. Аргументы: клиенты,
+    номера, бронирования (репозитории с подмененной базой данных)."""
+    client_id = sample["client_id"]
+    room_id = sample["room_id"]
+    booking_id = sample["booking_id"]
+    duplicate = {
+        "surname": "Иванов",
+        "name": "Иван",
+        "phone": "+70000000000",
+    }
+
+    def client_decorator(clients, *filters, sorter=None, reverse=False):
+        decorator = ClientRepDBDecorator(clients)
+        for client_filter in filters:
+            decorator.add_filter(client_filter)
+        if sorter:
+            decorator.set_sorter(sorter, reverse)
+        return decorator
+
+    def client_second_page(clients, rooms, bookings):
+        decorator = client_decorator(clients, sorter=ClientSorter.by_surname())
+        cursor = _cursor_for(
+            decorator._build_query(), len(ClientRepDB.SHORT_COLUMNS), ["smmm", 100]
+        )
+        return decorator.get_page(20, cursor=cursor)
+
+    def booking_decorator(bookings, *filters, sorter=None):
+        decorator = BookingRepDBDecorator(bookings)
+        for booking_filter in filters:
+            decorator.add_filter(booking_filter)
+        if sorter:
+            decorator.set_sorter(sorter)
+        return decorator
+
+    def room_decorator(rooms, *filters, sorter=None):
+        decorator = RoomRepDBDecorator(rooms)
+        for room_filter in filters:
+            decorator.add_filter(room_filter)
+        if sorter:
+            decorator.set_sorter(sorter)
+        return decorator
+
+    return [
+        ("ClientRepDB.get_by_id", lambda c, r, b: c.get_by_id(client_id)),
+        ("ClientRepDB.get_k_n_short_list", lambda c, r, b: c.get_k_n_short_list(20, 50)),
+        ("ClientRepDB.get_count", lambda c, r, b: c.get_count()),
+        ("ClientRepDB.duplicate_check", lambda c, r, b: c._find_duplicate(duplicate)),
+        (
+            "ClientRepDecorator.page",
+            lambda c, r, b: client_decorator(c).get_page(20, 3),
+        ),
+        (
+            "ClientRepDecorator.sorted_by_surname",
+            lambda c, r, b: client_decorator(
+                c, sorter=ClientSorter.by_surname(), reverse=True
+            ).get_page(20),
+        ),
+        ("ClientRepDecorator.cursor_page", client_second_page),
+        (
+            "ClientRepDecorator.surname_prefix",
+            lambda c, r, b: client_decorator(c, SurnameFilter("sab")).get_page(20),
+        ),
+        (
+            "ClientRepDecorator.surname_prefix_count",
+            lambda c, r, b: client_decorator(c, SurnameFilter("sab")).get_count(),
+        ),
+        (
+            "ClientRepDecorator.name_prefix",
+            lambda c, r, b: client_decorator(
+                c, NameFilter("nab"), sorter=ClientSorter.by_name()
+            ).get_page(20),
+        ),
+        ("ClientRepDB.suggest", lambda c, r, b: c.suggest("sab")),
+        ("ClientRepDB.suggest_phone", lambda c, r, b: c.suggest("+7000012")),
+        ("ClientRepDB.suggest_empty", lambda c, r, b: c.suggest("")),
+        (
+            "ClientRepDecorator.phone_substring",
+            lambda c, r, b: client_decorator(c, PhoneFilter("0001234")).get_page(20),
+        ),
+        ("ClientSearch.search", lambda c, r, b: ClientSearch(c).search("sab nab", 20)),
+        ("ClientSearch.count", lambda c, r, b: ClientSearch(c).count("sab nab")),
+        ("RoomRepDB.get_by_id", lambda c, r, b: r.get_by_id(room_id)),
+        ("RoomRepDB.get_by_room_number", lambda c, r, b: r.get_by_room_number("Q17")),
+        ("RoomRepDB.get_k_n_short_list", lambda c, r, b: r.get_k_n_short_list(20, 3)),
+        ("RoomRepDB.get_all", lambda c, r, b: r.get_all()),
+        ("RoomRepDB.suggest", lambda c, r, b: r.suggest("Q12")),
+        ("RoomRepDB.get_count", lambda c, r, b: r.get_count()),
+        ("RoomRepDB.get_available_rooms", lambda c, r, b: r.get_available_rooms()),
+        (
+            "RoomRepDB.is_room_available_for_dates",
+            lambda c, r, b: r.is_room_available_for_dates(room_id, "2030-01-01", "2030-01-05"),
+        ),
+        ("RoomRepDecorator.page", lambda c, r, b: room_decorator(r).get_page(20, 2)),
+        (
+            "RoomRepDecorator.category",
+            lambda c, r, b: room_decorator(r, CategoryFilter("Люкс")).get_page(20),
+        ),
+        (
+            "RoomRepDecorator.sorted_by_price",
+            lambda c, r, b: room_decorator(r, sorter=RoomSorter.by_price()).get_page(20),
+        ),
+        (
+            "RoomRepDecorator.available_rooms",
+            lambda c, r, b: room_decorator(r).get_available_rooms(),
+        ),
+        ("BookingRepDB.get_by_id", lambda c, r, b: b.get_by_id(booking_id)),
+        ("BookingRepDB.get_all", lambda c, r, b: b.get_all()),
+        ("BookingRepDB.get_count", lambda c, r, b: b.get_count()),
+        ("BookingRepDB.get_k_n_short_list", lambda c, r, b: b.get_k_n_short_list(20, 5)),
+        ("BookingRepDB.get_by_client_id", lambda c, r, b: b.get_by_client_id(client_id)),
+        ("BookingRepDB.get_by_room_id", lambda c, r, b: b.get_by_room_id(room_id)),
+        ("BookingRepDB.get_active_bookings", lambda c, r, b: b.get_active_bookings()),
+        (
+            "BookingRepDB.get_bookings_for_period",
+            lambda c, r, b: b.get_bookings_for_period("2030-01-01", "2030-01-07"),
+        ),
+        (
+            "AvailabilityEngine.has_conflict",
+            lambda c, r, b: b._availability.has_conflict(room_id, "2030-01-01", "2030-01-05"),
+        ),
+        (
+            "AvailabilityEngine.free_room_ids",
+            lambda c, r, b: b._availability.free_room_ids("2030-01-01", "2030-01-05"),
+        ),
+        ("BookingRepDecorator.page", lambda c, r, b: booking_decorator(b).get_page(20, 3)),
+        (
+            "BookingRepDecorator.by_client",
+            lambda c, r, b: booking_decorator(b, ClientIdFilter(client_id)).get_page(20),
+        ),
+        (
+            "BookingRepDecorator.by_room",
+            lambda c, r, b: booking_decorator(
+                b, RoomIdFilter(room_id), sorter=BookingSorter.by_check_in(True)
+            ).get_page(20),
+        ),
+        (
+            "BookingRepDecorator.by_client_count",
+            lambda c, r, b: booking_decorator(b, ClientIdFilter(client_id)).get_count(),
+        ),
+        (
+            "BookingRepDecorator.cancelled",
+            lambda c, r, b: booking_decorator(b, StatusFilter("cancelled")).get_page(20),
+        ),
+        (
+            "BookingRepDecorator.date_range",
+            lambda c, r, b: booking_decorator(
+                b, DateRangeFilter(None, "2020-01-10")
+            ).get_page(20),
+        ),
+    ]
+
+
+def _record_queries(sample: Dict[str, Any]) -> List[Tuple[str, str, tuple]]:
+    """Вызывает репозитории с подмененной базой и собирает их запросы."""
+    recorder = _RecordingDatabase()
+    clients, rooms, bookings = ClientRepDB(), RoomRepDB(), BookingRepDB()
+    for repo in (clients, rooms, bookings):
+        repo._db = recorder
+        if hasattr(repo, "_availability"):
+            repo._availability = AvailabilityEngine(recorder)
+
+    collected = []
+    for label, call in _cases(sample):
+        recorder.queries.clear()
+        call(clients, rooms, bookings)
+        if not recorder.queries:
+            raise RuntimeError(f"{label}: запрос не выполнен")
+        for query, params in recorder.queries:
+            collected.append((label, query, params))
+    return collected
+
+
+def _seq_scans(plan: dict) -> Set[str]:
+    """Таблицы приложения, которые план читает последовательным сканированием."""
+    found = set()
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in TABLES:
+        found.add(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found |= _seq_scans(child)
+    return found
+
+
+def run(verbose: bool = False) -> int:
+    """Выполняет проверку и возвращает количество регрессий."""
+    db = DatabaseConnection()
+    migrate(db)
+    regressions = 0
+    allowed = dict(ALLOWED_SEQ_SCANS)
+    with db.connection() as conn:
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                if cursor.fetchone() is None:
+                    allowed.update(TRIGRAM_SEQ_SCANS)
+                sample = _seed(cursor)
+                for label, query, params in _record_queries(sample):
+                    cursor.execute("EXPLAIN (FORMAT JSON) " + query, params)
+                    plan = cursor.fetchone()[0][0]["Plan"]
+                    scanned = _seq_scans(plan)
+                    if not scanned:
+                        status = "ok"
+                    elif label in allowed:
+                        status = f"seq scan разрешен ({allowed[label]})"
+                    else:
+                        status = f"SEQ SCAN: {', '.join(sorted(scanned))}"
+                        regressions += 1
+                    print(f"{label:50} {status}")
+                    if verbose and scanned:
+                        cursor.execute("EXPLAIN " + query, params)
+                        for (line,) in cursor.fetchall():
+                            print("    " + line)
+        finally:
+            conn.rollback()  # тестовые данные не сохраняются
+    return regressions
+
+
+if __name__ == "__main__":
+    failed = run(verbose="-v" in sys.argv[1:])
+    if failed:
+        print(f"\nЗапросов с последовательным сканированием: {failed}")
+        sys.exit(1)
+    print("\nВсе запросы используют индексы")
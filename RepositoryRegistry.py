@@ -0,0 +1,101 @@
+"""Общий реестр репозиториев и контроллеров, создаваемых по первому обращению."""
+
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+from AddBookingController import AddBookingController
+from AddClientController import AddClientController
+from AddRoomController import AddRoomController
+from BookingController import BookingController
+from BookingRepDB import BookingRepDB
+from BookingRepDBAdapter import BookingRepDBAdapter
+from ClientController import ClientController
+from ClientRepDB import ClientRepDB
+from ClientRepDBAdapter import ClientRepDBAdapter
+from DeleteBookingController import DeleteBookingController
+from DeleteClientController import DeleteClientController
+from DeleteRoomController import DeleteRoomController
+from EditBookingController import EditBookingController
+from EditClientController import EditClientController
+from EditRoomController import EditRoomController
+from RoomController import RoomController
+from RoomRepDB import RoomRepDB
+from RoomRepDBAdapter import RoomRepDBAdapter
+
+# один адаптер на сущность для всего процесса
+REPOSITORY_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "client": lambda: ClientRepDBAdapter(ClientRepDB()),
+    "room": lambda: RoomRepDBAdapter(RoomRepDB()),
+    "booking": lambda: BookingRepDBAdapter(BookingRepDB()),
+}
+
+# какие репозитории (в порядке аргументов конструктора) нужны контроллеру
+CONTROLLER_DEPENDENCIES: Dict[type, Tuple[str, ...]] = {
+    ClientController: ("client",),
+    AddClientController: ("client",),
+    EditClientController: ("client",),
+    DeleteClientController: ("client",),
+    RoomController: ("room",),
+    AddRoomController: ("room",),
+    EditRoomController: ("room",),
+    DeleteRoomController: ("room",),
+    BookingController: ("booking",),
+    AddBookingController: ("booking", "room", "client"),
+    EditBookingController: ("booking", "room", "client"),
+    DeleteBookingController: ("booking",),
+}
+
+
+class RepositoryRegistry:
+    """Потокобезопасный реестр: каждый объект создается один раз при первом запросе."""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._objects = {}
+                    instance._lock = threading.RLock()
+                    cls._instance = instance
+        return cls._instance
+
+    def _get(self, key: Any, factory: Callable[[], Any]) -> Any:
+        obj = self._objects.get(key)
+        if obj is None:
+            with self._lock:
+                obj = self._objects.get(key)
+                if obj is None:
+                    obj = self._objects[key] = factory()
+        return obj
+
+    def repository(self, entity: str) -> Any:
+        """Общий адаптер репозитория сущности: "client", "room" или "booking"."""
+        if entity not in REPOSITORY_FACTORIES:
+            raise ValueError(f"Неизвестная сущность: {entity}")
+        return self._get(entity, REPOSITORY_FACTORIES[entity])
+
+    def controller(self, controller_cls: type) -> Any:
+        """Общий экземпляр контроллера, построенный на общих репозиториях."""
+        dependencies = CONTROLLER_DEPENDENCIES[controller_cls]
+        return self._get(
+            controller_cls,
+            lambda: controller_cls(*(self.repository(name) for name in dependencies)),
+        )
+
+    def reset(self) -> None:
+        """Забывает созданные объекты (следующее обращение создаст их заново)."""
+        with self._lock:
+            self._objects.clear()
+
+
+class LazyController:
+    """Дескриптор атрибута обработчика: контроллер берется из реестра при обращении."""
+
+    def __init__(self, controller_cls: type) -> None:
+        self._controller_cls = controller_cls
+
+    def __get__(self, instance, owner) -> Any:
+        return RepositoryRegistry().controller(self._controller_cls)
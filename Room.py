@@ -7,6 +7,16 @@ from decimal import Decimal
 class Room:
     """Класс для хранения информации о номере в отеле."""
 
+    __slots__ = (
+        "_id",
+        "_room_number",
+        "_capacity",
+        "_is_available",
+        "_category",
+        "_price_per_night",
+        "_description",
+    )
+
     def __init__(self, *args, **kwargs):
         """Инициализирует номер из различных источников."""
         if kwargs.get("from_string"):
@@ -70,6 +80,24 @@ class Room:
         self._price_per_night = self.validate_price(price_per_night)
         self._description = description if description else ""
 
+    @classmethod
+    def from_row(cls, row):
+        """Создает номер из строки БД в порядке RoomRepDB.COLUMNS без валидации:
+        ограничения таблицы rooms уже гарантируют корректность значений."""
+        room = cls.__new__(cls)
+        (
+            room._id,
+            room._room_number,
+            room._capacity,
+            is_available,
+            room._category,
+            room._price_per_night,
+            description,
+        ) = row
+        room._is_available = bool(is_available)
+        room._description = description or ""
+        return room
+
     @staticmethod
     def validate_required(value, field_name: str):
         """Проверяет что значение не пустое."""
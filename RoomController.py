@@ -18,6 +18,9 @@ from RoomRepDBDecorator import (
     RoomSorter,
 )
 
+SUGGEST_LIMIT = 10  # подсказок по умолчанию
+SUGGEST_MAX_LIMIT = 50  # максимум подсказок за запрос
+
 
 class RoomController:
     """Контроллер для операций с номерами."""
@@ -92,6 +95,7 @@ class RoomController:
             filters: Optional[Dict[str, Any]] = None,
             sort_by: Optional[str] = None,
             sort_order: Optional[str] = None,
+            cursor: Optional[str] = None,
     ) -> Dict[str, Any]:
         """Получает список номеров с краткой информацией."""
 
@@ -103,28 +107,24 @@ class RoomController:
         # выбираем репозиторий с учетом фильтров и сортировки
         need_decorator = bool(filters) or sort_by is not None
         if need_decorator:
+            # декоратор выполняет фильтры, сортировку и пагинацию в базе данных
             repo_to_use = self.apply_filters(filters, sort_by, sort_order)
-            # Получаем Room объекты из декоратора
-            rooms_objects = repo_to_use.get_all()
-            total = len(rooms_objects)
         else:
             repo_to_use = self.repository
-            total = repo_to_use.get_count()
-            rooms_objects = []
+        total = repo_to_use.get_count()
 
         # Обработка пагинации
+        next_cursor = None
         if page_size is None or page_size <= 0:
-            if need_decorator:
-                data_slice = rooms_objects
-            else:
-                data_slice = repo_to_use.read_all()
+            data_slice = repo_to_use.read_all()
             page_size = total if total > 0 else 1
         else:
-            if need_decorator:
-                offset = (page - 1) * page_size
-                data_slice = rooms_objects[offset: offset + page_size]
-            else:
-                data_slice = repo_to_use.get_k_n_short_list(page_size, page)
+            # страница выбирается по ключу сортировки, если передан курсор;
+            # next_cursor строится в любом случае
+            if not need_decorator:
+                repo_to_use = self.apply_filters(filters, sort_by, sort_order)
+                need_decorator = True  # дальше работаем с объектами модели
+            data_slice, next_cursor = repo_to_use.get_page(page_size, page, cursor)
 
         # преобразуем в словари для JSON
         room_list = []
@@ -158,6 +158,7 @@ class RoomController:
             "total": total,
             "page": page,
             "page_size": page_size,
+            "next_cursor": next_cursor,
             "filters_applied": bool(filters),
             "sort_by": sort_by,
             "sort_order": sort_order,
@@ -171,13 +172,14 @@ class RoomController:
         """Получает полную информацию о номере по id."""
         return self.repository.get_by_id(room_id)
 
+    def suggest_rooms(self, query: str = "", limit: int = SUGGEST_LIMIT) -> Dict[str, Any]:
+        """Подсказки для выбора номера по началу номера комнаты."""
+        limit = min(max(limit, 1), SUGGEST_MAX_LIMIT)
+        return {"items": self.repository.suggest(query, limit), "query": query}
+
     def get_available_rooms(self, check_in: str, check_out: str) -> List[Dict[str, Any]]:
-        """Получает доступные номера на указанные даты."""
-        # Здесь нужно реализовать логику проверки доступности через BookingController
-        # Пока возвращаем все доступные номера
-        filters = {"is_available": True}
-        result = self.get_rooms_list(filters=filters, page_size=None, page=1)
-        return result["items"]
+        """Получает номера, свободные на интервал [check_in, check_out)."""
+        return self.repository.get_available_rooms(check_in, check_out)
 
     def update_room_availability(self, room_id: int, is_available: bool) -> Dict[str, Any]:
         """Обновляет доступность номера."""
@@ -0,0 +1,20 @@
+"""Снимок номеров в столбцовом формате."""
+
+from ColumnarRepository import ColumnarRepository
+from Room import Room
+
+
+class RoomRepColumnar(ColumnarRepository):
+    """Номера в файле ColumnarSnapshot (резервные копии и тестовые данные)."""
+
+    MODEL = Room
+    # порядок столбцов совпадает с RoomRepDB.COLUMNS
+    SCHEMA = (
+        ("id", "int"),
+        ("room_number", "str"),
+        ("capacity", "int"),
+        ("is_available", "bool"),
+        ("category", "str"),
+        ("price_per_night", "decimal"),
+        ("description", "str"),
+    )
@@ -1,19 +1,83 @@
 """Реализация репозитория номеров в базе данных PostgreSQL."""
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 
+from AvailabilityEngine import AvailabilityEngine
 from ClientRepDB import DatabaseConnection
+from EntityCache import EntityCache
+from OccupancyCache import OccupancyCache
+from QueryBuilder import QueryBuilder, escape_like
 from Room import Room
 
 
 class RoomRepDB:
     """Репозиторий для работы с номерами в базе данных."""
 
+    TABLE = "rooms"
+    COLUMNS = (
+        "id",
+        "room_number",
+        "capacity",
+        "is_available",
+        "category",
+        "price_per_night",
+        "description",
+    )
+    EXPORT_COLUMNS = COLUMNS
+
     def __init__(self):
         self._db = DatabaseConnection()
+        self._availability = AvailabilityEngine(self._db)
+        self._cache = EntityCache.named("rooms")
+
+    def new_query(self) -> QueryBuilder:
+        """Создает построитель запроса по номерам."""
+        return QueryBuilder(self.TABLE, self.COLUMNS)
+
+    def export_rows(self) -> Iterator[tuple]:
+        """Все номера потоком кортежей в порядке EXPORT_COLUMNS (по ID)."""
+        return self._db.stream_query(
+            f"SELECT {', '.join(self.EXPORT_COLUMNS)} FROM rooms ORDER BY id"
+        )
+
+    def suggest(self, query: str, limit: int = 10) -> List[Room]:
+        """Подсказки для выбора номера: первые limit номеров, чей номер
+        начинается с query (пустой query - первые номера по порядку)."""
+        builder = self.new_query()
+        query = query.strip()
+        if query:
+            builder.where("room_number LIKE %s", escape_like(query) + "%")
+        return self.find(builder.order_by("room_number").paginate(limit))
+
+    def find(self, builder: QueryBuilder) -> List[Room]:
+        """Выполняет запрос построителя и возвращает номера."""
+        query, params = builder.build_select()
+        return self._rows_to_rooms(self._db.execute_query(query, params))
+
+    def find_page(self, builder: QueryBuilder) -> Tuple[List[Room], Optional[str]]:
+        """Выполняет keyset-запрос построителя: страница и курсор следующей."""
+        query, params = builder.build_select()
+        rows, next_cursor = builder.split_page(self._db.execute_query(query, params))
+        return self._rows_to_rooms(rows), next_cursor
+
+    @staticmethod
+    def _rows_to_rooms(rows: List[tuple]) -> List[Room]:
+        """Преобразует строки выборки в объекты модели. Строки из БД уже
+        проверены ограничениями таблицы и не проходят валидацию повторно."""
+        return [Room.from_row(r) for r in rows]
+
+    def count_where(self, builder: QueryBuilder) -> int:
+        """Количество номеров, удовлетворяющих условиям построителя."""
+        query, params = builder.build_count()
+        rows = self._db.execute_query(query, params)
+        return rows[0][0] if rows else 0
 
     def get_by_id(self, room_id: int) -> Optional[Room]:
-        """Получает номер по ID."""
+        """Получает номер по ID (через кэш)."""
+        return self._cache.get_or_load(room_id, lambda: self._load_by_id(room_id))
+
+    def _load_by_id(self, room_id: int) -> Optional[Room]:
+        """Загружает номер по ID из базы данных."""
         rows = self._db.execute_query(
             """
             SELECT id,
@@ -30,18 +94,7 @@ class RoomRepDB:
         )
         if rows:
             r = rows[0]
-            return Room(
-                {
-                    "id": r[0],
-                    "room_number": r[1],
-                    "capacity": r[2],
-                    "is_available": r[3],
-                    "category": r[4],
-                    "price_per_night": r[5],
-                    "description": r[6],
-                },
-                from_dict=True,
-            )
+            return Room.from_row(r)
         return None
 
     def get_by_room_number(self, room_number: str) -> Optional[Room]:
@@ -62,18 +115,7 @@ class RoomRepDB:
         )
         if rows:
             r = rows[0]
-            return Room(
-                {
-                    "id": r[0],
-                    "room_number": r[1],
-                    "capacity": r[2],
-                    "is_available": r[3],
-                    "category": r[4],
-                    "price_per_night": r[5],
-                    "description": r[6],
-                },
-                from_dict=True,
-            )
+            return Room.from_row(r)
         return None
 
     def get_all(self) -> List[Room]:
@@ -91,21 +133,7 @@ class RoomRepDB:
             ORDER BY room_number
             """
         )
-        return [
-            Room(
-                {
-                    "id": r[0],
-                    "room_number": r[1],
-                    "capacity": r[2],
-                    "is_available": r[3],
-                    "category": r[4],
-                    "price_per_night": r[5],
-                    "description": r[6],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        return [Room.from_row(r) for r in rows]
 
     def get_k_n_short_list(self, k: int, n: int) -> List[Room]:
         """Пагинация номеров."""
@@ -126,24 +154,12 @@ class RoomRepDB:
             """,
             (k, offset),
         )
-        return [
-            Room(
-                {
-                    "id": r[0],
-                    "room_number": r[1],
-                    "capacity": r[2],
-                    "is_available": r[3],
-                    "category": r[4],
-                    "price_per_night": r[5],
-                    "description": r[6],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
-
-    def get_available_rooms(self) -> List[Room]:
-        """Получает все доступные номера."""
+        return [Room.from_row(r) for r in rows]
+
+    def get_available_rooms(
+        self, check_in: Optional[str] = None, check_out: Optional[str] = None
+    ) -> List[Room]:
+        """Получает доступные номера; если заданы даты - только свободные на них."""
         rows = self._db.execute_query(
             """
             SELECT id,
@@ -158,21 +174,18 @@ class RoomRepDB:
             ORDER BY room_number
             """
         )
-        return [
-            Room(
-                {
-                    "id": r[0],
-                    "room_number": r[1],
-                    "capacity": r[2],
-                    "is_available": r[3],
-                    "category": r[4],
-                    "price_per_night": r[5],
-                    "description": r[6],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        rooms = [Room.from_row(r) for r in rows]
+        if check_in and check_out:
+            rooms = self.filter_free_for_dates(rooms, check_in, check_out)
+        return rooms
+
+    @staticmethod
+    def filter_free_for_dates(rooms: List[Room], check_in, check_out) -> List[Room]:
+        """Оставляет номера, свободные на [check_in, check_out), по кэшу занятости."""
+        free = set(
+            OccupancyCache().free_room_ids((room.id for room in rooms), check_in, check_out)
+        )
+        return [room for room in rooms if room.id in free]
 
     def add_room(self, room_data: dict) -> bool:
         """Добавляет новый номер."""
@@ -250,6 +263,7 @@ class RoomRepDB:
                 room_id,
             ),
         )
+        self._cache.invalidate(room_id)
 
         return rows_affected > 0
 
@@ -259,6 +273,11 @@ class RoomRepDB:
             "DELETE FROM rooms WHERE id=%s",
             (room_id,),
         )
+        self._cache.invalidate(room_id)
+        if rows_affected > 0:
+            # бронирования номера удалены каскадно
+            OccupancyCache().invalidate()
+            EntityCache.named("bookings").clear()
         return rows_affected > 0
 
     def get_count(self) -> int:
@@ -268,68 +287,37 @@ class RoomRepDB:
 
     def search_rooms(self, filters: Dict[str, Any]) -> List[Room]:
         """Ищет номера по фильтрам."""
+        # локальный импорт: модуль декоратора сам импортирует RoomRepDB
+        from RoomRepDBDecorator import (
+            AvailabilityFilter,
+            CapacityFilter,
+            CategoryFilter,
+            PriceFilter,
+            RoomNumberFilter,
+        )
 
-        query = """
-                SELECT id, \
-                       room_number, \
-                       capacity, \
-                       is_available,
-                       category, \
-                       price_per_night, \
-                       description
-                FROM rooms
-                WHERE 1 = 1 \
-                """
-        params = []
-
-        # Динамическое построение запроса
+        # Условия строятся теми же фильтрами, что и в списке номеров
+        room_filters = []
         if filters.get("room_number"):
-            query += " AND room_number ILIKE %s"
-            params.append(f"%{filters['room_number']}%")
-
+            room_filters.append(RoomNumberFilter(filters["room_number"]))
         if filters.get("category"):
-            query += " AND category = %s"
-            params.append(filters["category"])
-
-        if "min_capacity" in filters:
-            query += " AND capacity >= %s"
-            params.append(filters["min_capacity"])
+            room_filters.append(CategoryFilter(filters["category"]))
+        room_filters.append(
+            CapacityFilter(filters.get("min_capacity"), filters.get("max_capacity"))
+        )
+        if filters.get("is_available") is not None:
+            room_filters.append(AvailabilityFilter(filters["is_available"]))
+        room_filters.append(
+            PriceFilter(filters.get("min_price"), filters.get("max_price"))
+        )
 
-        if "max_capacity" in filters:
-            query += " AND capacity <= %s"
-            params.append(filters["max_capacity"])
+        builder = self.new_query()
+        for room_filter in room_filters:
+            condition, params = room_filter.to_sql()
+            builder.where(condition, *params)
+        builder.order_by("room_number")
 
-        if filters.get("is_available") is not None:
-            query += " AND is_available = %s"
-            params.append(filters["is_available"])
-
-        if "min_price" in filters:
-            query += " AND price_per_night >= %s"
-            params.append(filters["min_price"])
-
-        if "max_price" in filters:
-            query += " AND price_per_night <= %s"
-            params.append(filters["max_price"])
-
-        query += " ORDER BY room_number"
-
-        rows = self._db.execute_query(query, tuple(params))
-
-        return [
-            Room(
-                {
-                    "id": r[0],
-                    "room_number": r[1],
-                    "capacity": r[2],
-                    "is_available": r[3],
-                    "category": r[4],
-                    "price_per_night": r[5],
-                    "description": r[6],
-                },
-                from_dict=True,
-            )
-            for r in rows
-        ]
+        return self.find(builder)
 
     def update_availability(self, room_id: int, is_available: bool) -> bool:
         """Обновляет статус доступности номера."""
@@ -342,33 +330,14 @@ class RoomRepDB:
             """,
             (is_available, room_id),
         )
+        self._cache.invalidate(room_id)
         return rows_affected > 0
 
     def is_room_available_for_dates(
         self, room_id: int, check_in: str, check_out: str
     ) -> bool:
         """Проверяет, доступен ли номер на указанные даты."""
-        rows = self._db.execute_query(
-            """
-            SELECT COUNT(*)
-            FROM bookings
-            WHERE room_id = %s
-              AND status != 'cancelled'
-              AND (
-                (check_in <= %s
-              AND check_out >= %s)
-               OR
-                (check_in <= %s
-              AND check_out >= %s)
-               OR
-                (%s <= check_in
-              AND %s >= check_out)
-                )
-            """,
-            (room_id, check_out, check_in, check_in, check_out, check_in, check_out),
-        )
-
-        if rows and rows[0][0] > 0:
+        if self._availability.has_conflict(room_id, check_in, check_out):
             return False
 
         # Также проверяем, что номер вообще доступен
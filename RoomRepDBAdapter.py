@@ -3,7 +3,7 @@
 Предоставляет единый интерфейс для работы с репозиторием.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterator, Tuple
 from decimal import Decimal
 
 from RoomRepDB import RoomRepDB
@@ -34,6 +34,14 @@ class RoomRepDBAdapter:
         rooms = self._db_repo.get_all()
         return [self._room_to_dict(room) for room in rooms]
 
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Подсказки номеров по началу номера комнаты."""
+        return [self._room_to_dict(room) for room in self._db_repo.suggest(query, limit)]
+
+    def export(self) -> Tuple[Tuple[str, ...], Iterator[tuple]]:
+        """Заголовок и поток строк для выгрузки номеров (без загрузки в память)."""
+        return self._db_repo.EXPORT_COLUMNS, self._db_repo.export_rows()
+
     def get_count(self) -> int:
         """Количество номеров."""
         return self._db_repo.get_count()
@@ -66,9 +74,11 @@ class RoomRepDBAdapter:
         rooms = self._db_repo.search_rooms(filters)
         return [self._room_to_dict(room) for room in rooms]
 
-    def get_available_rooms(self) -> List[Dict[str, Any]]:
-        """Получает все доступные номера."""
-        rooms = self._db_repo.get_available_rooms()
+    def get_available_rooms(
+        self, check_in: Optional[str] = None, check_out: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Получает доступные номера (свободные на даты, если они заданы)."""
+        rooms = self._db_repo.get_available_rooms(check_in, check_out)
         return [self._room_to_dict(room) for room in rooms]
 
     def update_availability(self, room_id: int, is_available: bool) -> bool:
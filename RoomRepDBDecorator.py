@@ -3,10 +3,12 @@
 Позволяют динамически добавлять фильтрацию и сортировку.
 """
 
+import re
 from abc import ABC, abstractmethod
-from typing import List, Optional, Callable
+from typing import List, Optional, Callable, Tuple, Union
 from decimal import Decimal
 
+from QueryBuilder import QueryBuilder, escape_like
 from Room import Room
 from RoomRepDB import RoomRepDB
 
@@ -19,6 +21,12 @@ class RoomFilter(ABC):
         """Возвращает True, если комната проходит фильтр."""
         pass
 
+    def to_sql(self) -> Optional[Tuple[str, tuple]]:
+        """Возвращает SQL-условие и параметры (пустое условие - без ограничений)
+        или None, если у фильтра нет SQL-представления: тогда фильтры
+        применяются на стороне Python."""
+        return None
+
 
 class RoomNumberFilter(RoomFilter):
     """Фильтр по номеру комнаты (поиск по подстроке)."""
@@ -29,6 +37,11 @@ class RoomNumberFilter(RoomFilter):
     def filter(self, room: Room) -> bool:
         return self.number_substring in room.room_number.lower()
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        if not self.number_substring:
+            return "", ()
+        return "room_number ILIKE %s", ("%" + escape_like(self.number_substring) + "%",)
+
 
 class CategoryFilter(RoomFilter):
     """Фильтр по категории номера."""
@@ -39,6 +52,9 @@ class CategoryFilter(RoomFilter):
     def filter(self, room: Room) -> bool:
         return room.category == self.category
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        return "category = %s", (self.category,)
+
 
 class CapacityFilter(RoomFilter):
     """Фильтр по вместимости."""
@@ -56,6 +72,17 @@ class CapacityFilter(RoomFilter):
             return False
         return True
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        conditions = []
+        params = []
+        if self.min_capacity is not None:
+            conditions.append("capacity >= %s")
+            params.append(self.min_capacity)
+        if self.max_capacity is not None:
+            conditions.append("capacity <= %s")
+            params.append(self.max_capacity)
+        return " AND ".join(conditions), tuple(params)
+
 
 class AvailabilityFilter(RoomFilter):
     """Фильтр по доступности."""
@@ -66,6 +93,9 @@ class AvailabilityFilter(RoomFilter):
     def filter(self, room: Room) -> bool:
         return room.is_available == self.is_available
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        return "is_available = %s", (self.is_available,)
+
 
 class PriceFilter(RoomFilter):
     """Фильтр по цене."""
@@ -83,23 +113,58 @@ class PriceFilter(RoomFilter):
             return False
         return True
 
+    def to_sql(self) -> Tuple[str, tuple]:
+        conditions = []
+        params = []
+        if self.min_price is not None:
+            conditions.append("price_per_night >= %s")
+            params.append(self.min_price)
+        if self.max_price is not None:
+            conditions.append("price_per_night <= %s")
+            params.append(self.max_price)
+        return " AND ".join(conditions), tuple(params)
+
+
+# Натуральный порядок номеров: по числовому префиксу, номера без него - в конце,
+# при равенстве - по строке. Оба выражения совпадают с ключом _room_number_key
+# (COLLATE "C" сравнивает строки по кодам символов, как Python).
+_ROOM_NUMBER_SQL = (
+    "COALESCE(substring(room_number from '^[0-9]+')::numeric, 'Infinity')",
+    'room_number COLLATE "C"',
+)
+
+
+def _room_number_key(room: Room) -> Tuple[int, int, str]:
+    """Ключ натуральной сортировки номера комнаты ("20" раньше "101")."""
+    match = re.match(r"[0-9]+", room.room_number)
+    if match:
+        return 0, int(match.group()), room.room_number
+    return 1, 0, room.room_number
+
+
+def _sql_sorter(
+    sort_func: Callable[[List[Room]], List[Room]],
+    expression: Union[str, Tuple[str, ...]],
+    reverse: bool,
+) -> Callable[[List[Room]], List[Room]]:
+    """Прикрепляет к сортировщику эквивалентное SQL-выражение (или несколько
+    выражений по порядку) и направление."""
+    sort_func.sql_expression = expression
+    sort_func.sql_descending = reverse
+    return sort_func
+
 
 class RoomSorter:
     """Фабричные методы для создания функций сортировки номеров."""
 
     @staticmethod
     def by_room_number(reverse: bool = False) -> Callable[[Room], any]:
-        """Сортировка по номеру комнаты."""
-
-        def sorter(room: Room) -> str:
-            # Извлекаем числовую часть для правильной сортировки
-            import re
-            match = re.match(r"(\d+)", room.room_number)
-            if match:
-                return int(match.group(1)).zfill(4) + room.room_number
-            return room.room_number
-
-        return lambda rooms: sorted(rooms, key=sorter, reverse=reverse)
+        """Сортировка по номеру комнаты (натуральная: "20" раньше "101")."""
+        return _sql_sorter(
+            lambda rooms: sorted(rooms, key=_room_number_key, reverse=reverse),
+            _ROOM_NUMBER_SQL,
+            reverse,
+        )
 
     @staticmethod
     def by_price(reverse: bool = False) -> Callable[[Room], any]:
@@ -108,7 +173,9 @@ class RoomSorter:
         def sorter(room: Room) -> Decimal:
             return room.price_per_night
 
-        return lambda rooms: sorted(rooms, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda rooms: sorted(rooms, key=sorter, reverse=reverse), "price_per_night", reverse
+        )
 
     @staticmethod
     def by_capacity(reverse: bool = False) -> Callable[[Room], any]:
@@ -117,7 +184,9 @@ class RoomSorter:
         def sorter(room: Room) -> int:
             return room.capacity
 
-        return lambda rooms: sorted(rooms, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda rooms: sorted(rooms, key=sorter, reverse=reverse), "capacity", reverse
+        )
 
     @staticmethod
     def by_category(reverse: bool = False) -> Callable[[Room], any]:
@@ -126,7 +195,9 @@ class RoomSorter:
         def sorter(room: Room) -> str:
             return room.category
 
-        return lambda rooms: sorted(rooms, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda rooms: sorted(rooms, key=sorter, reverse=reverse), "category", reverse
+        )
 
     @staticmethod
     def by_id(reverse: bool = False) -> Callable[[Room], any]:
@@ -135,7 +206,9 @@ class RoomSorter:
         def sorter(room: Room) -> int:
             return room.id
 
-        return lambda rooms: sorted(rooms, key=sorter, reverse=reverse)
+        return _sql_sorter(
+            lambda rooms: sorted(rooms, key=sorter, reverse=reverse), "id", reverse
+        )
 
 
 class RoomRepDBDecorator:
@@ -160,27 +233,81 @@ class RoomRepDBDecorator:
         """Получает номер по ID."""
         return self._base_repo.get_by_id(room_id)
 
-    def get_all(self) -> List[Room]:
-        """Получает все номера с применением фильтров и сортировки."""
+    def _build_query(
+        self, extra_filters: Optional[List[RoomFilter]] = None
+    ) -> Optional[QueryBuilder]:
+        """Переводит фильтры и сортировку в один SQL-запрос.
+        Возвращает None, если что-то из них нельзя выполнить в базе данных."""
+        builder = self._base_repo.new_query()
+        for room_filter in self._filters + (extra_filters or []):
+            sql = room_filter.to_sql()
+            if sql is None:
+                return None
+            builder.where(*sql)
+
+        if self._sorter:
+            expression = getattr(self._sorter, "sql_expression", None)
+            if expression is None:
+                return None
+            if isinstance(expression, str):
+                expression = (expression,)
+            for item in expression:
+                builder.order_by(item, self._sorter.sql_descending)
+            # id по возрастанию при любом направлении делает порядок однозначным,
+            # совпадает с резервным путем и замыкает ключ keyset-пагинации
+            builder.order_by("id")
+            return builder
+        # порядок по умолчанию совпадает с RoomRepDB.get_all
+        builder.order_by("room_number")
+        builder.order_by("id")
+        return builder
+
+    def _filter_and_sort_in_python(
+        self, extra_filters: Optional[List[RoomFilter]] = None
+    ) -> List[Room]:
+        """Резервный путь: загружает все номера и обрабатывает их в Python."""
         rooms = self._base_repo.get_all()
 
         # Применяем фильтры
-        for room_filter in self._filters:
+        for room_filter in self._filters + (extra_filters or []):
             rooms = [r for r in rooms if room_filter.filter(r)]
 
-        # Применяем сортировку
+        # Применяем сортировку. Сортировка устойчива (и при reverse): после
+        # предварительной сортировки по id равные по ключу идут по
+        # возрастанию id - как в SQL
         if self._sorter:
+            rooms.sort(key=lambda room: room.id)
             rooms = self._sorter(rooms)
 
         return rooms
 
+    def get_all(self) -> List[Room]:
+        """Получает все номера с применением фильтров и сортировки."""
+        builder = self._build_query()
+        if builder is not None:
+            return self._base_repo.find(builder)
+        return self._filter_and_sort_in_python()
+
     def get_k_n_short_list(self, k: int, n: int) -> List[Room]:
         """Пагинация с применением фильтров и сортировки."""
-        all_rooms = self.get_all()
+        offset = (n - 1) * k
+        builder = self._build_query()
+        if builder is not None:
+            return self._base_repo.find(builder.paginate(k, offset))
 
         # Пагинация
-        offset = (n - 1) * k
-        return all_rooms[offset : offset + k]
+        return self._filter_and_sort_in_python()[offset : offset + k]
+
+    def get_page(
+        self, k: int, n: int = 1, cursor: Optional[str] = None
+    ) -> Tuple[List[Room], Optional[str]]:
+        """Возвращает k записей после курсора (или со страницы n) и курсор следующей."""
+        builder = self._build_query()
+        if builder is None:
+            if cursor:
+                raise ValueError("Курсор не поддерживается для выбранных фильтров!")
+            return self.get_k_n_short_list(k, n), None
+        return self._base_repo.find_page(builder.after_cursor(cursor, k, (n - 1) * k))
 
     def read_all(self) -> List[Room]:
         """Алиас для get_all (для совместимости)."""
@@ -188,22 +315,30 @@ class RoomRepDBDecorator:
 
     def get_count(self) -> int:
         """Получает количество отфильтрованных номеров."""
-        return len(self.get_all())
+        builder = self._build_query()
+        if builder is not None:
+            return self._base_repo.count_where(builder)
+        return len(self._filter_and_sort_in_python())
 
     def search_rooms(self, filters: dict) -> List[Room]:
         """Поиск номеров (делегируем базовому репозиторию)."""
         return self._base_repo.search_rooms(filters)
 
-    def get_available_rooms(self) -> List[Room]:
-        """Получает доступные номера с фильтрами."""
+    def get_available_rooms(
+        self, check_in: Optional[str] = None, check_out: Optional[str] = None
+    ) -> List[Room]:
+        """Получает доступные номера с фильтрами; с датами - свободные на них."""
         # Добавляем фильтр доступности, если его еще нет
         has_availability_filter = any(
             isinstance(f, AvailabilityFilter) for f in self._filters
         )
-
-        if not has_availability_filter:
-            temp_filter = AvailabilityFilter(True)
-            filtered_rooms = [r for r in self.get_all() if temp_filter.filter(r)]
-            return filtered_rooms
-
-        return self.get_all()
\ No newline at end of file
+        extra_filters = [] if has_availability_filter else [AvailabilityFilter(True)]
+
+        builder = self._build_query(extra_filters)
+        if builder is not None:
+            rooms = self._base_repo.find(builder)
+        else:
+            rooms = self._filter_and_sort_in_python(extra_filters)
+        if check_in and check_out:
+            rooms = self._base_repo.filter_free_for_dates(rooms, check_in, check_out)
+        return rooms
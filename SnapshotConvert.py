@@ -0,0 +1,91 @@
+"""Конвертер наборов данных в столбцовые снимки и обратно.
+
+Запуск:
+    python SnapshotConvert.py clients.json clients.csnp   # JSON/YAML/NDJSON -> снимок
+    python SnapshotConvert.py clients.csnp clients.yaml   # снимок -> JSON/YAML/NDJSON
+    python SnapshotConvert.py --db clients|rooms|bookings файл.csnp   # выгрузка из БД
+Формат файла клиентов определяется расширением.
+"""
+
+import os
+import sys
+from typing import Any, Dict, Tuple, Type
+
+from BookingRepColumnar import BookingRepColumnar
+from BookingRepDB import BookingRepDB
+from ClientRepColumnar import CLIENT_SCHEMA, ClientRepColumnar
+from ClientRepDB import ClientRepDB
+from ClientRepJson import ClientRepJson
+from ClientRepNdjson import ClientRepNdjson
+from ClientRepository import ClientRepository
+from ClientRepYaml import ClientRepYaml
+from ColumnarSnapshot import ColumnarSnapshot
+from RoomRepColumnar import RoomRepColumnar
+from RoomRepDB import RoomRepDB
+
+CLIENT_FORMATS: Dict[str, Type[ClientRepository]] = {
+    ".json": ClientRepJson,
+    ".yaml": ClientRepYaml,
+    ".yml": ClientRepYaml,
+    ".ndjson": ClientRepNdjson,
+    ".csnp": ClientRepColumnar,
+}
+
+# сущность -> (репозиторий БД с export_rows(), столбцы снимка)
+DB_EXPORTS: Dict[str, Tuple[Type[Any], tuple]] = {
+    "clients": (ClientRepDB, CLIENT_SCHEMA),
+    "rooms": (RoomRepDB, RoomRepColumnar.SCHEMA),
+    "bookings": (BookingRepDB, BookingRepColumnar.SCHEMA),
+}
+
+
+def client_repository(path: str) -> ClientRepository:
+    """Файловый репозиторий клиентов по расширению файла."""
+    extension = os.path.splitext(path)[1].lower()
+    repo_class = CLIENT_FORMATS.get(extension)
+    if repo_class is None:
+        raise ValueError(
+            f"Неизвестный формат {extension or path}: "
+            f"поддерживаются {', '.join(CLIENT_FORMATS)}"
+        )
+    return repo_class(path)
+
+
+def convert_clients(source_path: str, target_path: str) -> int:
+    """Переносит клиентов между файлами любых форматов CLIENT_FORMATS
+    (с учетом журналов изменений). Возвращает количество клиентов."""
+    if not os.path.exists(source_path):
+        raise ValueError(f"Файл {source_path} не найден!")
+    source = client_repository(source_path)
+    target = client_repository(target_path)
+    target.clients = source.clients
+    target.compact()  # основной файл перезаписывается, журнал очищается
+    count = target.get_count()
+    source.close()
+    target.close()
+    return count
+
+
+def export_from_db(entity: str, target_path: str) -> int:
+    """Выгружает сущность из базы данных в снимок потоком строк export_rows().
+    Возвращает количество строк."""
+    if entity not in DB_EXPORTS:
+        raise ValueError(f"Неизвестная сущность: {entity}")
+    repo_class, schema = DB_EXPORTS[entity]
+    return ColumnarSnapshot.write(target_path, schema, repo_class().export_rows())
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    try:
+        if len(args) == 3 and args[0] == "--db":
+            count = export_from_db(args[1], args[2])
+        elif len(args) == 2:
+            count = convert_clients(args[0], args[1])
+        else:
+            print(__doc__)
+            sys.exit(2)
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    print(f"Записано: {count}")
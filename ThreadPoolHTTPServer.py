@@ -0,0 +1,80 @@
+"""HTTP сервер, обрабатывающий запросы в пуле рабочих потоков."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import HTTPServer
+
+# ответ клиенту, когда очередь запросов переполнена
+_OVERLOADED_RESPONSE = (
+    b"HTTP/1.0 503 Service Unavailable\r\n"
+    b"Retry-After: 1\r\n"
+    b"Content-Type: application/json; charset=utf-8\r\n"
+    b"Content-Length: 30\r\n"
+    b"\r\n"
+    b'{"error": "Server overloaded"}'
+)
+
+
+class ThreadPoolHTTPServer(HTTPServer):
+    """HTTPServer с фиксированным числом потоков и ограниченной очередью запросов."""
+
+    def __init__(
+        self, server_address, handler_class, workers: int = 8, queue_size: int = 32
+    ) -> None:
+        if workers < 1:
+            raise ValueError("Количество рабочих потоков должно быть положительным!")
+        if queue_size < 0:
+            raise ValueError("Размер очереди не может быть отрицательным!")
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="http-worker"
+        )
+        # выполняющиеся запросы + ожидающие в очереди
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._stats_lock = threading.Lock()
+        self._in_flight = 0
+        self._rejected = 0
+
+    def process_request(self, request, client_address) -> None:
+        """Ставит запрос в очередь пула или отклоняет его с кодом 503."""
+        if not self._slots.acquire(blocking=False):
+            with self._stats_lock:
+                self._rejected += 1
+            try:
+                request.sendall(_OVERLOADED_RESPONSE)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        with self._stats_lock:
+            self._in_flight += 1
+        self._executor.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address) -> None:
+        """Обрабатывает запрос в рабочем потоке."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._stats_lock:
+                self._in_flight -= 1
+            self._slots.release()
+
+    def server_close(self) -> None:
+        """Закрывает сокет и дожидается завершения уже принятых запросов."""
+        super().server_close()
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> dict:
+        """Текущая загрузка сервера."""
+        with self._stats_lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
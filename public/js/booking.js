@@ -1,3 +1,39 @@
+const SUGGEST_LIMIT = 20;       // подсказок в выпадающем списке
+const SUGGEST_DELAY_MS = 250;   // пауза ввода перед запросом подсказок
+
+/**
+ * Источники подсказок для выпадающих списков формы бронирования
+ */
+const SUGGEST_CONFIG = {
+    client: {
+        url: '/api/clients/suggest',
+        detailUrl: id => `/api/clients/${id}`,
+        selectId: 'client_id',
+        searchId: 'client_search',
+        placeholder: 'Выберите клиента',
+        option: client => {
+            const option = document.createElement('option');
+            option.value = client.id;
+            option.textContent = `${client.surname} ${client.name} (ID: ${client.id})`;
+            return option;
+        }
+    },
+    room: {
+        url: '/api/rooms/suggest',
+        detailUrl: id => `/api/rooms/${id}`,
+        selectId: 'room_id',
+        searchId: 'room_search',
+        placeholder: 'Выберите номер',
+        option: room => {
+            const option = document.createElement('option');
+            option.value = room.id;
+            option.textContent = `Номер ${room.room_number} (${room.category}, ${room.price_per_night} ₽)`;
+            option.dataset.price = room.price_per_night;
+            return option;
+        }
+    }
+};
+
 /**
  * Репозиторий для работы с API бронирований с паттерном Наблюдатель
  */
@@ -349,11 +385,23 @@ class BookingFormController {
                 this._calculateAndDisplayPrice();
             };
 
+            // Для нового бронирования список номеров зависит от выбранных дат
+            const reloadRooms = () => {
+                if (this.mode !== 'edit') {
+                    this._loadAvailableRooms();
+                }
+            };
+
             checkInInput.addEventListener('change', recalculatePrice);
             checkOutInput.addEventListener('change', recalculatePrice);
+            checkInInput.addEventListener('change', reloadRooms);
+            checkOutInput.addEventListener('change', reloadRooms);
             roomIdSelect.addEventListener('change', recalculatePrice);
         }
 
+        this._setupTypeahead('client');
+        this._setupTypeahead('room');
+
         form.querySelectorAll('.form-input').forEach(input => {
             input.addEventListener('blur', () => this._validateField(input));
             input.addEventListener('input', () => this._clearFieldError(input));
@@ -361,49 +409,119 @@ class BookingFormController {
     }
 
     async _loadDropdownData() {
+        // Списки заполняются подсказками (первые совпадения по префиксу),
+        // а не всеми клиентами и номерами. Номера нового бронирования
+        // загружает _loadAvailableRooms по выбранным датам.
+        const loads = [this._loadSuggestions('client')];
+        if (this.mode === 'edit') {
+            loads.push(this._loadSuggestions('room'));
+        }
+        await Promise.all(loads);
+    }
+
+    async _loadSuggestions(kind, query = '') {
+        const config = SUGGEST_CONFIG[kind];
+        const select = document.getElementById(config.selectId);
+        if (!select) return;
+
         try {
-            // Загружаем клиентов
-            const clientsResponse = await fetch('/api/clients/all');
-            if (clientsResponse.ok) {
-                const clientsData = await clientsResponse.json();
-                const clientSelect = document.getElementById('client_id');
-                if (clientSelect && clientsData.items) {
-                    clientSelect.innerHTML = '<option value="">Выберите клиента</option>';
-                    clientsData.items.forEach(client => {
-                        const option = document.createElement('option');
-                        option.value = client.id;
-                        option.textContent = `${client.surname} ${client.name} (ID: ${client.id})`;
-                        clientSelect.appendChild(option);
-                    });
-                } else {
-                    console.error('Некорректный формат данных клиентов:', clientsData);
-                }
-            } else {
-                console.error('Ошибка при загрузке клиентов:', clientsResponse.status);
+            const params = new URLSearchParams({ q: query, limit: SUGGEST_LIMIT });
+            const response = await fetch(`${config.url}?${params}`);
+            if (!response.ok) {
+                console.error('Ошибка при загрузке подсказок:', response.status);
+                return;
+            }
+            const data = await response.json();
+            this._fillSelect(select, config, data.items || []);
+        } catch (error) {
+            console.error('Ошибка при загрузке подсказок:', error);
+        }
+    }
+
+    _fillSelect(select, config, items) {
+        const selected = select.value;
+        const selectedOption = selected ? select.options[select.selectedIndex] : null;
+
+        select.innerHTML = `<option value="">${config.placeholder}</option>`;
+        items.forEach(item => select.appendChild(config.option(item)));
+
+        // выбранное значение остается в списке, даже если не подходит под запрос
+        if (selectedOption && !items.some(item => String(item.id) === selected)) {
+            select.appendChild(selectedOption);
+        }
+        select.value = selected;
+    }
+
+    async _ensureOption(kind, id) {
+        // при редактировании выбранные клиент и номер могут не попасть в подсказки
+        const config = SUGGEST_CONFIG[kind];
+        const select = document.getElementById(config.selectId);
+        if (!select || !id || select.querySelector(`option[value="${id}"]`)) return;
+
+        try {
+            const response = await fetch(config.detailUrl(id));
+            if (response.ok) {
+                select.appendChild(config.option(await response.json()));
             }
+        } catch (error) {
+            console.error('Ошибка при загрузке выбранного значения:', error);
+        }
+    }
 
-            // Загружаем номера
-            const roomsResponse = await fetch('/api/rooms/all');
-            if (roomsResponse.ok) {
-                const roomsData = await roomsResponse.json();
-                const roomSelect = document.getElementById('room_id');
-                if (roomSelect && roomsData.items) {
-                    roomSelect.innerHTML = '<option value="">Выберите номер</option>';
-                    roomsData.items.forEach(room => {
-                        const option = document.createElement('option');
-                        option.value = room.id;
-                        option.textContent = `Номер ${room.room_number} (${room.category}, ${room.price_per_night} ₽)`;
-                        option.dataset.price = room.price_per_night;
-                        roomSelect.appendChild(option);
-                    });
+    _setupTypeahead(kind) {
+        const config = SUGGEST_CONFIG[kind];
+        const input = document.getElementById(config.searchId);
+        if (!input) return;
+
+        let timer = null;
+        input.addEventListener('input', () => {
+            clearTimeout(timer);
+            timer = setTimeout(() => {
+                if (kind === 'room' && this.mode !== 'edit') {
+                    // для нового бронирования ищем среди свободных на даты номеров
+                    this._renderAvailableRooms();
                 } else {
-                    console.error('Некорректный формат данных номеров:', roomsData);
+                    this._loadSuggestions(kind, input.value.trim());
                 }
-            } else {
-                console.error('Ошибка при загрузке номеров:', roomsResponse.status);
+            }, SUGGEST_DELAY_MS);
+        });
+    }
+
+    async _loadAvailableRooms() {
+        const checkIn = document.getElementById('check_in')?.value;
+        const checkOut = document.getElementById('check_out')?.value;
+        const roomSelect = document.getElementById('room_id');
+
+        if (!checkIn || !checkOut || !roomSelect || checkOut <= checkIn) {
+            return;
+        }
+
+        try {
+            const params = new URLSearchParams({ check_in: checkIn, check_out: checkOut });
+            const response = await fetch(`/api/rooms/available?${params}`);
+            if (!response.ok) {
+                console.error('Ошибка при загрузке свободных номеров:', response.status);
+                return;
             }
+            this.availableRooms = await response.json();
+            this._renderAvailableRooms();
         } catch (error) {
-            console.error('Ошибка при загрузке данных для выпадающих списков:', error);
+            console.error('Ошибка при загрузке свободных номеров:', error);
+        }
+    }
+
+    _renderAvailableRooms() {
+        const roomSelect = document.getElementById('room_id');
+        const selected = roomSelect.value;
+        const prefix = (document.getElementById('room_search')?.value || '').trim().toLowerCase();
+        const rooms = (this.availableRooms || [])
+            .filter(room => String(room.room_number).toLowerCase().startsWith(prefix));
+
+        roomSelect.innerHTML = `<option value="">${SUGGEST_CONFIG.room.placeholder}</option>`;
+        rooms.forEach(room => roomSelect.appendChild(SUGGEST_CONFIG.room.option(room)));
+        // сохраняем выбор, если номер свободен на новые даты
+        if (rooms.some(room => String(room.id) === selected)) {
+            roomSelect.value = selected;
         }
     }
 
@@ -501,6 +619,7 @@ class BookingFormController {
             this._showFormReady();
             // Устанавливаем даты по умолчанию для нового бронирования
             this._setDefaultDates();
+            await this._loadAvailableRooms();
         }
     }
 
@@ -545,7 +664,12 @@ class BookingFormController {
                 throw new Error(result.error || 'Не удалось загрузить данные');
             }
 
-            this._populateForm(result.data || result);
+            const bookingData = result.data || result;
+            await Promise.all([
+                this._ensureOption('client', bookingData.client_id),
+                this._ensureOption('room', bookingData.room_id),
+            ]);
+            this._populateForm(bookingData);
             this._showFormReady();
 
         } catch (error) {
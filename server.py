@@ -1,6 +1,11 @@
 """HTTP сервер с REST API для управления клиентами, номерами и бронированиями"""
 
+import csv
+import io
+import itertools
 import json  # модуль для работы с JSON (сериализация/десериализация)
+import signal
+import threading
 from functools import (
     partial,
 )  # функция для частичного применения аргументов, используется для создания обработчика с фиксированными параметрами
@@ -8,10 +13,19 @@ from http.server import (
     HTTPServer,
     SimpleHTTPRequestHandler,
 )  # базовый HTTP сервер и обработчик для статических файлов
+from datetime import date, datetime
+from decimal import Decimal
 from pathlib import Path
 from typing import Any, Dict
 from urllib.parse import parse_qs, urlparse  # функции для работы с UR
 
+from ClientRepDB import DatabaseConnection
+from EntityCache import EntityCache
+from Migrations import migrate
+from OccupancyCache import OccupancyCache
+from RepositoryRegistry import LazyController, RepositoryRegistry
+from ThreadPoolHTTPServer import ThreadPoolHTTPServer
+
 from ClientController import ClientController
 from AddClientController import AddClientController
 from EditClientController import EditClientController
@@ -34,25 +48,43 @@ BASE_DIR = Path(
 ).parent  # получает путь к директории, где находится файл server.py
 PUBLIC_DIR = BASE_DIR / "public"  # создает путь к директории public
 
+# выгружаемые сущности: путь /api/export/{имя} -> репозиторий в RepositoryRegistry
+EXPORT_ENTITIES = {"clients": "client", "rooms": "room", "bookings": "booking"}
+EXPORT_FORMATS = {  # формат выгрузки -> Content-Type
+    "ndjson": "application/x-ndjson; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+}
+EXPORT_CHUNK_SIZE = 64 * 1024  # байт, накапливаемых перед записью в сокет
+
+SERVER_CONFIG = {  # константа с настройками многопоточного режима
+    "workers": 8,  # количество рабочих потоков (0 - однопоточный режим)
+    "queue_size": 32,  # сколько принятых запросов может ждать свободный поток
+    "request_timeout": 30,  # таймаут чтения запроса от медленного клиента
+}
+
 
 class UnifiedRequestHandler(SimpleHTTPRequestHandler):
     """HTTP обработчик для всех сущностей: клиентов, номеров и бронирований"""
 
-    # Инициализация контроллеров для всех сущностей
-    client_controller = ClientController()
-    add_client_controller = AddClientController()
-    edit_client_controller = EditClientController()
-    delete_client_controller = DeleteClientController()
+    # медленный клиент не должен занимать рабочий поток бесконечно
+    timeout = SERVER_CONFIG["request_timeout"]
+
+    # Контроллеры для всех сущностей: создаются при первом обращении
+    # и используют общие для процесса репозитории из RepositoryRegistry
+    client_controller = LazyController(ClientController)
+    add_client_controller = LazyController(AddClientController)
+    edit_client_controller = LazyController(EditClientController)
+    delete_client_controller = LazyController(DeleteClientController)
 
-    room_controller = RoomController()
-    add_room_controller = AddRoomController()
-    edit_room_controller = EditRoomController()
-    delete_room_controller = DeleteRoomController()
+    room_controller = LazyController(RoomController)
+    add_room_controller = LazyController(AddRoomController)
+    edit_room_controller = LazyController(EditRoomController)
+    delete_room_controller = LazyController(DeleteRoomController)
 
-    booking_controller = BookingController()
-    add_booking_controller = AddBookingController()
-    edit_booking_controller = EditBookingController()
-    delete_booking_controller = DeleteBookingController()
+    booking_controller = LazyController(BookingController)
+    add_booking_controller = LazyController(AddBookingController)
+    edit_booking_controller = LazyController(EditBookingController)
+    delete_booking_controller = LazyController(DeleteBookingController)
 
     def __init__(self, *args, directory: str | None = None, **kwargs) -> None:
         directory = directory or str(
@@ -75,8 +107,13 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
                 "/"
             )  # удаляем завершаюшие / и разбиваем путь на части
 
+            # формат: /api/clients/suggest?q= - подсказки для выбора клиента
+            if len(path_parts) == 4 and path_parts[3] == "suggest":
+                self._handle_suggest(self.client_controller.suggest_clients, parsed)
+                return
+
             # формат: /api/clients/{id} - детальная информация
-            if len(path_parts) == 4:
+            elif len(path_parts) == 4:
                 try:
                     client_id = int(path_parts[3])  # преобразовали id в число
                     self._handle_client_detail(
@@ -108,8 +145,18 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
         elif parsed.path.startswith("/api/rooms/"):
             path_parts = parsed.path.rstrip("/").split("/")
 
+            # формат: /api/rooms/available - доступные номера
+            if len(path_parts) == 4 and path_parts[3] == "available":
+                self._handle_available_rooms(parsed)
+                return
+
+            # формат: /api/rooms/suggest?q= - подсказки для выбора номера
+            elif len(path_parts) == 4 and path_parts[3] == "suggest":
+                self._handle_suggest(self.room_controller.suggest_rooms, parsed)
+                return
+
             # формат: /api/rooms/{id} - детальная информация
-            if len(path_parts) == 4:
+            elif len(path_parts) == 4:
                 try:
                     room_id = int(path_parts[3])
                     self._handle_room_detail(room_id)
@@ -130,11 +177,6 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
                 except (ValueError, IndexError):
                     pass
 
-            # формат: /api/rooms/available - доступные номера
-            elif len(path_parts) == 5 and path_parts[4] == "available":
-                self._handle_available_rooms(parsed)
-                return
-
         elif parsed.path == "/api/bookings":  # обрабатывает список бронирований
             self._handle_bookings_list(parsed)
             return
@@ -174,6 +216,17 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
             self._handle_all_rooms()
             return
 
+        elif parsed.path.startswith("/api/export/"):
+            # потоковая выгрузка: /api/export/{clients|rooms|bookings}?format=ndjson|csv
+            entity = parsed.path.rstrip("/").split("/")[-1]
+            self._handle_export(entity, parse_qs(parsed.query))
+            return
+
+        elif parsed.path == "/api/stats":
+            # Метрики пула соединений и кэшей
+            self._handle_stats()
+            return
+
         # отдаем статику
         if parsed.path == "/":  # перенаправлям на index, когда захрдим на сервер
             self.path = "/index.html"
@@ -248,6 +301,10 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
             self._handle_add_booking()
             return
 
+        elif parsed.path == "/api/bookings/import":
+            self._handle_import_bookings(parse_qs(parsed.query))
+            return
+
         elif parsed.path.startswith("/api/bookings/"):
             path_parts = parsed.path.rstrip("/").split("/")
 
@@ -321,6 +378,7 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
         # извлекаем параметры сортировки
         sort_by = query.get("sort", [None])[0]
         sort_order = query.get("sort_order", ["asc"])[0]
+        cursor = query.get("cursor", [None])[0]  # курсор keyset-пагинации
 
         # вызываем основной контроллер и отправляем json ответ
         try:
@@ -330,8 +388,11 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
                 filters=filters,
                 sort_by=sort_by,
                 sort_order=sort_order,
+                cursor=cursor,
             )
             self._send_json(payload)
+        except ValueError as e:  # некорректный курсор пагинации
+            self._send_json({"error": str(e)}, status=400)
         except Exception as e:
             self._send_json({"error": f"Ошибка сервера: {str(e)}"}, status=500)
 
@@ -428,6 +489,85 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
                 {"success": False, "message": f"Ошибка сервера: {str(e)}"}, status=500
             )
 
+    # подсказки для выпадающих списков: ?q=<префикс>&limit=<N>
+    def _handle_suggest(self, suggest, parsed) -> None:
+        query = parse_qs(parsed.query)
+        text = query.get("q", [""])[0]
+        limit = self._safe_int(query.get("limit", [None])[0], default=10)
+        try:
+            self._send_json(suggest(text, limit))
+        except Exception as e:
+            self._send_json({"error": f"Ошибка сервера: {str(e)}"}, status=500)
+
+    # потоковая выгрузка таблицы в NDJSON или CSV
+    def _handle_export(self, entity: str, query: Dict[str, list]) -> None:
+        fmt = query.get("format", ["ndjson"])[0]
+        if entity not in EXPORT_ENTITIES or fmt not in EXPORT_FORMATS:
+            self._send_json(
+                {"error": "Неизвестная сущность или формат (ndjson, csv)"}, status=400
+            )
+            return
+
+        try:
+            repository = RepositoryRegistry().repository(EXPORT_ENTITIES[entity])
+            columns, rows = repository.export()
+            # первая порция читается до заголовков, чтобы ошибку можно было вернуть
+            first = next(rows, None)
+        except Exception as e:
+            self._send_json({"error": f"Ошибка сервера: {str(e)}"}, status=500)
+            return
+
+        # длина заранее неизвестна: тело ограничивается закрытием соединения
+        self.send_response(200)
+        self.send_header("Content-Type", EXPORT_FORMATS[fmt])
+        self.send_header(
+            "Content-Disposition", f'attachment; filename="{entity}.{fmt}"'
+        )
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if fmt == "csv" else None
+        if writer:
+            writer.writerow(columns)
+        try:
+            for row in itertools.chain(() if first is None else (first,), rows):
+                values = [self._export_value(v) for v in row]
+                if writer:
+                    writer.writerow(values)
+                else:
+                    record = dict(zip(columns, values))
+                    buffer.write(json.dumps(record, ensure_ascii=False) + "\n")
+                if buffer.tell() >= EXPORT_CHUNK_SIZE:
+                    self.wfile.write(buffer.getvalue().encode("utf-8"))
+                    buffer.seek(0)
+                    buffer.truncate()
+            self.wfile.write(buffer.getvalue().encode("utf-8"))
+        finally:
+            rows.close()  # серверный курсор и соединение возвращаются в пул
+
+    @staticmethod
+    def _export_value(value: Any) -> Any:
+        """Значение столбца в виде, пригодном для JSON и CSV."""
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        if isinstance(value, Decimal):
+            return float(value)
+        return value
+
+    # метрики пула соединений, кэшей и HTTP сервера
+    def _handle_stats(self) -> None:
+        payload = {
+            "pool": DatabaseConnection().pool_stats(),
+            "caches": EntityCache.all_stats(),
+            "occupancy": OccupancyCache().stats(),
+        }
+        if isinstance(self.server, ThreadPoolHTTPServer):
+            payload["server"] = self.server.stats()
+        self._send_json(payload)
+
     # получение всех клиентов для выпадающих списков
     def _handle_all_clients(self):
         """Получение всех клиентов для выпадающих списков"""
@@ -455,6 +595,7 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
         # извлекаем параметры сортировки
         sort_by = query.get("sort", [None])[0]
         sort_order = query.get("sort_order", ["asc"])[0]
+        cursor = query.get("cursor", [None])[0]  # курсор keyset-пагинации
 
         try:
             payload = self.room_controller.get_rooms_list(
@@ -463,8 +604,11 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
                 filters=filters,
                 sort_by=sort_by,
                 sort_order=sort_order,
+                cursor=cursor,
             )
             self._send_json(payload)
+        except ValueError as e:  # некорректный курсор пагинации
+            self._send_json({"error": str(e)}, status=400)
         except Exception as e:
             self._send_json({"error": f"Ошибка сервера: {str(e)}"}, status=500)
 
@@ -562,12 +706,10 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
                 self._send_json({"error": "Необходимо указать check_in и check_out"}, status=400)
                 return
 
-            # Здесь нужно реализовать логику получения доступных номеров
-            # Пока возвращаем все доступные номера
-            filters = {"is_available": True}
-            result = self.room_controller.get_rooms_list(filters=filters, page_size=None, page=1)
-            self._send_json(result["items"])
+            self._send_json(self.room_controller.get_available_rooms(check_in, check_out))
 
+        except ValueError as e:
+            self._send_json({"error": str(e)}, status=400)
         except Exception as e:
             self._send_json({"error": f"Ошибка сервера: {str(e)}"}, status=500)
 
@@ -598,6 +740,7 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
         # извлекаем параметры сортировки
         sort_by = query.get("sort", [None])[0]
         sort_order = query.get("sort_order", ["asc"])[0]
+        cursor = query.get("cursor", [None])[0]  # курсор keyset-пагинации
 
         try:
             payload = self.booking_controller.get_bookings_list(
@@ -606,8 +749,11 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
                 filters=filters,
                 sort_by=sort_by,
                 sort_order=sort_order,
+                cursor=cursor,
             )
             self._send_json(payload)
+        except ValueError as e:  # некорректный курсор пагинации
+            self._send_json({"error": str(e)}, status=400)
         except Exception as e:
             self._send_json({"error": f"Ошибка сервера: {str(e)}"}, status=500)
 
@@ -657,6 +803,27 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
         except Exception as e:
             self._send_json({"error": f"Ошибка сервера: {str(e)}"}, status=500)
 
+    # пакетный импорт бронирований: NDJSON (по умолчанию) или CSV
+    def _handle_import_bookings(self, query: Dict[str, list]) -> None:
+        fmt = query.get("format", [""])[0]
+        if not fmt:
+            content_type = self.headers.get("Content-Type", "")
+            fmt = "csv" if "csv" in content_type else "ndjson"
+        if fmt not in ("ndjson", "csv"):
+            self._send_json({"error": "Формат должен быть ndjson или csv"}, status=400)
+            return
+
+        try:
+            content_length = int(self.headers["Content-Length"])
+            post_data = self.rfile.read(content_length)
+            lines = io.StringIO(post_data.decode("utf-8-sig"), newline="")
+            result = self.add_booking_controller.import_bookings(lines, fmt)
+            self._send_json(result, status=200 if result.get("imported") else 400)
+        except (TypeError, ValueError, KeyError) as e:
+            self._send_json({"error": f"Некорректный запрос: {e}"}, status=400)
+        except Exception as e:
+            self._send_json({"error": f"Ошибка сервера: {str(e)}"}, status=500)
+
     # обновление бронирования
     def _handle_edit_booking(self, booking_id: int) -> None:
         try:
@@ -714,6 +881,10 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
         if phone_substring:
             filters["phone_substring"] = phone_substring
 
+        search = query.get("q", [""])[0].strip()  # поиск по ФИО, телефону и паспорту
+        if search:
+            filters["q"] = search
+
         return filters  # передаем в контроллер
 
     # извлечение фильтров для номеров
@@ -808,13 +979,38 @@ class UnifiedRequestHandler(SimpleHTTPRequestHandler):
         self.wfile.write(body)  # записывает тело ответа
 
 
-def run_server(host: str = "127.0.0.1", port: int = 8000) -> None:
+def run_server(
+    host: str = "127.0.0.1",
+    port: int = 8000,
+    workers: int = SERVER_CONFIG["workers"],
+    queue_size: int = SERVER_CONFIG["queue_size"],
+) -> None:
+    migrate()  # схема создается один раз при запуске, а не при первом запросе
     handler = partial(UnifiedRequestHandler, directory=str(PUBLIC_DIR))
-    with HTTPServer((host, port), handler) as httpd:
+    if workers > 0:
+        httpd = ThreadPoolHTTPServer(
+            (host, port), handler, workers=workers, queue_size=queue_size
+        )
+    else:
+        httpd = HTTPServer((host, port), handler)
+
+    def stop(signum, frame):
+        # shutdown() ждет выхода из serve_forever, поэтому вызывается из другого потока
+        threading.Thread(target=httpd.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+
+    with httpd:  # при выходе server_close() дожидается обработки принятых запросов
         print(f"Сервер запущен: http://{host}:{port}")
+        if workers > 0:
+            print(f"Рабочих потоков: {workers}, очередь: {queue_size}")
 
         print("\nCtrl+C для остановки")
-        httpd.serve_forever()  # бесконечный цикл обработки запросов
+        try:
+            httpd.serve_forever()  # бесконечный цикл обработки запросов
+        except KeyboardInterrupt:
+            pass
+        print("Сервер остановлен, завершаем обработку текущих запросов...")
 
 
 if __name__ == "__main__":